@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from io import BytesIO
+import tempfile
+import zipfile
+
+from planner import analytics, archive, charts, export, filters, metrics, store, sync, weeks
 
 try:
     from fpdf import FPDF
@@ -11,21 +15,23 @@ except ImportError:
     FPDF_AVAILABLE = False
 
 
-def get_week_dates(year, week_num):
-    """Get start and end date for a given week number (week 1 = first Monday of the year)."""
-    # Find the first Monday of the year
-    jan1 = datetime(year, 1, 1)
-    days_until_monday = (7 - jan1.weekday()) % 7
-    if days_until_monday == 0 and jan1.weekday() != 0:
-        days_until_monday = 7
-    first_monday = jan1 + timedelta(days=days_until_monday)
-    if jan1.weekday() == 0:  # Jan 1 is already Monday
-        first_monday = jan1
-
-    # Calculate week start and end
-    start_date = first_monday + timedelta(weeks=week_num - 1)
-    end_date = start_date + timedelta(days=4)  # Monday to Friday
-    return start_date, end_date
+@st.cache_data(show_spinner=False)
+def team_overview(team, tasks_version):
+    """Latest-week figures for one team, from its materialized analytics aggregates."""
+    stats = analytics.load_stats(team)
+    row = {"Team": store.team_name(team), "Members": len(store.load_team(store.team_file(team)))}
+    if stats.empty:
+        return {**row, "Week": None, "Tasks": 0, "Done": 0, "Open": 0, "Carried Over": 0}
+    latest = stats[stats["week"] == stats["week"].max()]
+    done = int(latest.loc[latest["status"] == "Done", "tasks"].sum())
+    return {
+        **row,
+        "Week": int(latest["week"].iloc[0]),
+        "Tasks": int(latest["tasks"].sum()),
+        "Done": done,
+        "Open": int(latest["tasks"].sum()) - done,
+        "Carried Over": int(latest["carried_over"].sum()),
+    }
 
 
 def get_status_color_rgb(status):
@@ -38,12 +44,11 @@ def get_status_color_rgb(status):
     return colors.get(status, (0, 0, 0))
 
 
-def generate_weekly_pdf(week_num, team_members, weeks_passed, weeks_remaining, progress_pct):
+def generate_weekly_pdf(week_num, team_name, team_members, weeks_passed, weeks_remaining, progress_pct):
     """Generate PDF report for a given week."""
-    DATA_DIR = Path(__file__).parent / "data"
-    TASKS_FILE = DATA_DIR / "weekly_tasks.csv"
-    SUPPORT_FILE = DATA_DIR / "daily_support.csv"
-    ON_HOLD_FILE = DATA_DIR / "on_hold.csv"
+    TASKS_FILE = store.tasks_file()
+    SUPPORT_FILE = store.support_file()
+    ON_HOLD_FILE = store.on_hold_file()
 
     pdf = FPDF()
     pdf.add_page()
@@ -58,7 +63,7 @@ def generate_weekly_pdf(week_num, team_members, weeks_passed, weeks_remaining, p
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Team", ln=True)
     pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 8, "My team name", ln=True)
+    pdf.cell(0, 8, team_name, ln=True)
     pdf.cell(0, 8, f"Members: {', '.join(team_members)}", ln=True)
     pdf.ln(5)
 
@@ -80,13 +85,26 @@ def generate_weekly_pdf(week_num, team_members, weeks_passed, weeks_remaining, p
     pdf.rect(x_start, y_start, filled_width, bar_height, "F")
     pdf.ln(15)
 
+    # Charts (each image is drawn once per version of its data, see planner.charts)
+    status_png, burndown_png = charts.report_charts(week_num)
+    if status_png or burndown_png:
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, "Charts", ln=True)
+        chart_width = 92
+        y_start = pdf.get_y()
+        for i, png in enumerate([status_png, burndown_png]):
+            if png:
+                pdf.image(str(png), x=10 + i * (chart_width + 6), y=y_start, w=chart_width)
+        pdf.set_y(y_start + chart_width * charts.HEIGHT / charts.WIDTH + 5)
+
     # Tasks Section
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, f"Week {week_num} Tasks", ln=True)
 
     if TASKS_FILE.exists():
-        tasks_df = pd.read_csv(TASKS_FILE)
-        week_tasks = tasks_df[tasks_df["week"] == week_num].sort_values(["team_member", "label"])
+        # Only this week's rows, with its archived tasks (see planner.archive)
+        week_tasks = archive.with_archived(store.load_weeks([week_num], TASKS_FILE), [week_num])
+        week_tasks = week_tasks.sort_values(["team_member", "label"])
 
         if not week_tasks.empty:
             # Group tasks by team member
@@ -136,11 +154,10 @@ def generate_weekly_pdf(week_num, team_members, weeks_passed, weeks_remaining, p
     pdf.cell(0, 10, f"Week {week_num} Support Schedule", ln=True)
 
     if SUPPORT_FILE.exists():
-        support_df = pd.read_csv(SUPPORT_FILE)
-        support_df["date"] = pd.to_datetime(support_df["date"])
+        support_df = store.load_support(SUPPORT_FILE)
 
-        start_date, end_date = get_week_dates(2026, week_num)
-        week_support = support_df[(support_df["date"] >= start_date) & (support_df["date"] <= end_date)]
+        days = store.week_dates(2026, week_num)
+        week_support = support_df[support_df["date"].between(pd.Timestamp(days[0]), pd.Timestamp(days[-1]))]
 
         if not week_support.empty:
             pdf.set_font("Arial", "B", 10)
@@ -170,7 +187,7 @@ def generate_weekly_pdf(week_num, team_members, weeks_passed, weeks_remaining, p
     pdf.cell(0, 10, "Projects On Hold", ln=True)
 
     if ON_HOLD_FILE.exists():
-        on_hold_df = pd.read_csv(ON_HOLD_FILE)
+        on_hold_df = store.load_on_hold(ON_HOLD_FILE)
 
         if not on_hold_df.empty:
             on_hold_df = on_hold_df.sort_values(["team_member", "label"])
@@ -223,13 +240,18 @@ st.set_page_config(
     layout="wide"
 )
 
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("app")
+
+# Team switcher (every page reads and writes the selected team's data only)
+sync.select_team()
+
 # File paths
-DATA_DIR = Path(__file__).parent / "data"
 PAGES_DIR = Path(__file__).parent / "pages"
-TEAM_FILE = DATA_DIR / "team_members.csv"
 
 # Load team members
-team_members = pd.read_csv(TEAM_FILE)["name"].tolist()
+team_name = store.team_name()
+team_members = store.load_team()
 
 # Header
 st.title("📅 2026 Weekly Planner")
@@ -237,12 +259,28 @@ st.markdown("---")
 
 # Team section
 st.header("✨ Team")
-st.markdown("""
+st.markdown(f"""
 <div style="background-color: #f0f2f6; padding: 20px; border-radius: 10px; text-align: center;">
-    <h2 style="color: #1f77b4; margin: 0;">My team name</h2>
+    <h2 style="color: #1f77b4; margin: 0;">{team_name}</h2>
 </div>
 """, unsafe_allow_html=True)
 
+# Add a team with its own roster and data
+with st.expander("➕ Add team"):
+    with st.form("new_team", clear_on_submit=True):
+        new_team_name = st.text_input("Team name")
+        new_team_members = st.text_area("Members (one per line)")
+        if st.form_submit_button("Create team"):
+            members = [m.strip() for m in new_team_members.splitlines() if m.strip()]
+            if not new_team_name.strip() or not members:
+                st.error("Enter a team name and at least one member.")
+            else:
+                try:
+                    store.create_team(new_team_name, members)
+                    st.success(f"Team {new_team_name} created! Pick it in the sidebar team switcher.")
+                except ValueError as e:
+                    st.error(str(e))
+
 st.markdown("---")
 
 # Progress overview section
@@ -286,189 +324,41 @@ st.markdown("---")
 st.header("📋 Manage Week Pages")
 
 # Find existing week pages
-existing_weeks = []
-for f in PAGES_DIR.glob("Week_*.py"):
-    try:
-        week_num = int(f.stem.split("_")[1])
-        existing_weeks.append(week_num)
-    except:
-        pass
-existing_weeks.sort()
-
-# Add new week page
-available_weeks = [w for w in range(1, 53) if w not in existing_weeks]
-
-col1, col2 = st.columns([3, 1])
-with col1:
-    if available_weeks:
-        week_to_create = st.selectbox("Select week to create", options=available_weeks, format_func=lambda x: f"Week {x}")
-    else:
-        week_to_create = None
-        st.success("All 52 week pages have been created!")
-
-with col2:
-    st.write("")
-    st.write("")
-    if week_to_create and st.button("➕ Create Week Page"):
-        # Auto-populate tasks from previous week (excluding Done tasks)
-        TASKS_FILE = DATA_DIR / "weekly_tasks.csv"
-        if TASKS_FILE.exists():
-            all_tasks = pd.read_csv(TASKS_FILE)
-            if "id" not in all_tasks.columns:
-                all_tasks.insert(0, "id", range(1, len(all_tasks) + 1))
-            prev_week = week_to_create - 1
-            if prev_week > 0:
-                # Get tasks from previous week that are not Done
-                prev_tasks = all_tasks[(all_tasks["week"] == prev_week) & (all_tasks["status"] != "Done")].copy()
-                if not prev_tasks.empty:
-                    # Copy tasks to new week with new IDs
-                    max_id = all_tasks["id"].max()
-                    prev_tasks["week"] = week_to_create
-                    prev_tasks["id"] = range(max_id + 1, max_id + 1 + len(prev_tasks))
-                    all_tasks = pd.concat([all_tasks, prev_tasks], ignore_index=True)
-                    all_tasks.to_csv(TASKS_FILE, index=False)
-
-        # Create the week page file
-        week_page_content = f'''import streamlit as st
-import pandas as pd
-from pathlib import Path
-
-WEEK_NUM = {week_to_create}
-
-st.set_page_config(
-    page_title=f"Week {{WEEK_NUM}} Tasks",
-    page_icon="📅",
-    layout="wide"
-)
-
-# File paths
-DATA_DIR = Path(__file__).parent.parent / "data"
-TASKS_FILE = DATA_DIR / "weekly_tasks.csv"
-TEAM_FILE = DATA_DIR / "team_members.csv"
-
-# Load team members
-team_members = pd.read_csv(TEAM_FILE)["name"].tolist()
-
-# Status options
-STATUS_OPTIONS = ["To be started", "In progress", "Done"]
-
-# Load existing tasks
-if TASKS_FILE.exists():
-    all_tasks = pd.read_csv(TASKS_FILE)
-    if "id" not in all_tasks.columns:
-        all_tasks.insert(0, "id", range(1, len(all_tasks) + 1))
-else:
-    all_tasks = pd.DataFrame(columns=["id", "week", "team_member", "label", "description", "status"])
-
-# Store in session state
-if "all_tasks" not in st.session_state:
-    st.session_state.all_tasks = all_tasks.copy()
-
-# Header
-st.title(f"📅 Week {{WEEK_NUM}} Tasks")
-st.markdown("---")
-
-# Get tasks for this week
-week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM].copy()
-
-# Team member filter
-filter_options = ["All"] + team_members
-selected_member = st.selectbox("Filter by Team Member:", filter_options, key="member_filter")
-
-# Apply filter if not "All"
-if selected_member != "All":
-    filtered_tasks = week_tasks[week_tasks["team_member"] == selected_member].copy()
+existing_weeks = weeks.existing_weeks(PAGES_DIR)
+
+if st.session_state.get("weeks_message"):
+    st.success(st.session_state.pop("weeks_message"))
+
+# Add a range of new week pages (open tasks roll over from the nearest earlier week)
+available_weeks = [w for w in range(1, weeks.LAST_WEEK + 1) if w not in existing_weeks]
+
+col1, col2, col3 = st.columns([2, 2, 1])
+if available_weeks:
+    with col1:
+        first_week = st.selectbox("Create weeks from", options=available_weeks, format_func=lambda x: f"Week {x}")
+    with col2:
+        last_week = st.selectbox("To", options=[w for w in available_weeks if w >= first_week],
+                                 format_func=lambda x: f"Week {x}")
+    with col3:
+        st.write("")
+        st.write("")
+        if st.button("➕ Create Week Pages"):
+            report = weeks.create_weeks(first_week, last_week, PAGES_DIR)
+            lines = []
+            for row in report.itertuples():
+                if row.existing:
+                    lines.append(f"Week {row.week}: kept its {row.existing} existing task(s)")
+                elif row.tasks:
+                    lines.append(f"Week {row.week}: {row.tasks} open task(s) carried over from week {row.from_week}")
+                else:
+                    lines.append(f"Week {row.week}: no open tasks to carry over")
+            st.session_state.weeks_message = (f"Created {len(report)} week page(s). Refresh to see them in the sidebar.  \n"
+                                              + "  \n".join(lines))
+            st.rerun()
+    st.caption("Weeks that already have a page are skipped. Each new week starts with the open tasks of the nearest "
+               "earlier week, including across weeks left out.")
 else:
-    filtered_tasks = week_tasks.copy()
-
-# Display editable tasks table
-st.subheader("📋 Tasks")
-st.caption("Edit cells directly • Click ➕ to add rows • Select rows and press Delete to remove")
-
-# Prepare display dataframe
-if not filtered_tasks.empty:
-    display_df = filtered_tasks[["team_member", "label", "description", "status"]].copy()
-else:
-    display_df = pd.DataFrame(columns=["team_member", "label", "description", "status"])
-
-# Configure columns for the data editor
-column_config = {{
-    "team_member": st.column_config.SelectboxColumn(
-        "Team Member",
-        options=team_members,
-        required=True,
-        width="medium"
-    ),
-    "label": st.column_config.TextColumn(
-        "Label",
-        required=True,
-        width="medium"
-    ),
-    "description": st.column_config.TextColumn(
-        "Description",
-        required=True,
-        width="large"
-    ),
-    "status": st.column_config.SelectboxColumn(
-        "Status",
-        options=STATUS_OPTIONS,
-        required=True,
-        width="medium"
-    )
-}}
-
-# Editable table
-edited_df = st.data_editor(
-    display_df,
-    column_config=column_config,
-    num_rows="dynamic",
-    use_container_width=True,
-    hide_index=True,
-    key="task_editor"
-)
-
-st.markdown("---")
-
-# Save button
-if st.button("💾 Save Changes", type="primary"):
-    # Remove tasks from other weeks
-    other_weeks_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] != WEEK_NUM].copy()
-
-    # If filtered, keep other members' tasks for this week
-    if selected_member != "All":
-        other_members_tasks = week_tasks[week_tasks["team_member"] != selected_member].copy()
-    else:
-        other_members_tasks = pd.DataFrame(columns=["id", "week", "team_member", "label", "description", "status"])
-
-    # Add week column and generate new IDs for edited tasks
-    if not edited_df.empty:
-        new_week_tasks = edited_df.copy()
-        new_week_tasks["week"] = WEEK_NUM
-
-        # Generate new IDs
-        max_id = st.session_state.all_tasks["id"].max() if not st.session_state.all_tasks.empty else 0
-        if pd.isna(max_id):
-            max_id = 0
-        new_week_tasks["id"] = range(int(max_id) + 1, int(max_id) + 1 + len(new_week_tasks))
-
-        # Reorder columns
-        new_week_tasks = new_week_tasks[["id", "week", "team_member", "label", "description", "status"]]
-
-        # Combine: other weeks + other members this week + edited tasks
-        st.session_state.all_tasks = pd.concat([other_weeks_tasks, other_members_tasks, new_week_tasks], ignore_index=True)
-    else:
-        st.session_state.all_tasks = pd.concat([other_weeks_tasks, other_members_tasks], ignore_index=True)
-
-    # Save to file
-    st.session_state.all_tasks.to_csv(TASKS_FILE, index=False)
-    st.success("Tasks saved!")
-    st.rerun()
-'''
-
-        page_file = PAGES_DIR / f"Week_{week_to_create:02d}.py"
-        page_file.write_text(week_page_content, encoding="utf-8")
-        st.success(f"Week {week_to_create} page created! Refresh to see it in the sidebar.")
-        st.experimental_rerun()
+    st.success("All 52 week pages have been created!")
 
 st.markdown("---")
 
@@ -481,7 +371,7 @@ if existing_weeks:
         if page_file.exists():
             page_file.unlink()
             st.success(f"Week {week_to_delete} page deleted! Refresh to update sidebar.")
-            st.experimental_rerun()
+            st.rerun()
 
 st.markdown("---")
 
@@ -499,18 +389,92 @@ else:
             st.write("")
             st.write("")
             if st.button("📄 Generate PDF"):
-                pdf_bytes = generate_weekly_pdf(
-                    week_num=report_week,
-                    team_members=team_members,
-                    weeks_passed=weeks_passed,
-                    weeks_remaining=weeks_remaining,
-                    progress_pct=progress_percentage
-                )
+                with metrics.timer("planner_report_duration_seconds", kind="pdf"):
+                    pdf_bytes = generate_weekly_pdf(
+                        week_num=report_week,
+                        team_name=team_name,
+                        team_members=team_members,
+                        weeks_passed=weeks_passed,
+                        weeks_remaining=weeks_remaining,
+                        progress_pct=progress_percentage
+                    )
                 st.download_button(
                     label="⬇️ Download PDF",
                     data=pdf_bytes,
                     file_name=f"weekly_report_week_{report_week}.pdf",
                     mime="application/pdf"
                 )
+
+        # One report per week in a zip (charts whose data didn't change between weeks are drawn once)
+        if st.button("🗂️ Generate PDFs for all weeks (zip)"):
+            zip_buffer = BytesIO()
+            with (metrics.timer("planner_report_duration_seconds", kind="pdf_zip"),
+                  zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file):
+                for week in existing_weeks:
+                    zip_file.writestr(f"weekly_report_week_{week}.pdf", generate_weekly_pdf(
+                        week_num=week,
+                        team_name=team_name,
+                        team_members=team_members,
+                        weeks_passed=weeks_passed,
+                        weeks_remaining=weeks_remaining,
+                        progress_pct=progress_percentage
+                    ))
+            st.download_button(
+                label="⬇️ Download PDFs (zip)",
+                data=zip_buffer.getvalue(),
+                file_name="weekly_reports.zip",
+                mime="application/zip"
+            )
     else:
         st.info("Create a week page first to generate a report.")
+
+st.markdown("---")
+
+# Export the whole planner
+st.header("📦 Export Planner")
+st.caption("All weeks, a per-week summary, the support schedule and on-hold projects")
+
+# Optionally export only what a filter or saved view matches
+export_filter = filters.filter_bar("export", url=False)
+
+col1, col2 = st.columns(2)
+with col1:
+    if not export.XLSX_AVAILABLE:
+        st.error("Excel export requires xlsxwriter. Install it with: pip install xlsxwriter")
+    elif st.button("📊 Export to Excel"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xlsx_file = Path(tmp_dir) / "planner.xlsx"
+            with metrics.timer("planner_report_duration_seconds", kind="xlsx"):
+                export.write_workbook(xlsx_file, export_filter)
+            xlsx_bytes = xlsx_file.read_bytes()
+        st.download_button(
+            label="⬇️ Download Excel",
+            data=xlsx_bytes,
+            file_name="weekly_planner.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+with col2:
+    if st.button("🗂️ Export to CSV (zip)"):
+        zip_buffer = BytesIO()
+        with metrics.timer("planner_report_duration_seconds", kind="csv_zip"):
+            export.write_csv_zip(zip_buffer, export_filter)
+        st.download_button(
+            label="⬇️ Download CSV (zip)",
+            data=zip_buffer.getvalue(),
+            file_name="weekly_planner_csv.zip",
+            mime="application/zip"
+        )
+
+# Cross-team overview (only shown once there is more than one team)
+teams = store.list_teams()
+if len(teams) > 1:
+    st.markdown("---")
+    st.header("🌐 All Teams")
+    st.caption("Latest week of each team")
+    overview = pd.DataFrame([
+        team_overview(team, store.file_signature(store.tasks_file(team))) for team in teams
+    ])
+    overview["Week"] = overview["Week"].astype("Int64")
+    st.dataframe(overview, use_container_width=True, hide_index=True)
+
+sync.finish_rerun()
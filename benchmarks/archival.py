@@ -0,0 +1,163 @@
+"""Compare Week page load and save times before and after archiving finished tasks.
+
+Usage:
+    python benchmarks/archival.py
+    python benchmarks/archival.py --weeks 52 --members 50 --tasks 20 --keep-weeks 8 --json archival.json
+
+Generates a year of synthetic tasks in a temporary data directory
+(PLANNER_DATA_DIR), where older weeks are mostly Done, like a real planner
+late in the year. Then times what the pages do on the hot tasks file, once
+with the full history and once after planner.archive has moved the Done
+tasks of closed weeks to the compressed archive:
+
+    load    read the tasks file and pick out the current week (every Week page rerun)
+    save    edit a task of the current week and write it with the page's writer
+            (status history, file rewrite, analytics update)
+    create  create the next week, carrying over the open tasks of the current one
+    report  build the current week's rows for the PDF report (archived rows included)
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The data directory is resolved when the planner is imported
+DATA_DIR = Path(tempfile.mkdtemp(prefix="planner-archival-"))
+os.environ["PLANNER_DATA_DIR"] = str(DATA_DIR)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from planner import analytics, archive, store, sync, weeks  # noqa: E402
+
+
+def make_tasks(n_weeks, members, tasks_per_member, current_week):
+    """Write a year of tasks: weeks well before `current_week` are mostly Done, recent ones mostly open."""
+    rng = np.random.default_rng(0)
+    names = [f"Member {i:03d}" for i in range(members)]
+    rows = n_weeks * members * tasks_per_member
+    week = np.repeat(np.arange(1, n_weeks + 1), members * tasks_per_member)
+    done_share = np.where(week < current_week - 4, 0.9, 0.3)
+    status = np.where(rng.random(rows) < done_share, "Done", rng.choice(["To be started", "In progress"], rows))
+    tasks = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "week": week,
+        "team_member": np.tile(np.repeat(names, tasks_per_member), n_weeks),
+        "label": [f"Project {i % 40}" for i in range(rows)],
+        "description": [f"Task description {i % 500}" for i in range(rows)],
+        "status": status,
+    })
+    tasks.to_csv(store.tasks_file(), index=False)
+    pd.DataFrame({"name": names}).to_csv(store.team_file(), index=False)
+    return names
+
+
+def timed(function, repeat, setup=None):
+    """Return the median milliseconds of `repeat` calls of `function(setup())`."""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        function(state)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def measure(current_week, repeat, pages_dir):
+    def load(_):
+        tasks = store.load_tasks()
+        return tasks[tasks["week"] == current_week]
+
+    def edited_tasks():
+        # The page already holds the tasks in its session; only the write is timed
+        loaded = store.load_tasks()
+        tasks = loaded.copy()
+        row = tasks.index[tasks["week"] == current_week][0]
+        tasks.loc[row, "status"] = "Done" if tasks.at[row, "status"] != "Done" else "In progress"
+        return tasks, sync.partition_digests("all_tasks", loaded)
+
+    def save(state):
+        tasks, base = state
+        sync.write_partition("all_tasks", tasks, base)
+
+    def without_next_week():
+        for page in pages_dir.glob("Week_*.py"):
+            page.unlink()
+        (pages_dir / f"Week_{current_week:02d}.py").write_text("")
+        tasks = store.load_tasks()
+        store.write_csv(tasks[tasks["week"] <= current_week], store.tasks_file())
+
+    def create(_):
+        weeks.create_weeks(current_week + 1, current_week + 1, pages_dir)
+
+    def report(_):
+        return archive.with_archived(store.load_weeks([current_week]), [current_week])
+
+    results = {
+        "load": timed(load, repeat),
+        "save": timed(save, repeat, edited_tasks),
+        "report": timed(report, repeat),
+    }
+    # Creating a week changes the file; restore it afterwards so both runs start from the same data
+    original = store.tasks_file().read_bytes()
+    results["create"] = timed(create, repeat, without_next_week)
+    store.tasks_file().write_bytes(original)
+    analytics.rebuild()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per member per week")
+    parser.add_argument("--current-week", type=int, default=45)
+    parser.add_argument("--keep-weeks", type=int, default=archive.KEEP_WEEKS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write the report to this file, to track it over time")
+    args = parser.parse_args(argv)
+
+    pages_dir = DATA_DIR / "pages"
+    pages_dir.mkdir()
+    try:
+        make_tasks(args.weeks, args.members, args.tasks, args.current_week)
+        analytics.rebuild()
+
+        sizes = {"before": (len(store.load_tasks()), store.tasks_file().stat().st_size)}
+        before = measure(args.current_week, args.repeat, pages_dir)
+
+        through_week = args.current_week - args.keep_weeks
+        start = time.perf_counter()
+        moved = archive.archive_done(through_week)
+        archive_ms = (time.perf_counter() - start) * 1000
+        analytics.load_stats()
+        sizes["after"] = (len(store.load_tasks()), store.tasks_file().stat().st_size)
+        after = measure(args.current_week, args.repeat, pages_dir)
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    report = pd.DataFrame({"before ms": before, "after ms": after})
+    report["speed-up"] = report["before ms"] / report["after ms"]
+    print(f"Tasks file: {sizes['before'][0]} rows ({sizes['before'][1] / 1e6:.1f} MB) before, "
+          f"{sizes['after'][0]} rows ({sizes['after'][1] / 1e6:.1f} MB) after archiving "
+          f"{sum(moved.values())} tasks of weeks 1-{through_week} in {archive_ms:.0f} ms")
+    print(report.round(1).to_string())
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "rows_before": sizes["before"][0],
+            "rows_after": sizes["after"][0],
+            "archived": sum(moved.values()),
+            "archive_ms": archive_ms,
+            "before_ms": before,
+            "after_ms": after,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
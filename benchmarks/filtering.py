@@ -0,0 +1,104 @@
+"""Time filter expressions on a year of tasks: evaluated afresh, and served from the result cache.
+
+Usage:
+    python benchmarks/filtering.py
+    python benchmarks/filtering.py --weeks 52 --members 50 --tasks 20 --json filtering.json
+
+Generates a year of synthetic tasks in a temporary data directory
+(PLANNER_DATA_DIR) with their analytics aggregates, then times each filter of
+FILTERS with planner.filters:
+
+    fresh   compile (cached after the first call) and evaluate the predicate,
+            as on the first rerun after the data changed
+    cached  the same filter on the same data version, as on every other rerun
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# The data directory is resolved when the planner is imported
+DATA_DIR = Path(tempfile.mkdtemp(prefix="planner-filtering-"))
+os.environ["PLANNER_DATA_DIR"] = str(DATA_DIR)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from planner import analytics, filters, store  # noqa: E402
+
+FILTERS = [
+    "member:'Member 007'",
+    "status:open",
+    "week:10-20 -status:Done",
+    "text:'description 42'",
+    "age:>=2",
+    "member:'Member 001','Member 002' status:open week:>=30 age:>=1 project",
+]
+
+
+def make_tasks(n_weeks, members, tasks_per_member):
+    """Write a year of tasks where about half the open tasks carry over to the next week."""
+    rng = np.random.default_rng(0)
+    names = [f"Member {i:03d}" for i in range(members)]
+    rows = n_weeks * members * tasks_per_member
+    tasks = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "week": np.repeat(np.arange(1, n_weeks + 1), members * tasks_per_member),
+        "team_member": np.tile(np.repeat(names, tasks_per_member), n_weeks),
+        "label": [f"Project {i % 40}" for i in range(rows)],
+        "description": [f"Task description {i % 500}" for i in range(rows)],
+        "status": rng.choice(store.STATUS_OPTIONS, rows),
+    })
+    tasks.to_csv(store.tasks_file(), index=False)
+    pd.DataFrame({"name": names}).to_csv(store.team_file(), index=False)
+
+
+def timed(function, repeat):
+    """Return the median milliseconds of `repeat` calls of `function(i)`."""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per member per week")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="also write the report to this file, to track it over time")
+    args = parser.parse_args(argv)
+
+    try:
+        make_tasks(args.weeks, args.members, args.tasks)
+        analytics.rebuild()
+        tasks = store.load_tasks()
+        results = {}
+        for expression in FILTERS:
+            matches = len(filters.apply(tasks, expression))
+            # A new version per call misses the cache every time
+            fresh = timed(lambda i: filters.apply(tasks, expression, ("fresh", i)), args.repeat)
+            cached = timed(lambda i: filters.apply(tasks, expression, "cached"), args.repeat)
+            results[expression] = {"matches": matches, "fresh ms": fresh, "cached ms": cached}
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    report = pd.DataFrame(results).T
+    report["speed-up"] = report["fresh ms"] / report["cached ms"]
+    print(f"{len(tasks)} tasks, {filters.cache_size()} cached results")
+    print(report.round(2).to_string())
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"rows": len(tasks), "filters": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Drive many concurrent simulated sessions against the real pages and report capacity.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 20 --actions 30 --members 20 --tasks 10
+    python benchmarks/load_test.py --mix browse=6,edit=2,support=1,pdf=1 --no-autosave --json load.json
+
+Each simulated session runs the pages with Streamlit's AppTest against a
+synthetic data set in a temporary directory (PLANNER_DATA_DIR), so the real
+data is never touched. AppTest isn't thread-safe, so every session runs in its
+own process: sessions contend for the same files, but each process has its
+own autosave queue, like separate server processes. Sessions pick actions at
+random from the mix:
+
+    browse   open a Week page (a rerun of the page once the session has it open)
+    edit     add a task on a Week page and save it
+    support  bulk-add a week of support days through the Daily Support form (and save)
+    pdf      generate a weekly PDF report from the home page
+
+AppTest can't drive st.data_editor, so `edit` reruns the page with the
+editor's widget state set to an added row, as the browser sends it: the page
+applies and saves the edit itself (queued with autosave on, through the Save
+button with --no-autosave).
+
+Reports throughput, latency percentiles and errors per action, and lost
+writes: tasks and support days a session saved that are missing from the
+files once every queued write has been flushed. Tasks of saves refused because
+another session changed the same week are counted apart: the page shows the
+conflict, and the session reloads like a user would, so they are missing but
+not silently lost.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+# Session processes inherit the directory through the environment. It must be
+# set before the planner is imported: the data directory is resolved at import time
+if "PLANNER_LOAD_TEST_DIR" not in os.environ:
+    os.environ["PLANNER_LOAD_TEST_DIR"] = tempfile.mkdtemp(prefix="planner-load-")
+DATA_DIR = Path(os.environ["PLANNER_LOAD_TEST_DIR"])
+os.environ["PLANNER_DATA_DIR"] = str(DATA_DIR)
+sys.path.insert(0, str(ROOT))
+
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from planner import autosave, store, weeks  # noqa: E402
+from typed_loading import make_files  # noqa: E402
+
+ACTIONS = ["browse", "edit", "support", "pdf"]
+DEFAULT_MIX = "browse=6,edit=2,support=1,pdf=1"
+
+
+def week_pages():
+    return weeks.existing_weeks(ROOT / "pages")
+
+
+def make_data(weeks, members, tasks_per_member):
+    """Write a synthetic team, tasks file and support schedule to the temporary data directory."""
+    _, _, names = make_files(DATA_DIR, weeks, members, tasks_per_member)
+    pd.DataFrame({"name": names}).to_csv(store.team_file(), index=False)
+    pd.DataFrame(columns=store.ON_HOLD_COLUMNS).to_csv(store.on_hold_file(), index=False)
+    return names
+
+
+def edit_table(at, key, added_rows):
+    """Rerun the page with rows added to the st.data_editor `key`, and the other widgets as they are."""
+    (editor,) = [e for e in at.get("arrow_data_frame") if e.proto.id.endswith(f"-{key}")]
+    states = at._tree.get_widget_states()
+    state = WidgetState(id=editor.proto.id)
+    state.string_value = json.dumps({"edited_rows": {}, "added_rows": added_rows, "deleted_rows": []})
+    states.widgets.append(state)
+    return at._run(states)
+
+
+class Session:
+    """One simulated user: a set of open pages, each with its own session state."""
+
+    def __init__(self, index, args, names):
+        self.index = index
+        self.args = args
+        self.names = names
+        self.rng = random.Random(args.seed + index)
+        self.pages = {}
+        self.edits = 0
+        # Tasks added, and (time, day, member) for support days assigned
+        self.saved_tasks = []
+        self.saved_support = []
+        # Tasks whose save the page refused as a conflict
+        self.refused_tasks = []
+
+    def page(self, path):
+        """Return the session's AppTest for a page, running it the first time it is opened."""
+        if path not in self.pages:
+            at = AppTest.from_file(str(ROOT / path), default_timeout=self.args.timeout)
+            at.session_state["autosave"] = self.args.autosave
+            self.pages[path] = at.run()
+        return self.pages[path]
+
+    def browse(self):
+        at = self.page(f"pages/Week_{self.rng.choice(week_pages()):02d}.py")
+        return at.run()
+
+    def edit(self):
+        week = self.rng.choice(week_pages())
+        at = self.page(f"pages/Week_{week:02d}.py")
+        # Rerun first, like a user looking at the page: it picks up what other sessions saved
+        self.check_refused(at.run())
+        self.edits += 1
+        label = f"load s{self.index} #{self.edits}"
+        if not self.args.autosave:
+            at.button[[b.label for b in at.button].index("💾 Save Changes")].click()
+        edit_table(at, "task_editor", [{
+            "team_member": self.rng.choice(self.names), "label": label,
+            "description": "load test", "status": "To be started",
+        }])
+        self.saved_tasks.append(label)
+        return self.check_refused(at)
+
+    def check_refused(self, at):
+        """Note the tasks of a save the page refused as a conflict, and reload it to carry on."""
+        if any(e.value.startswith("⚠️ Your changes were not saved") for e in at.error):
+            # Until it reloads, the page holds the refused version of the tasks
+            refused = set(at.session_state["all_tasks"]["label"]) - set(store.load_tasks()["label"])
+            self.refused_tasks += [label for label in self.saved_tasks if label in refused]
+            at.button[[b.label for b in at.button].index("🔄 Reload from disk (discard my changes)")].click()
+            at.run()
+        return at
+
+    def support(self):
+        at = self.page("pages/2_Daily_Support.py")
+        # Sessions work on their own weeks, so only collisions can lose a day
+        week = 1 + (self.index * 3 + self.rng.randrange(3)) % 52
+        days = store.week_dates(2026, week)
+        member = self.rng.choice(self.names)
+        at.date_input[0].set_value(days[0])
+        at.date_input[1].set_value(days[-1])
+        at.selectbox[[s.label for s in at.selectbox].index("Primary Support")].set_value(member)
+        at.button[[b.label for b in at.button].index("➕ Add Days")].click()
+        at.run()
+        if not self.args.autosave:
+            at.button[[b.label for b in at.button].index("💾 Save Changes")].click()
+            at.run()
+        self.saved_support.extend((time.time(), pd.Timestamp(day), member) for day in days)
+        return at
+
+    def pdf(self):
+        at = self.page("app.py")
+        at.selectbox(key="report_week").set_value(self.rng.choice(week_pages()))
+        at.button[[b.label for b in at.button].index("📄 Generate PDF")].click()
+        return at.run()
+
+    def run(self, mix):
+        """Run the session's actions and return their timings, then what it saved."""
+        results = []
+        actions, weights = zip(*mix.items())
+        for _ in range(self.args.actions):
+            action = self.rng.choices(actions, weights)[0]
+            start = time.perf_counter()
+            try:
+                at = getattr(self, action)()
+                error = at.exception[0].message if at.exception else None
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            results.append({"action": action, "ms": (time.perf_counter() - start) * 1000, "error": error})
+        autosave.flush(force=True)
+        for path, at in self.pages.items():
+            if path.startswith("pages/Week_"):
+                self.check_refused(at.run())
+        return results, self.saved_tasks, self.saved_support, self.refused_tasks
+
+
+def run_session(index, args, names, mix):
+    return Session(index, args, names).run(mix)
+
+
+def lost_writes(saved_tasks, saved_support):
+    """Return the tasks and support days that were saved but are not on disk (the last assignment of a day wins)."""
+    lost_tasks = set(saved_tasks) - set(store.load_tasks()["label"])
+    expected = {day: member for _, day, member in sorted(saved_support)}
+    support = store.load_support().set_index("date")["primary_support"].astype(object)
+    lost_days = [day for day, member in expected.items() if support.get(day) != member]
+    return lost_tasks, expected, lost_days
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        action, _, weight = part.partition("=")
+        if action not in ACTIONS:
+            raise SystemExit(f"Unknown action '{action}' (choose from {', '.join(ACTIONS)})")
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def summarise(results, elapsed):
+    df = pd.DataFrame(results)
+    rows = {}
+    for action, group in [("all", df), *df.groupby("action")]:
+        ms = group["ms"]
+        rows[action] = {
+            "count": len(group),
+            "errors": int(group["error"].notna().sum()),
+            "per sec": len(group) / elapsed,
+            "p50 ms": ms.quantile(0.5),
+            "p90 ms": ms.quantile(0.9),
+            "p99 ms": ms.quantile(0.99),
+            "max ms": ms.max(),
+        }
+    return pd.DataFrame(rows).T
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated sessions")
+    parser.add_argument("--actions", type=int, default=20, help="actions per session")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=5, help="tasks per member per week")
+    parser.add_argument("--no-autosave", dest="autosave", action="store_false", help="save edits synchronously")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds before a page run counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file, to track it over time")
+    parser.add_argument("--keep-data", action="store_true", help="keep the temporary data directory")
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    names = make_data(args.weeks, args.members, args.tasks)
+    results, saved_tasks, saved_support, refused_tasks = [], [], [], []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.sessions) as pool:
+        sessions = pool.map(run_session, range(args.sessions), [args] * args.sessions,
+                            [names] * args.sessions, [mix] * args.sessions)
+        for session_results, tasks, support, refused in sessions:
+            results += session_results
+            saved_tasks += tasks
+            saved_support += support
+            refused_tasks += refused
+    elapsed = time.perf_counter() - start
+
+    report = summarise(results, elapsed)
+    lost_tasks, expected_days, lost_days = lost_writes(saved_tasks, saved_support)
+    lost_tasks -= set(refused_tasks)
+    errors = pd.DataFrame(results).dropna(subset=["error"])
+
+    print(f"{args.sessions} sessions x {args.actions} actions in {elapsed:.1f}s "
+          f"({'autosave' if args.autosave else 'manual save'})")
+    print(report.round(1).to_string())
+    print(f"Lost writes: {len(lost_tasks)} of {len(saved_tasks)} tasks, "
+          f"{len(lost_days)} of {len(expected_days)} support days; {len(refused_tasks)} tasks refused as conflicts")
+    for error, count in errors["error"].value_counts().head(5).items():
+        print(f"  {count} x {error}")
+    if args.keep_data:
+        print(f"Data kept in {DATA_DIR}")
+    else:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "sessions": args.sessions,
+            "actions": args.actions,
+            "mix": mix,
+            "autosave": args.autosave,
+            "seconds": elapsed,
+            "actions_report": report.round(3).to_dict(orient="index"),
+            "lost_tasks": len(lost_tasks),
+            "lost_support_days": len(lost_days),
+            "refused_tasks": len(refused_tasks),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare memory and latency of the typed task/schedule loading against plain read_csv.
+
+Usage:
+    python benchmarks/typed_loading.py
+    python benchmarks/typed_loading.py --weeks 52 --members 50 --tasks 20
+
+Generates a synthetic tasks file and support schedule in a temporary
+directory, then loads them both ways and times the filters and groupbys
+the pages run on every rerun.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from planner import store  # noqa: E402
+
+
+def make_files(directory, weeks, members, tasks_per_member):
+    """Write a synthetic tasks file and a year of support schedule."""
+    rng = np.random.default_rng(0)
+    names = [f"Member {i:03d}" for i in range(members)]
+    rows = weeks * members * tasks_per_member
+    tasks = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "week": np.repeat(np.arange(1, weeks + 1), members * tasks_per_member),
+        "team_member": np.tile(np.repeat(names, tasks_per_member), weeks),
+        "label": [f"Project {i % 40}" for i in range(rows)],
+        "description": [f"Task description {i % 500}" for i in range(rows)],
+        "status": rng.choice(store.STATUS_OPTIONS, rows),
+    })
+    days = pd.bdate_range("2026-01-05", periods=weeks * 5)
+    support = pd.DataFrame({
+        "date": days.strftime("%Y-%m-%d"),
+        "primary_support": rng.choice(names, len(days)),
+        "secondary_support": rng.choice(names, len(days)),
+    })
+    tasks_file = directory / "weekly_tasks.csv"
+    support_file = directory / "daily_support.csv"
+    tasks.to_csv(tasks_file, index=False)
+    support.to_csv(support_file, index=False)
+    return tasks_file, support_file, names
+
+
+def timed(func, repeat=20):
+    """Return the best wall time of `repeat` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(tasks, support, names, load_tasks, load_support):
+    """Time the loads and the operations the pages run on the loaded frames."""
+    member = names[len(names) // 2]
+    day = pd.Timestamp("2026-03-02")
+    return {
+        "tasks memory (MB)": tasks.memory_usage(deep=True).sum() / 2**20,
+        "support memory (KB)": support.memory_usage(deep=True).sum() / 2**10,
+        "load tasks (ms)": timed(load_tasks, repeat=5),
+        "load support (ms)": timed(load_support, repeat=5),
+        "filter week (ms)": timed(lambda: tasks[tasks["week"] == 26]),
+        "filter week + member (ms)": timed(lambda: tasks[(tasks["week"] == 26) & (tasks["team_member"] == member)]),
+        "groupby member x status (ms)": timed(lambda: tasks.groupby(["team_member", "status"], observed=True).size()),
+        "support day lookup (ms)": timed(lambda: support[pd.to_datetime(support["date"]) == day]
+                                         if support["date"].dtype == object else support[support["date"] == day]),
+        "support counts (ms)": timed(lambda: support["primary_support"].value_counts()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per member per week")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tasks_file, support_file, names = make_files(Path(tmp_dir), args.weeks, args.members, args.tasks)
+
+        plain = measure(pd.read_csv(tasks_file), pd.read_csv(support_file), names,
+                        lambda: pd.read_csv(tasks_file), lambda: pd.read_csv(support_file))
+        typed = measure(store.load_tasks(tasks_file), store.load_support(support_file), names,
+                        lambda: store.load_tasks(tasks_file), lambda: store.load_support(support_file))
+
+    report = pd.DataFrame({"plain read_csv": plain, "typed": typed})
+    report["ratio"] = report["plain read_csv"] / report["typed"]
+    print(f"{args.weeks} weeks x {args.members} members x {args.tasks} tasks = {args.weeks * args.members * args.tasks} tasks")
+    print(report.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
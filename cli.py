@@ -0,0 +1,213 @@
+"""Command-line tools for the planner data files.
+
+Usage:
+    python cli.py export planner.xlsx
+    python cli.py export planner.zip --format csv
+    python cli.py export alice.xlsx --filter "member:Alice status:open"
+    python cli.py export review.zip --view "Carried over"
+    python cli.py --team platform export platform.xlsx
+    python cli.py snapshot
+    python cli.py snapshots
+    python cli.py restore 20260302T101500000000
+    python cli.py restore --at "2026-03-02 10:00" --file weekly_tasks.csv
+    python cli.py migrate --check
+    python cli.py ical support.ics --member Alice
+    python cli.py ical --serve --port 8502
+    python cli.py digest --week 12 --out digests
+    python cli.py archive --keep-weeks 8
+    python cli.py digest --via smtp --smtp localhost:1025 --domain example.com --to Alice=alice@example.org
+"""
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+
+from planner import archive, backup, digest, export, filters, ical, schema, store
+
+
+def cmd_export(args):
+    """Export the whole planner to an Excel workbook or a zip of CSV files."""
+    output = Path(args.output)
+    fmt = args.format or ("csv" if output.suffix.lower() == ".zip" else "xlsx")
+    expression = args.filter or ""
+    if args.view:
+        views = filters.load_views()
+        if args.view not in views:
+            raise SystemExit(f"No saved view '{args.view}' (saved views: {', '.join(views) or 'none'})")
+        expression = views[args.view]
+    try:
+        filters.compile_filter(expression)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if fmt == "xlsx":
+        if not export.XLSX_AVAILABLE:
+            raise SystemExit("Excel export requires xlsxwriter. Install it with: pip install xlsxwriter")
+        export.write_workbook(output, expression)
+    else:
+        export.write_csv_zip(output, expression)
+    print(f"Exported planner to {output}")
+
+
+def cmd_snapshot(args):
+    """Snapshot the data files that changed since the last snapshot."""
+    snapshot_id = backup.take_snapshot("manual")
+    print(f"Snapshot {snapshot_id} taken" if snapshot_id else "Nothing changed since the last snapshot")
+
+
+def cmd_snapshots(args):
+    """List the snapshots, newest first."""
+    for snapshot in reversed(backup.list_snapshots()):
+        changed = ", ".join(snapshot["changed"]) or "-"
+        print(f"{snapshot['id']}  {snapshot['taken_at']}  {snapshot['reason']:<30}  {changed}")
+
+
+def cmd_restore(args):
+    """Restore the data files from a snapshot or as they were at a point in time."""
+    snapshot_id = args.snapshot
+    if args.at:
+        snapshot_id = backup.snapshot_at(datetime.fromisoformat(args.at))
+        if snapshot_id is None:
+            raise SystemExit(f"No snapshot taken before {args.at}")
+    if not snapshot_id:
+        raise SystemExit("Give a snapshot id or --at")
+    try:
+        restored = backup.restore(snapshot_id, args.file)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    # Restored files may predate the current layout
+    schema.invalidate(restored)
+    schema.ensure()
+    print(f"Restored {', '.join(restored)} from snapshot {snapshot_id}")
+
+
+def cmd_migrate(args):
+    """Migrate every team's data files to the current layout, or with --check only list what is pending."""
+    pending_teams = 0
+    for team in store.list_teams():
+        todo = schema.pending(team) if args.check else schema.migrate(team)
+        if todo:
+            pending_teams += 1
+        for name, steps in todo.items():
+            print(f"{team}/{name}: {'needs' if args.check else 'ran'} {'; '.join(steps)}")
+    if not pending_teams:
+        print("All data files are up to date")
+    elif args.check:
+        raise SystemExit(1)
+
+
+def cmd_ical(args):
+    """Write the support rota as an iCalendar file, or serve every team's feeds over HTTP."""
+    if args.serve:
+        print(f"Serving support feeds at http://{args.host}:{args.port}/<team>/support.ics[?member=<name>] "
+              "(Ctrl+C to stop)")
+        ical.serve(args.host, args.port)
+        return
+    if args.member and args.member not in store.load_team():
+        raise SystemExit(f"No member '{args.member}' in team '{store.active_team()}'")
+    output = args.output or ical.feed_name(args.member)
+    ical.write_calendar(output, member=args.member)
+    print(f"Wrote support rota to {output}")
+
+
+def cmd_archive(args):
+    """Move the Done tasks of closed weeks to the compressed archive (schedule it to keep the tasks file small)."""
+    through_week = args.through_week if args.through_week is not None else archive.default_cutoff(args.keep_weeks)
+    if through_week < 1:
+        print("No closed weeks to archive yet")
+        return
+    if args.check:
+        count = int(archive.archivable(store.load_tasks(), through_week).sum())
+        print(f"{count} finished task(s) in weeks 1-{through_week} can be archived")
+        return
+    moved = archive.archive_done(through_week)
+    if not moved:
+        print(f"Nothing to archive in weeks 1-{through_week}")
+    for week, count in moved.items():
+        print(f"Week {week}: archived {count} finished task(s)")
+
+
+def cmd_digest(args):
+    """Build every member's digest for a week in one pass and deliver them through a sender."""
+    team_members = store.load_team()
+    unknown = sorted(set(args.member or []) - set(team_members))
+    if unknown:
+        raise SystemExit(f"Not in team '{store.active_team()}': {', '.join(unknown)}")
+    week = args.week or max(1, min(date.today().isocalendar()[1], 52))
+    digests = digest.build_digests(week, members=args.member or team_members)
+    if args.via == "smtp":
+        host, _, port = args.smtp.partition(":")
+        addresses = dict(pair.split("=", 1) for pair in args.to or [])
+        sender = digest.SmtpSender(host, int(port or 25), sender=args.sender, domain=args.domain, addresses=addresses)
+    else:
+        sender = digest.FileSender(args.out)
+    delivered = sender.send(digests)
+    print(f"Week {week}: {len(delivered)} digest(s) sent via {args.via}")
+    for target in delivered:
+        print(f"  {target}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Team Weekly Planner tools")
+    parser.add_argument("--team", default=store.DEFAULT_TEAM, help="team whose data to use (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="export all weeks, support schedule and on-hold projects")
+    export_parser.add_argument("output", help="output file (.xlsx or .zip)")
+    export_parser.add_argument("--format", choices=["xlsx", "csv"], help="defaults to the output file extension")
+    export_filter = export_parser.add_mutually_exclusive_group()
+    export_filter.add_argument("--filter", help="only export the tasks and projects matching this filter expression")
+    export_filter.add_argument("--view", help="only export what this saved view matches")
+    export_parser.set_defaults(func=cmd_export)
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="snapshot the data files now")
+    snapshot_parser.set_defaults(func=cmd_snapshot)
+
+    snapshots_parser = subparsers.add_parser("snapshots", help="list the snapshots")
+    snapshots_parser.set_defaults(func=cmd_snapshots)
+
+    restore_parser = subparsers.add_parser("restore", help="restore the data files from a snapshot")
+    restore_parser.add_argument("snapshot", nargs="?", help="snapshot id (see `snapshots`)")
+    restore_parser.add_argument("--at", help="restore the latest snapshot taken at or before this time (ISO format)")
+    restore_parser.add_argument("--file", action="append", choices=backup.BACKED_UP, help="restore only this file (repeatable)")
+    restore_parser.set_defaults(func=cmd_restore)
+
+    migrate_parser = subparsers.add_parser("migrate", help="migrate the data files of every team to the current layout")
+    migrate_parser.add_argument("--check", action="store_true", help="only list the files that need migrating (exit 1 if any)")
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    ical_parser = subparsers.add_parser("ical", help="export the support rota as an iCalendar (.ics) feed")
+    ical_parser.add_argument("output", nargs="?", help="output file (default: support.ics or support_<member>.ics)")
+    ical_parser.add_argument("--member", help="only this member's support days")
+    ical_parser.add_argument("--serve", action="store_true", help="serve the feeds of every team over HTTP instead")
+    ical_parser.add_argument("--host", default="127.0.0.1")
+    ical_parser.add_argument("--port", type=int, default=8502)
+    ical_parser.set_defaults(func=cmd_ical)
+
+    archive_parser = subparsers.add_parser("archive", help="move finished tasks of closed weeks to the compressed archive")
+    archive_parser.add_argument("--keep-weeks", type=int, default=archive.KEEP_WEEKS,
+                                help="weeks before the current one to keep in full (default: %(default)s)")
+    archive_parser.add_argument("--through-week", type=int, help="archive weeks up to this one instead")
+    archive_parser.add_argument("--check", action="store_true", help="only count the tasks that would be archived")
+    archive_parser.set_defaults(func=cmd_archive)
+
+    digest_parser = subparsers.add_parser("digest", help="send each member a digest of their week")
+    digest_parser.add_argument("--week", type=int, help="week number (default: the current week)")
+    digest_parser.add_argument("--member", action="append", help="only this member (repeatable)")
+    digest_parser.add_argument("--via", choices=sorted(digest.SENDERS), default="file", help="sender (default: %(default)s)")
+    digest_parser.add_argument("--out", default="digests", help="file sender: output directory (default: %(default)s)")
+    digest_parser.add_argument("--smtp", default="localhost:1025", help="smtp sender: host:port (default: %(default)s)")
+    digest_parser.add_argument("--sender", default="planner@localhost", help="smtp sender: From address")
+    digest_parser.add_argument("--domain", default="localhost", help="smtp sender: mail members at <name>@<domain>")
+    digest_parser.add_argument("--to", action="append", metavar="MEMBER=ADDRESS", help="smtp sender: a member's address (repeatable)")
+    digest_parser.set_defaults(func=cmd_digest)
+
+    args = parser.parse_args(argv)
+    if args.team not in store.list_teams():
+        raise SystemExit(f"Unknown team '{args.team}'. Teams: {', '.join(store.list_teams())}")
+    store.use_team(args.team)
+    if args.command != "migrate":
+        schema.ensure()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
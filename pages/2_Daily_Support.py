@@ -2,7 +2,9 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 from datetime import date, timedelta
-import re
+from urllib.parse import urlencode
+
+from planner import availability, ical, metrics, scheduler, store, sync, undo, validation, weeks
 
 st.set_page_config(
     page_title="Daily Support",
@@ -10,44 +12,27 @@ st.set_page_config(
     layout="wide"
 )
 
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("2_Daily_Support")
+
+# Team switcher
+team = sync.select_team()
+
 st.title("📅 Daily Support")
 st.markdown("---")
 
-# File paths
-DATA_DIR = Path(__file__).parent.parent / "data"
-DAILY_FILE = DATA_DIR / "daily_support.csv"
-TEAM_FILE = DATA_DIR / "team_members.csv"
-
 # Load team members for dropdown options
-team_members = pd.read_csv(TEAM_FILE)["name"].tolist()
+team_members = store.load_team()
 team_options = [""] + team_members
 
-# Load existing daily support data
-if DAILY_FILE.exists():
-    df = pd.read_csv(DAILY_FILE)
-else:
-    df = pd.DataFrame(columns=["date", "primary_support", "secondary_support"])
-
-# Store in session state
-if "daily_df" not in st.session_state:
-    st.session_state.daily_df = df.copy()
-
-
-def get_week_dates(year, week_num):
-    """Get Monday to Friday dates for a given week number."""
-    # Find the first Monday of the year
-    jan1 = date(year, 1, 1)
-    # Days until first Monday (0 = Monday)
-    days_to_monday = (7 - jan1.weekday()) % 7
-    first_monday = jan1 + timedelta(days=days_to_monday)
-    if jan1.weekday() == 0:
-        first_monday = jan1
+# Load the daily support schedule (re-read only when the file changes on disk)
+changes = sync.sync_partition("daily_df")
+sync.show_changes("daily_df", changes)
+sync.watch("daily_df")
+sync.autosave_toggle("daily_df")
 
-    # Get the Monday of the requested week
-    week_monday = first_monday + timedelta(weeks=week_num - 1)
-
-    # Return Monday to Friday
-    return [week_monday + timedelta(days=i) for i in range(5)]
+# Undo/redo bulk adds and auto-scheduling (saved changes are saved again when undone)
+undo.controls("daily_df", "daily_df", lambda before: sync.save_partition("daily_df"))
 
 
 # --- CALENDAR VIEW (BY WEEK) ---
@@ -55,14 +40,21 @@ st.subheader("📆 Week View")
 
 # Find the last week page available to use as default
 PAGES_DIR = Path(__file__).parent
-week_numbers = [int(m.group(1)) for f in PAGES_DIR.glob("Week_*.py") if (m := re.match(r"Week_(\d+)", f.stem))]
+week_numbers = weeks.existing_weeks(PAGES_DIR)
 default_week = max(week_numbers) if week_numbers else 1
 
 # Week selector
 selected_week = st.selectbox("Select Week", options=list(range(1, 53)), index=default_week - 1, format_func=lambda x: f"Week {x}")
 
 # Get weekdays for selected week
-week_dates = get_week_dates(2026, selected_week)
+week_dates = store.week_dates(2026, selected_week)
+# Week 1 can start in the last days of the previous year
+first_day = store.week_dates(2026, 1)[0]
+
+# Check the whole schedule for conflicts, including assignments during leave
+leave_index = availability.leave_index()
+issues = validation.validate_schedule(st.session_state.daily_df, team_members, leave=availability.load_leave())
+day_issues = validation.issues_by_date(issues)
 
 # Display week header with dates
 st.markdown("**Mon | Tue | Wed | Thu | Fri**")
@@ -75,7 +67,7 @@ for i, day_date in enumerate(week_dates):
         day_label = day_date.strftime("%d %b")
 
         # Check if this day has support assigned
-        day_data = st.session_state.daily_df[st.session_state.daily_df["date"] == date_str]
+        day_data = st.session_state.daily_df[st.session_state.daily_df["date"] == pd.Timestamp(day_date)]
 
         if not day_data.empty:
             primary = day_data.iloc[0]["primary_support"]
@@ -86,6 +78,24 @@ for i, day_date in enumerate(week_dates):
         else:
             st.markdown(f"**{day_label}**  \n_empty_")
 
+        # Show who is out
+        away = availability.members_on_leave(day_date, team_members, leave_index)
+        if away:
+            st.caption(f"🌴 {', '.join(away)}")
+
+        # Highlight conflicts on this day
+        for problem in day_issues.get(date_str, []):
+            st.markdown(f":red[⚠️ {problem}]")
+
+# --- SCHEDULE CHECK ---
+if issues.empty:
+    st.success("✅ No schedule conflicts found")
+else:
+    error_count = int((issues["severity"] == "error").sum())
+    warning_count = len(issues) - error_count
+    with st.expander(f"🩺 Schedule check: {error_count} conflict(s), {warning_count} warning(s)", expanded=error_count > 0):
+        st.dataframe(issues, use_container_width=True, hide_index=True)
+
 st.markdown("---")
 
 # --- BULK ADD FORM ---
@@ -94,9 +104,9 @@ st.subheader("➕ Add Support (Date Range)")
 with st.form("add_range_form"):
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Start Date", min_value=date(2026, 1, 1), max_value=date(2026, 12, 31), value=week_dates[0])
+        start_date = st.date_input("Start Date", min_value=first_day, max_value=date(2026, 12, 31), value=week_dates[0])
     with col2:
-        end_date = st.date_input("End Date", min_value=date(2026, 1, 1), max_value=date(2026, 12, 31), value=week_dates[-1])
+        end_date = st.date_input("End Date", min_value=first_day, max_value=date(2026, 12, 31), value=week_dates[-1])
 
     col3, col4 = st.columns(2)
     with col3:
@@ -106,6 +116,7 @@ with st.form("add_range_form"):
 
     if st.form_submit_button("➕ Add Days"):
         if start_date <= end_date:
+            before = st.session_state.daily_df
             current_date = start_date
             while current_date <= end_date:
                 # Skip weekends
@@ -113,29 +124,105 @@ with st.form("add_range_form"):
                     current_date += timedelta(days=1)
                     continue
 
-                date_str = current_date.strftime("%Y-%m-%d")
+                day = pd.Timestamp(current_date)
                 # Remove existing entry for this date if exists
-                st.session_state.daily_df = st.session_state.daily_df[st.session_state.daily_df["date"] != date_str]
+                st.session_state.daily_df = st.session_state.daily_df[st.session_state.daily_df["date"] != day]
                 # Add new entry
                 new_row = pd.DataFrame({
-                    "date": [date_str],
+                    "date": [day],
                     "primary_support": [new_primary],
                     "secondary_support": [new_secondary]
                 })
                 st.session_state.daily_df = pd.concat([st.session_state.daily_df, new_row], ignore_index=True)
                 current_date += timedelta(days=1)
 
-            st.session_state.daily_df = st.session_state.daily_df.sort_values("date").reset_index(drop=True)
+            st.session_state.daily_df = store.typed_support(st.session_state.daily_df.sort_values("date").reset_index(drop=True))
+            undo.record("daily_df", "daily_df", before, st.session_state.daily_df, f"add support {start_date} to {end_date}")
+            sync.edited("daily_df")
+
+            # Warn if someone was scheduled while on leave
+            on_leave = [m for m in {new_primary, new_secondary} if m and availability.on_leave_mask(m, scheduler.weekdays(start_date, end_date), leave_index).any()]
+            st.session_state.leave_warning = f"{', '.join(on_leave)} on leave during part of this range" if on_leave else None
             st.rerun()
         else:
             st.error("End date must be after start date")
 
+if st.session_state.get("leave_warning"):
+    st.warning(f"🌴 {st.session_state.leave_warning}. Check the highlighted days.")
+
+st.markdown("---")
+
+# --- AUTO-SCHEDULE FORM ---
+st.subheader("🤖 Auto-Schedule (Fair Rota)")
+st.caption("Fills weekdays in the range with primary and secondary support, balancing days across the team")
+
+with st.form("auto_schedule_form"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        auto_start = st.date_input("Start Date", min_value=first_day, max_value=date(2026, 12, 31), value=week_dates[0], key="auto_start")
+    with col2:
+        auto_end = st.date_input("End Date", min_value=first_day, max_value=date(2026, 12, 31), value=date(2026, 12, 31), key="auto_end")
+    with col3:
+        max_consecutive = st.number_input("Max consecutive days on duty", min_value=1, max_value=10, value=2)
+
+    col4, col5 = st.columns(2)
+    with col4:
+        keep_existing = st.checkbox("Keep days already assigned", value=True)
+    with col5:
+        balance_with_rest = st.checkbox("Balance against the rest of the schedule", value=True)
+
+    st.markdown("**Also unavailable** (leave from the Leave page is already taken into account)")
+    unavailability = st.data_editor(
+        pd.DataFrame({"team_member": pd.Series(dtype="str"), "start": pd.Series(dtype="datetime64[ns]"), "end": pd.Series(dtype="datetime64[ns]")}),
+        column_config={
+            "team_member": st.column_config.SelectboxColumn("Team Member", options=team_members, required=True),
+            "start": st.column_config.DateColumn("From", required=True),
+            "end": st.column_config.DateColumn("To", required=True)
+        },
+        num_rows="dynamic",
+        use_container_width=True,
+        key="unavailability_editor"
+    )
+
+    if st.form_submit_button("🤖 Auto-Schedule"):
+        if auto_start <= auto_end:
+            unavailable = availability.unavailable_dates(team_members, auto_start, auto_end, leave_index)
+            for member, days in scheduler.expand_unavailability(unavailability[["team_member", "start", "end"]].itertuples(index=False)).items():
+                unavailable.setdefault(member, set()).update(days)
+            before = st.session_state.daily_df
+            st.session_state.daily_df, unfilled = scheduler.fill_range(
+                st.session_state.daily_df,
+                auto_start,
+                auto_end,
+                team_members,
+                unavailable=unavailable,
+                max_consecutive=int(max_consecutive),
+                keep_existing=keep_existing,
+                balance_with_rest=balance_with_rest
+            )
+            st.session_state.daily_df = store.typed_support(st.session_state.daily_df)
+            undo.record("daily_df", "daily_df", before, st.session_state.daily_df, f"auto-schedule {auto_start} to {auto_end}")
+            sync.edited("daily_df")
+            st.session_state.auto_schedule_unfilled = [d.strftime("%Y-%m-%d") for d in unfilled]
+            st.rerun()
+        else:
+            st.error("End date must be after start date")
+
+if st.session_state.get("auto_schedule_unfilled"):
+    st.warning("Couldn't fill every role on: " + ", ".join(st.session_state.auto_schedule_unfilled)
+               + ". Relax the consecutive-day limit or the unavailability.")
+
 st.markdown("---")
 
 # --- SAVE BUTTON ---
-if st.button("💾 Save Changes"):
-    st.session_state.daily_df.to_csv(DAILY_FILE, index=False)
+if sync.autosave_enabled():
+    st.caption("💾 Changes are saved automatically")
+elif st.button("💾 Save Changes"):
+    sync.save_partition("daily_df")
     st.success("Daily support schedule saved!")
+    error_count = int((issues["severity"] == "error").sum())
+    if error_count:
+        st.warning(f"⚠️ The saved schedule has {error_count} conflict(s). See the schedule check above.")
 
 # --- LEGEND ---
 st.markdown("---")
@@ -154,7 +241,7 @@ for member in team_members:
     # Find days since last primary support
     member_primary = st.session_state.daily_df[st.session_state.daily_df["primary_support"] == member]
     if not member_primary.empty:
-        last_date = pd.to_datetime(member_primary["date"]).max()
+        last_date = member_primary["date"].max()
         days_since = (pd.Timestamp.now() - last_date).days
     else:
         days_since = "-"
@@ -168,3 +255,34 @@ for member in team_members:
 
 stats_df = pd.DataFrame(stats_data)
 st.table(stats_df)
+
+# --- CALENDAR FEED ---
+st.markdown("---")
+st.subheader("📆 Add to Your Calendar")
+
+
+@st.cache_data(max_entries=32)
+def support_calendar(team, member, tag):
+    """The saved support rota as an .ics file, for a given version (ETag) of the schedule."""
+    with metrics.timer("planner_report_duration_seconds", kind="ical"):
+        return b"".join(ical.iter_calendar(team, member or None))
+
+
+col1, col2 = st.columns([2, 1])
+with col1:
+    calendar_member = st.selectbox("Support days of", options=team_options,
+                                   format_func=lambda m: m or "The whole team", key="calendar_member")
+with col2:
+    st.write("")
+    st.write("")
+    st.download_button(
+        label="⬇️ Download .ics",
+        data=support_calendar(team, calendar_member, ical.etag(team, calendar_member or None)),
+        file_name=ical.feed_name(calendar_member or None),
+        mime="text/calendar"
+    )
+st.caption("The calendar file has the saved schedule. To keep a calendar up to date, subscribe to the feed served by "
+           f"`python cli.py ical --serve`: http://127.0.0.1:8502/{team}/support.ics"
+           + (f"?{urlencode({'member': calendar_member})}" if calendar_member else ""))
+
+sync.finish_rerun()
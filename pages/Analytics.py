@@ -0,0 +1,138 @@
+import streamlit as st
+import pandas as pd
+from datetime import date, datetime, time
+
+from planner import analytics, charts, history, store, sync
+
+st.set_page_config(
+    page_title="Analytics",
+    page_icon="📈",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Analytics")
+
+# Team switcher
+sync.select_team()
+
+# Load team members
+team_members = store.load_team()
+
+
+@st.cache_data
+def load_stats(team, tasks_version):
+    """Load a team's weekly aggregates for a given version of its tasks file."""
+    return analytics.load_stats(team)
+
+
+@st.cache_data
+def load_status_state(team, as_of, events_version):
+    """Load a team's task status history state as of a point in time."""
+    return history.state_as_of(as_of)
+
+
+# Header
+st.title("📈 Analytics")
+st.markdown("Throughput, carry-over and backlog trend across all weeks")
+st.markdown("---")
+
+stats = load_stats(store.active_team(), store.file_signature(store.tasks_file()))
+
+if stats.empty:
+    st.info("No tasks yet. Analytics will appear once weeks have tasks.")
+    st.stop()
+
+# Team member filter
+selected_members = st.multiselect("Team Members", options=team_members, default=[], placeholder="All")
+if selected_members:
+    stats = stats[stats["team_member"].isin(selected_members)]
+
+# Summary
+latest_week = int(stats["week"].max())
+latest = stats[stats["week"] == latest_week]
+latest_open = latest[latest["status"] != "Done"]
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Tasks Done (all weeks)", int(stats.loc[stats["status"] == "Done", "tasks"].sum()))
+with col2:
+    st.metric(f"Open Tasks (Week {latest_week})", int(latest_open["tasks"].sum()))
+with col3:
+    carried = int(latest_open["carried_over"].sum())
+    st.metric(f"Carried Over Into Week {latest_week}", carried)
+
+st.markdown("---")
+
+# Throughput
+st.subheader("✅ Throughput (tasks done per week)")
+st.bar_chart(analytics.throughput(stats))
+
+# Backlog trend
+st.subheader("📉 Backlog Trend")
+st.caption("Open tasks (To be started + In progress) against tasks done, per week")
+st.line_chart(analytics.backlog_trend(stats))
+
+# Carry-over age
+st.subheader("⏳ Carry-over Age")
+st.caption("Average number of weeks open tasks have been carried over, per team member")
+st.line_chart(analytics.carry_over_age(stats))
+
+st.markdown("---")
+
+# Latest week breakdown
+st.subheader(f"📋 Week {latest_week} Breakdown")
+breakdown = latest.pivot_table(index="team_member", columns="status", values="tasks", aggfunc="sum", fill_value=0)
+breakdown["Oldest carry-over (weeks)"] = latest_open.groupby("team_member")["age_max"].max()
+st.dataframe(breakdown.fillna(0).astype(int), use_container_width=True)
+
+# The same chart images as the weekly PDF report (drawn once per version of the data)
+if charts.CHARTS_AVAILABLE:
+    status_png, burndown_png = charts.report_charts(latest_week, stats)
+    col1, col2 = st.columns(2)
+    with col1:
+        if status_png:
+            st.image(str(status_png), use_container_width=True)
+    with col2:
+        if burndown_png:
+            st.image(str(burndown_png), use_container_width=True)
+    st.caption("As they appear in the weekly PDF report")
+
+st.markdown("---")
+
+# Status history
+st.subheader("⏱️ Status History")
+st.caption("Built from the status change log recorded when Week and On Hold pages are saved")
+
+as_of_date = st.date_input("State as of", value=date.today())
+as_of = datetime.combine(as_of_date, time(23, 59, 59))
+state = load_status_state(store.active_team(), as_of, store.file_signature(history.events_file()))
+if selected_members:
+    state = state[state["team_member"].isin(selected_members)]
+
+if state.empty:
+    st.info("No status changes recorded up to this date.")
+else:
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Tasks by status**")
+        by_status = state.pivot_table(index="team_member", columns="status", values="task_key", aggfunc="count", fill_value=0)
+        st.dataframe(by_status, use_container_width=True)
+    with col2:
+        st.markdown("**Average days in each status**")
+        in_status = history.time_in_status(state, as_of=min(as_of, datetime.now()))
+        days = in_status.groupby("team_member")[list(history.STATUS_HOURS.values())].mean() / 24
+        days.columns = list(history.STATUS_HOURS.keys())
+        st.dataframe(days.round(1), use_container_width=True)
+
+    cycles = history.cycle_times(state)
+    if not cycles.empty:
+        st.markdown("**Cycle time (days from In progress to Done)**")
+        summary = cycles.groupby("team_member").agg(
+            done=("task_key", "count"),
+            median_cycle_days=("cycle_days", "median"),
+            median_lead_days=("lead_days", "median"),
+        )
+        st.dataframe(summary.round(1), use_container_width=True)
+
+sync.finish_rerun()
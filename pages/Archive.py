@@ -0,0 +1,99 @@
+import streamlit as st
+import pandas as pd
+
+from planner import archive, autosave, store, sync
+
+st.set_page_config(
+    page_title="Archive",
+    page_icon="🗃️",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Archive")
+
+# Team switcher
+team = sync.select_team()
+
+# Load team members
+team_members = store.load_team()
+
+# Header
+st.title("🗃️ Task Archive")
+st.markdown("Finished tasks of closed weeks are moved to a compressed archive, so the Week pages only load recent work")
+st.markdown("---")
+
+if st.session_state.get("archive_message"):
+    st.success(st.session_state.pop("archive_message"))
+
+archived_weeks = archive.week_counts()
+archive_path = archive.archive_file()
+tasks_path = store.tasks_file()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Archived Tasks", sum(archived_weeks.values()))
+with col2:
+    st.metric("Archive Size", f"{archive_path.stat().st_size / 1024:.0f} KB" if archive_path.exists() else "-")
+with col3:
+    st.metric("Tasks File Size", f"{tasks_path.stat().st_size / 1024:.0f} KB" if tasks_path.exists() else "-")
+
+# --- ARCHIVE NOW ---
+st.subheader("📦 Archive Finished Tasks")
+keep_weeks = st.number_input("Keep this many weeks before the current one in full", min_value=0, max_value=52,
+                             value=archive.KEEP_WEEKS, step=1)
+through_week = archive.default_cutoff(keep_weeks)
+if through_week < 1:
+    st.info("No closed weeks to archive yet.")
+else:
+    candidates = int(archive.archivable(store.load_tasks(tasks_path), through_week).sum())
+    st.caption(f"{candidates} Done task(s) in weeks 1-{through_week} can be archived. Open tasks are never archived.")
+    if st.button("📦 Archive Now", disabled=not candidates):
+        # Write queued edits first so they are archived too, then reload this session's copy of the tasks
+        autosave.flush(force=True)
+        moved = archive.archive_done(through_week)
+        if "all_tasks" in st.session_state:
+            sync.reload_partition("all_tasks")
+        st.session_state.archive_message = f"Archived {sum(moved.values())} task(s) from {len(moved)} week(s)."
+        st.rerun()
+st.caption("To archive on a schedule, run `python cli.py archive` from cron or Task Scheduler")
+
+st.markdown("---")
+
+# --- SEARCH ---
+st.subheader("🔍 Search the Archive")
+if not archived_weeks:
+    st.info("Nothing archived yet.")
+    st.stop()
+
+col1, col2, col3 = st.columns([2, 2, 2])
+with col1:
+    text = st.text_input("Label or description contains")
+with col2:
+    members = st.multiselect("Team members", options=team_members, placeholder="All")
+with col3:
+    first_week, last_week = min(archived_weeks), max(archived_weeks)
+    weeks = st.slider("Weeks", min_value=first_week, max_value=max(last_week, first_week + 1),
+                      value=(first_week, last_week)) if first_week < last_week else (first_week, last_week)
+
+results = archive.search(text, members, range(weeks[0], weeks[1] + 1))
+st.caption(f"{len(results)} archived task(s)")
+st.dataframe(
+    results[["week", "team_member", "label", "description", "status"]].astype(object),
+    column_config={"week": "Week", "team_member": "Team Member", "label": "Label", "description": "Description",
+                   "status": "Status"},
+    use_container_width=True,
+    hide_index=True
+)
+st.download_button(
+    label="⬇️ Download Results (CSV)",
+    data=results[store.TASK_COLUMNS].to_csv(index=False).encode("utf-8"),
+    file_name="archived_tasks.csv",
+    mime="text/csv"
+)
+
+# Archived tasks per week
+st.subheader("📊 Archived Tasks per Week")
+st.bar_chart(pd.Series(archived_weeks, name="Archived tasks").sort_index())
+
+sync.finish_rerun()
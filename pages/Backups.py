@@ -0,0 +1,91 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime, time
+
+from planner import autosave, backup, schema, store, sync
+
+st.set_page_config(
+    page_title="Backups",
+    page_icon="🗄️",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Backups")
+
+# Team switcher
+sync.select_team()
+
+# Header
+st.title("🗄️ Backups & Restore")
+st.markdown("A snapshot of the data files is taken automatically on every save")
+st.markdown("---")
+
+# Rows the data file migrations couldn't keep
+for name, rows in schema.rejected().items():
+    st.warning(f"⚠️ {rows} row(s) of {name} couldn't be migrated. They were set aside, with the reason, "
+               f"in {store.rejects_file(name).name} in the data folder.")
+
+if st.button("📸 Take Snapshot Now"):
+    snapshot_id = backup.take_snapshot("manual")
+    st.success("Snapshot taken!" if snapshot_id else "Nothing changed since the last snapshot.")
+
+snapshots = backup.list_snapshots()
+if not snapshots:
+    st.info("No snapshots yet. One is taken the next time something is saved.")
+    st.stop()
+
+# --- SNAPSHOT LIST ---
+st.subheader("📋 Snapshots")
+st.dataframe(
+    pd.DataFrame([{
+        "Taken": backup.snapshot_time(s["id"]).strftime("%Y-%m-%d %H:%M:%S"),
+        "Reason": s["reason"],
+        "Changed": ", ".join(s["changed"]) or "-",
+        "Files": len(s["files"]),
+    } for s in reversed(snapshots)]),
+    use_container_width=True,
+    hide_index=True
+)
+st.caption(f"Kept: everything from the last {backup.KEEP_ALL_HOURS}h, then one per day for {backup.KEEP_DAILY_DAYS} days "
+           f"and one per week for {backup.KEEP_WEEKLY_WEEKS} weeks")
+
+st.markdown("---")
+
+# --- RESTORE ---
+st.subheader("⏪ Restore")
+
+mode = st.radio("Restore", ["A snapshot", "A point in time"], horizontal=True, label_visibility="collapsed")
+if mode == "A snapshot":
+    by_id = {s["id"]: s for s in snapshots}
+    snapshot_id = st.selectbox(
+        "Snapshot",
+        options=list(reversed(list(by_id))),
+        format_func=lambda i: f"{backup.snapshot_time(i):%Y-%m-%d %H:%M:%S} ({by_id[i]['reason']})"
+    )
+else:
+    col1, col2 = st.columns(2)
+    with col1:
+        restore_date = st.date_input("Date", value=datetime.now().date())
+    with col2:
+        restore_time = st.time_input("Time", value=time(23, 59))
+    snapshot_id = backup.snapshot_at(datetime.combine(restore_date, restore_time))
+    if snapshot_id is None:
+        st.warning("No snapshot was taken before that time.")
+        st.stop()
+    st.caption(f"Latest snapshot before that time: {backup.snapshot_time(snapshot_id):%Y-%m-%d %H:%M:%S}")
+
+manifest = next(s for s in snapshots if s["id"] == snapshot_id)
+files = st.multiselect("Files to restore", options=list(manifest["files"]), default=list(manifest["files"]))
+
+confirm = st.checkbox("I understand the current files will be replaced (they are snapshotted first)")
+if st.button("⏪ Restore", type="primary", disabled=not (files and confirm)):
+    # Write queued edits first: they are snapshotted before the restore instead of overwriting it
+    autosave.flush(force=True)
+    restored = backup.restore(snapshot_id, files)
+    # Restored files may predate the current layout
+    schema.invalidate(restored)
+    schema.ensure()
+    st.success(f"Restored {', '.join(restored)}. Open pages reload the restored data automatically.")
+
+sync.finish_rerun()
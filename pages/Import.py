@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+
+from planner import autosave, importer, store, sync
+
+st.set_page_config(
+    page_title="Import Tasks",
+    page_icon="📥",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Import")
+
+# Team switcher
+sync.select_team()
+
+# Header
+st.title("📥 Import Tasks")
+st.markdown("Bulk import tasks exported from other trackers (CSV or JSON Lines)")
+st.markdown("---")
+
+uploaded = st.file_uploader("Export file", type=["csv", "jsonl", "json", "ndjson"])
+
+if uploaded is None:
+    st.info("Upload a file to map its columns onto tasks.")
+    st.stop()
+
+fmt = importer.detect_format(uploaded.name)
+columns = importer.preview_columns(uploaded, fmt)
+uploaded.seek(0)
+guessed = importer.guess_mapping(columns)
+
+# Column mapping
+st.subheader("🔗 Column Mapping")
+st.caption("Status and week can be left unmapped to use the same value for every row")
+
+mapping = {}
+cols = st.columns(len(importer.IMPORT_FIELDS))
+for col, field in zip(cols, importer.IMPORT_FIELDS):
+    with col:
+        options = [None] + columns
+        default = options.index(guessed[field]) if guessed[field] in options else 0
+        mapping[field] = st.selectbox(
+            field.replace("_", " ").title(),
+            options=options,
+            index=default,
+            format_func=lambda c: "(not mapped)" if c is None else c,
+            key=f"map_{field}"
+        )
+
+col1, col2 = st.columns(2)
+with col1:
+    default_status = st.selectbox("Default status", options=store.STATUS_OPTIONS, disabled=mapping["status"] is not None)
+with col2:
+    default_week = st.number_input("Default week", min_value=1, max_value=52, value=1, disabled=mapping["week"] is not None)
+
+missing = [f for f in importer.REQUIRED_FIELDS if mapping[f] is None]
+if missing:
+    st.warning(f"Map a column for: {', '.join(missing)}")
+
+st.markdown("---")
+
+if st.button("📥 Import", type="primary", disabled=bool(missing)):
+    progress = st.progress(0.0, text="Importing...")
+    total_size = max(uploaded.size, 1)
+
+    def show_progress(report):
+        done = min(uploaded.tell() / total_size, 1.0)
+        progress.progress(done, text=f"{report['rows_read']} rows read, {report['imported']} imported")
+
+    # Write queued edits first so they don't overwrite the imported tasks
+    autosave.flush(force=True)
+    uploaded.seek(0)
+    report = importer.import_tasks(
+        uploaded,
+        fmt=fmt,
+        mapping=mapping,
+        defaults={"status": default_status, "week": default_week},
+        on_progress=show_progress
+    )
+    progress.progress(1.0, text="Import finished")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Rows Read", report["rows_read"])
+    with col2:
+        st.metric("Imported", report["imported"])
+    with col3:
+        st.metric("Duplicates Skipped", report["duplicates"])
+    with col4:
+        st.metric("Rejected", report["rejected"])
+
+    if report["weeks"]:
+        st.success(f"Tasks added to week {', '.join(str(w) for w in report['weeks'])}")
+
+    if report["bad_rows"]:
+        st.subheader("⚠️ Rejected Rows")
+        if report["rejected"] > len(report["bad_rows"]):
+            st.caption(f"Showing the first {len(report['bad_rows'])} of {report['rejected']} rejected rows")
+        bad_rows = pd.DataFrame(report["bad_rows"])[["line", "error"] + importer.IMPORT_FIELDS]
+        st.dataframe(bad_rows, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="⬇️ Download rejected rows",
+            data=bad_rows.to_csv(index=False),
+            file_name=f"rejected_{Path(uploaded.name).stem}.csv",
+            mime="text/csv"
+        )
+
+sync.finish_rerun()
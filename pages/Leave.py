@@ -0,0 +1,74 @@
+import streamlit as st
+import pandas as pd
+from datetime import date
+
+from planner import availability, store, sync
+
+st.set_page_config(
+    page_title="Leave",
+    page_icon="🌴",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Leave")
+
+# Team switcher
+sync.select_team()
+
+# Load team members
+team_members = store.load_team()
+
+# Header
+st.title("🌴 Leave & Availability")
+st.markdown("Who is out, used for support scheduling and weekly capacity")
+st.markdown("---")
+
+# --- LEAVE TABLE ---
+st.subheader("📋 Leave Periods")
+st.caption("Edit cells directly • Click ➕ to add rows • Select rows and press Delete to remove")
+
+leave = availability.load_leave()
+edited_leave = st.data_editor(
+    leave,
+    column_config={
+        "team_member": st.column_config.SelectboxColumn("Team Member", options=team_members, required=True, width="medium"),
+        "start": st.column_config.DateColumn("From", required=True),
+        "end": st.column_config.DateColumn("To", required=True),
+        "reason": st.column_config.TextColumn("Reason", width="large")
+    },
+    num_rows="dynamic",
+    use_container_width=True,
+    hide_index=True,
+    key="leave_editor"
+)
+
+if st.button("💾 Save Changes", type="primary"):
+    invalid = edited_leave[pd.to_datetime(edited_leave["end"]) < pd.to_datetime(edited_leave["start"])]
+    if not invalid.empty:
+        st.error("End date must be after start date")
+    else:
+        availability.save_leave(edited_leave)
+        st.success("Leave saved!")
+        st.rerun()
+
+st.markdown("---")
+
+# --- CAPACITY OVERVIEW ---
+st.subheader("👥 Weekly Capacity")
+
+current_week = max(1, min(date.today().isocalendar()[1], 52)) if date.today().year == 2026 else 1
+first_week, last_week = st.slider("Weeks", min_value=1, max_value=52, value=(current_week, min(current_week + 7, 52)))
+
+index = availability.leave_index()
+rows = []
+for week in range(first_week, last_week + 1):
+    available, total, days_off = availability.week_capacity(2026, week, team_members, index)
+    rows.append({
+        "Week": week,
+        "Capacity (person-days)": f"{available}/{total}",
+        "On Leave": ", ".join(f"{m} ({d}d)" for m, d in days_off.items()) or "-"
+    })
+st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+sync.finish_rerun()
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+
+from planner import filters, store, sync, undo
 
 st.set_page_config(
     page_title="On Hold",
@@ -8,16 +9,14 @@ st.set_page_config(
     layout="wide"
 )
 
-# File paths
-DATA_DIR = Path(__file__).parent.parent / "data"
-ON_HOLD_FILE = DATA_DIR / "on_hold.csv"
-TEAM_FILE = DATA_DIR / "team_members.csv"
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("On_Hold")
 
-# Load team members
-team_members = pd.read_csv(TEAM_FILE)["name"].tolist()
+# Team switcher
+sync.select_team()
 
-# Status options
-STATUS_OPTIONS = ["To be started", "In progress", "Done"]
+# Load team members
+team_members = store.load_team()
 
 # Status colors
 def get_status_color(status):
@@ -32,34 +31,38 @@ def render_status(status):
     color = get_status_color(status)
     return f'<span style="color: {color}; font-weight: bold;">{status}</span>'
 
-# Load existing tasks
-if ON_HOLD_FILE.exists():
-    on_hold_tasks = pd.read_csv(ON_HOLD_FILE)
-    if "id" not in on_hold_tasks.columns:
-        on_hold_tasks.insert(0, "id", range(1, len(on_hold_tasks) + 1))
-else:
-    on_hold_tasks = pd.DataFrame(columns=["id", "team_member", "label", "description", "status"])
+# Load projects into session state (re-read only when the file changes on disk)
+changes = sync.sync_partition("on_hold_tasks")
+
+
+def save_on_hold(before=None):
+    """Save the projects (the save logs their status changes)."""
+    sync.save_partition("on_hold_tasks")
 
-# Store in session state
-if "on_hold_tasks" not in st.session_state:
-    st.session_state.on_hold_tasks = on_hold_tasks.copy()
 
 # Header
 st.title("⏸️ On Hold")
 st.markdown("Projects that cannot start immediately")
 st.markdown("---")
 
+# Show updates saved by other sessions and keep watching for new ones
+sync.show_changes("on_hold_tasks", changes)
+sync.watch("on_hold_tasks")
+sync.autosave_toggle("on_hold_tasks")
+
+# Undo/redo adds, status updates and deletes (saved changes are saved again when undone)
+undo.controls("on_hold_tasks", "on_hold_tasks", save_on_hold)
+
 # Get tasks sorted by team member
 display_tasks = st.session_state.on_hold_tasks.sort_values("team_member") if not st.session_state.on_hold_tasks.empty else st.session_state.on_hold_tasks
 
 # Display tasks table with colored status
 st.subheader("📋 Projects")
 
-# Filter by team member
-filter_options = ["All"] + team_members
-selected_filter = st.selectbox("Filter by Team Member", options=filter_options, key="task_filter")
-if selected_filter != "All":
-    display_tasks = display_tasks[display_tasks["team_member"] == selected_filter]
+# Filter bar (week and age terms don't apply to projects)
+expression = filters.filter_bar("on_hold")
+version = sync.data_version("on_hold_tasks")
+display_tasks = filters.apply(display_tasks, expression, version)
 
 if not display_tasks.empty:
     # Build HTML table
@@ -94,7 +97,7 @@ with st.form("add_task_form"):
         task_member = st.selectbox("Team Member", options=team_members)
         task_label = st.text_input("Label")
     with col2:
-        task_status = st.selectbox("Status", options=STATUS_OPTIONS)
+        task_status = st.selectbox("Status", options=store.STATUS_OPTIONS)
         task_desc = st.text_input("Description")
 
     if st.form_submit_button("➕ Add Project"):
@@ -107,8 +110,11 @@ with st.form("add_task_form"):
             "description": [task_desc],
             "status": [task_status]
         })
-        st.session_state.on_hold_tasks = pd.concat([st.session_state.on_hold_tasks, new_task], ignore_index=True)
-        st.experimental_rerun()
+        before = st.session_state.on_hold_tasks
+        st.session_state.on_hold_tasks = store.typed_on_hold(pd.concat([before, new_task], ignore_index=True))
+        undo.record("on_hold_tasks", "on_hold_tasks", before, st.session_state.on_hold_tasks, f"add {task_label}")
+        sync.edited("on_hold_tasks")
+        st.rerun()
 
 st.markdown("---")
 
@@ -124,11 +130,15 @@ if not st.session_state.on_hold_tasks.empty:
         with col2:
             task_to_update = st.selectbox("Select project", options=list(task_options.keys()), key="update_task")
         with col3:
-            new_status = st.selectbox("New status", options=STATUS_OPTIONS, key="new_status")
+            new_status = st.selectbox("New status", options=store.STATUS_OPTIONS, key="new_status")
         if st.button("✏️ Update Status"):
             task_id = task_options[task_to_update]
+            before = st.session_state.on_hold_tasks
+            st.session_state.on_hold_tasks = before.copy()
             st.session_state.on_hold_tasks.loc[st.session_state.on_hold_tasks["id"] == task_id, "status"] = new_status
-            st.experimental_rerun()
+            undo.record("on_hold_tasks", "on_hold_tasks", before, st.session_state.on_hold_tasks, f"status of {task_to_update}")
+            sync.edited("on_hold_tasks")
+            st.rerun()
     else:
         st.info(f"No projects for {update_member}.")
 
@@ -147,14 +157,21 @@ if not st.session_state.on_hold_tasks.empty:
             task_display = st.selectbox("Select project to delete", options=list(delete_options.keys()))
         if st.button("🗑️ Delete Project"):
             task_id = delete_options[task_display]
-            st.session_state.on_hold_tasks = st.session_state.on_hold_tasks[st.session_state.on_hold_tasks["id"] != task_id]
-            st.experimental_rerun()
+            before = st.session_state.on_hold_tasks
+            st.session_state.on_hold_tasks = before[before["id"] != task_id]
+            undo.record("on_hold_tasks", "on_hold_tasks", before, st.session_state.on_hold_tasks, f"delete {task_display}")
+            sync.edited("on_hold_tasks")
+            st.rerun()
     else:
         st.info(f"No projects for {delete_member}.")
 
 st.markdown("---")
 
 # Save button
-if st.button("💾 Save Changes"):
-    st.session_state.on_hold_tasks.to_csv(ON_HOLD_FILE, index=False)
+if sync.autosave_enabled():
+    st.caption("💾 Changes are saved automatically")
+elif st.button("💾 Save Changes"):
+    save_on_hold()
     st.success("On Hold projects saved!")
+
+sync.finish_rerun()
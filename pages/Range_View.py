@@ -0,0 +1,98 @@
+import streamlit as st
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlencode
+
+from planner import archive, filters, store, sync
+
+st.set_page_config(
+    page_title="Range View",
+    page_icon="📚",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Range_View")
+
+# Team switcher
+team = sync.select_team()
+
+PAGES_DIR = Path(__file__).parent
+LAST_WEEK = 52
+
+
+@st.cache_data(max_entries=64)
+def load_week(team, week, version):
+    """Load one week's tasks, archived ones included, for a given version of the tasks and archive files."""
+    return archive.with_archived(store.load_weeks([week], store.tasks_file(team)), [week], team)
+
+
+# Header
+st.title("📚 Range View")
+st.markdown("Tasks across a range of weeks • a week is only loaded when you open it")
+st.markdown("---")
+
+today = date.today()
+current_week = max(1, min(today.isocalendar()[1], LAST_WEEK)) if today.year == 2026 else 1
+
+# Weeks to list, and the filter applied to each opened week
+first_week, last_week = st.slider(
+    "Weeks",
+    min_value=1,
+    max_value=LAST_WEEK,
+    value=(current_week, min(current_week + 12, LAST_WEEK)),
+    key="range_weeks"
+)
+expression = filters.filter_bar("range")
+
+weeks = range(first_week, last_week + 1)
+# Row counts per week come from the file's week index, without loading any tasks
+version = (store.file_signature(store.tasks_file()), store.file_signature(archive.archive_file()))
+sizes = store.week_sizes(store.tasks_file())
+for week, count in archive.week_counts().items():
+    sizes[week] = sizes.get(week, 0) + count
+
+col1, col2, _ = st.columns([1, 1, 4])
+with col1:
+    if st.button("➕ Open all"):
+        for week in weeks:
+            st.session_state[f"range_open_{week}"] = True
+with col2:
+    if st.button("➖ Close all"):
+        for week in weeks:
+            st.session_state[f"range_open_{week}"] = False
+
+st.markdown("---")
+
+opened = 0
+for week in weeks:
+    is_open = st.toggle(f"**Week {week}** • {sizes.get(week, 0)} task(s)", key=f"range_open_{week}")
+    if not is_open:
+        continue
+    opened += 1
+    tasks = filters.apply(load_week(team, week, version), expression, (week, version))
+
+    with st.container(border=True):
+        week_page = PAGES_DIR / f"Week_{week:02d}.py"
+        if week_page.exists():
+            link = {"team": team, "filter": expression} if expression.strip() else {"team": team}
+            st.markdown(f'<a href="Week_{week:02d}?{urlencode(link)}" target="_self">✏️ Edit week {week}</a>',
+                        unsafe_allow_html=True)
+        if tasks.empty:
+            st.info("No tasks match the filters this week.")
+            continue
+        for member, member_tasks in tasks.groupby("team_member", observed=True):
+            counts = member_tasks["status"].value_counts()
+            summary = " · ".join(f"{status}: {counts[status]}" for status in store.STATUS_OPTIONS if counts.get(status))
+            st.markdown(f"**{member}** — {summary}")
+            st.dataframe(
+                member_tasks[["label", "description", "status"]].astype(object),
+                column_config={"label": "Label", "description": "Description", "status": "Status"},
+                use_container_width=True,
+                hide_index=True
+            )
+
+if opened:
+    st.caption(f"{opened} of {len(weeks)} week(s) loaded")
+
+sync.finish_rerun()
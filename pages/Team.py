@@ -0,0 +1,115 @@
+import streamlit as st
+from datetime import date
+
+from planner import autosave, roster, sync
+
+st.set_page_config(
+    page_title="Team Roster",
+    page_icon="👥",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Team")
+
+# Team switcher
+sync.select_team()
+
+# Header
+st.title("👥 Team Roster")
+st.markdown("Renames, merges and removals are applied to every week, the support schedule, on-hold projects and leave")
+st.markdown("---")
+
+members = roster.load_roster()
+names = dict(zip(members["id"], members["name"]))
+
+# Current week, as on the home page
+today = date.today()
+current_week = max(1, min(today.isocalendar()[1], 52)) if today.year == 2026 else 1
+
+
+def apply_change(change, message):
+    """Write queued edits, apply a roster change, then reload this session's copies of the data.
+
+    `change` returns the rows it changed per data file, or None.
+    """
+    autosave.flush(force=True)
+    try:
+        changed = change() or {}
+    except ValueError as e:
+        st.error(str(e))
+        return
+    for key in sync.PARTITIONS:
+        if key in st.session_state:
+            sync.reload_partition(key)
+    updated = ", ".join(f"{rows} row(s) in {name}" for name, rows in changed.items() if rows)
+    st.session_state.roster_message = message + (f" Updated {updated}." if updated else "")
+    st.rerun()
+
+
+if st.session_state.get("roster_message"):
+    st.success(st.session_state.pop("roster_message"))
+
+# --- ROSTER ---
+st.subheader("📋 Members")
+load = roster.member_load(list(members["name"]), from_week=current_week, from_date=today)
+st.dataframe(
+    members.rename(columns={"id": "ID", "name": "Name"}).set_index("Name").join(load),
+    use_container_width=True
+)
+st.caption(f"Open tasks from week {current_week} on, open on-hold projects and support days from today on")
+
+st.markdown("---")
+
+col1, col2 = st.columns(2)
+
+# --- ADD ---
+with col1:
+    st.subheader("➕ Add Member")
+    with st.form("add_member_form", clear_on_submit=True):
+        new_member = st.text_input("Name")
+        if st.form_submit_button("➕ Add"):
+            apply_change(lambda: roster.add_member(new_member) and None, f"{new_member.strip()} added.")
+
+# --- RENAME / MERGE ---
+with col2:
+    st.subheader("✏️ Rename or Merge")
+    with st.form("rename_member_form"):
+        rename_id = st.selectbox("Member", options=list(names), format_func=names.get, key="rename_member")
+        new_name = st.text_input("New name", help="Use the name of another member to merge the two")
+        merge = st.checkbox("Merge into the existing member with that name")
+        if st.form_submit_button("✏️ Apply"):
+            target = next((i for i, n in names.items() if n == new_name.strip() and i != rename_id), None)
+            if target is not None and merge:
+                apply_change(lambda: roster.merge_members(rename_id, target), f"{names[rename_id]} merged into {new_name.strip()}.")
+            elif target is not None:
+                st.error(f"{new_name.strip()} is already in the team. Tick the merge box to merge the two members.")
+            else:
+                apply_change(lambda: roster.rename_member(rename_id, new_name), f"{names[rename_id]} renamed to {new_name.strip()}.")
+
+st.markdown("---")
+
+# --- REMOVE ---
+st.subheader("🗑️ Remove Member")
+col1, col2 = st.columns(2)
+with col1:
+    remove_id = st.selectbox("Member", options=list(names), format_func=names.get, key="remove_member")
+with col2:
+    others = [i for i in names if i != remove_id]
+    reassign_to = st.selectbox(
+        "Hand their open work to",
+        options=[None] + others,
+        format_func=lambda i: "Nobody (keep their name on it)" if i is None else names[i]
+    )
+if reassign_to is not None and remove_id in names:
+    counts = load.loc[names[remove_id]]
+    st.caption(f"{counts['Open tasks']} open task(s) from week {current_week}, {counts['On hold']} on-hold project(s) "
+               f"and {counts['Upcoming support days']} upcoming support day(s) go to {names[reassign_to]}")
+confirm = st.checkbox(f"Remove {names.get(remove_id, '')} from the team")
+if st.button("🗑️ Remove", disabled=not confirm or remove_id is None):
+    apply_change(
+        lambda: roster.remove_member(remove_id, reassign_to, from_week=current_week, from_date=today),
+        f"{names[remove_id]} removed."
+    )
+
+sync.finish_rerun()
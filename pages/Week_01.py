@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+
+from planner import archive, availability, filters, store, sync, undo, validation
 
 WEEK_NUM = 1
 
@@ -10,58 +11,74 @@ st.set_page_config(
     layout="wide"
 )
 
-# File paths
-DATA_DIR = Path(__file__).parent.parent / "data"
-TASKS_FILE = DATA_DIR / "weekly_tasks.csv"
-TEAM_FILE = DATA_DIR / "team_members.csv"
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun(f"Week_{WEEK_NUM:02d}")
+
+# Team switcher
+sync.select_team()
 
 # Load team members
-team_members = pd.read_csv(TEAM_FILE)["name"].tolist()
+team_members = store.load_team()
 
-# Status options
-STATUS_OPTIONS = ["To be started", "In progress", "Done"]
+# Load tasks into session state (re-read only when the file changes on disk, and not under edits in the table)
+editor_state = st.session_state.get("task_editor", {})
+has_edits = any(editor_state.get(change) for change in ("edited_rows", "added_rows", "deleted_rows"))
+changes = sync.sync_partition("all_tasks", editing=has_edits)
 
-# Load existing tasks
-if TASKS_FILE.exists():
-    all_tasks = pd.read_csv(TASKS_FILE)
-    if "id" not in all_tasks.columns:
-        all_tasks.insert(0, "id", range(1, len(all_tasks) + 1))
-else:
-    all_tasks = pd.DataFrame(columns=["id", "week", "team_member", "label", "description", "status"])
 
-# Store in session state
-if "all_tasks" not in st.session_state:
-    st.session_state.all_tasks = all_tasks.copy()
+def save_tasks(before):
+    """Save the tasks (the save logs the changed weeks' status changes and refreshes their aggregates)."""
+    sync.save_partition("all_tasks")
+
 
 # Header
 st.title(f"📅 Week {WEEK_NUM} Tasks")
+
+# Team capacity for the week, net of leave
+available_days, total_days, days_off = availability.week_capacity(2026, WEEK_NUM, team_members)
+on_leave = ", ".join(f"{member} ({days}d)" for member, days in days_off.items())
+st.caption(f"👥 Capacity: {available_days}/{total_days} person-days" + (f" • 🌴 On leave: {on_leave}" if on_leave else ""))
 st.markdown("---")
 
-# Get tasks for this week
-week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM].copy()
+# Show updates saved by other sessions and keep watching for new ones
+sync.show_changes("all_tasks", changes)
+sync.watch("all_tasks")
+sync.autosave_toggle("all_tasks")
 
-# Team member filter
-filter_options = ["All"] + team_members
-selected_member = st.selectbox("Filter by Team Member:", filter_options, key="member_filter")
+# Undo/redo saved edits of this week
+undo.controls(f"week_{WEEK_NUM}", "all_tasks", save_tasks, widgets=["task_editor"])
 
-# Apply filter if not "All"
-if selected_member != "All":
-    filtered_tasks = week_tasks[week_tasks["team_member"] == selected_member].copy()
-else:
-    filtered_tasks = week_tasks.copy()
+# Get tasks for this week
+week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM].copy()
+archived_count = archive.week_counts().get(WEEK_NUM)
+if archived_count:
+    st.caption(f"🗄️ {archived_count} finished task(s) of this week are archived (see the Archive page)")
+
+# Flag tasks owned by people no longer in the team
+task_issues = validation.validate_tasks(week_tasks, team_members)
+if not task_issues.empty:
+    problems = sorted(set(task_issues["issue"] + " (" + task_issues["member"] + ")"))
+    st.warning(f"⚠️ {len(task_issues)} task problem(s) this week: " + "; ".join(problems))
+
+# Filter bar (links from the Year Overview open on one member)
+linked_member = st.query_params.get("member")
+expression = filters.filter_bar("week", default=f'member:"{linked_member}"' if linked_member in team_members else "")
+version = sync.data_version("all_tasks")
+filtered_tasks = filters.apply(week_tasks, expression, (WEEK_NUM, version) if version else None).copy()
 
 # Display editable tasks table
 st.subheader("📋 Tasks")
 st.caption("Edit cells directly • Click ➕ to add rows • Select rows and press Delete to remove")
 
-# Prepare display dataframe
+# Prepare display dataframe (the id is hidden: it keeps an edited task the same task)
 if not filtered_tasks.empty:
-    display_df = filtered_tasks[["team_member", "label", "description", "status"]].copy()
+    display_df = filtered_tasks[["id", "team_member", "label", "description", "status"]].astype(object)
 else:
-    display_df = pd.DataFrame(columns=["team_member", "label", "description", "status"])
+    display_df = pd.DataFrame(columns=["id", "team_member", "label", "description", "status"])
 
 # Configure columns for the data editor
 column_config = {
+    "id": None,
     "team_member": st.column_config.SelectboxColumn(
         "Team Member",
         options=team_members,
@@ -80,7 +97,7 @@ column_config = {
     ),
     "status": st.column_config.SelectboxColumn(
         "Status",
-        options=STATUS_OPTIONS,
+        options=store.STATUS_OPTIONS,
         required=True,
         width="medium"
     )
@@ -98,37 +115,56 @@ edited_df = st.data_editor(
 
 st.markdown("---")
 
-# Save button
-if st.button("💾 Save Changes", type="primary"):
+
+def apply_edits():
+    """Merge the edited rows back into all_tasks, with new ids for the rows added this week."""
     # Remove tasks from other weeks
     other_weeks_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] != WEEK_NUM].copy()
 
-    # If filtered, keep other members' tasks for this week
-    if selected_member != "All":
-        other_members_tasks = week_tasks[week_tasks["team_member"] != selected_member].copy()
-    else:
-        other_members_tasks = pd.DataFrame(columns=["id", "week", "team_member", "label", "description", "status"])
+    # If filtered, keep this week's tasks the filter hides
+    hidden_tasks = week_tasks.drop(filtered_tasks.index)
 
-    # Add week column and generate new IDs for edited tasks
+    # Add week column; edited tasks keep their IDs
     if not edited_df.empty:
         new_week_tasks = edited_df.copy()
         new_week_tasks["week"] = WEEK_NUM
 
-        # Generate new IDs
-        max_id = st.session_state.all_tasks["id"].max() if not st.session_state.all_tasks.empty else 0
-        if pd.isna(max_id):
-            max_id = 0
-        new_week_tasks["id"] = range(int(max_id) + 1, int(max_id) + 1 + len(new_week_tasks))
+        # Generate IDs for the added rows, above the archived ones too
+        added = new_week_tasks["id"].isna()
+        first_id = archive.next_id(st.session_state.all_tasks)
+        new_week_tasks.loc[added, "id"] = list(range(first_id, first_id + int(added.sum())))
 
         # Reorder columns
-        new_week_tasks = new_week_tasks[["id", "week", "team_member", "label", "description", "status"]]
+        new_week_tasks = new_week_tasks[store.TASK_COLUMNS]
 
-        # Combine: other weeks + other members this week + edited tasks
-        st.session_state.all_tasks = pd.concat([other_weeks_tasks, other_members_tasks, new_week_tasks], ignore_index=True)
+        # Combine: other weeks + hidden tasks of this week + edited tasks
+        st.session_state.all_tasks = pd.concat([other_weeks_tasks, hidden_tasks, new_week_tasks], ignore_index=True)
+    else:
+        st.session_state.all_tasks = pd.concat([other_weeks_tasks, hidden_tasks], ignore_index=True)
+    st.session_state.all_tasks = store.typed_tasks(st.session_state.all_tasks)
+
+    # Keep the change for undo
+    saved_week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM]
+    undo.record(f"week_{WEEK_NUM}", "all_tasks", week_tasks, saved_week_tasks, f"edit of week {WEEK_NUM} tasks")
+
+
+if sync.autosave_enabled():
+    # Queue each completed edit; rows still being filled in wait until every cell is set
+    if has_edits and edited_df.drop(columns="id").replace("", None).isna().any(axis=None):
+        st.caption("✏️ Fill in every cell of the new or edited rows to save them")
+    elif has_edits:
+        apply_edits()
+        sync.edited("all_tasks")
+        del st.session_state["task_editor"]
+        st.rerun()
     else:
-        st.session_state.all_tasks = pd.concat([other_weeks_tasks, other_members_tasks], ignore_index=True)
+        st.caption("💾 Changes are saved automatically")
 
-    # Save to file
-    st.session_state.all_tasks.to_csv(TASKS_FILE, index=False)
+# Save button
+elif st.button("💾 Save Changes", type="primary"):
+    apply_edits()
+    save_tasks(week_tasks)
     st.success("Tasks saved!")
     st.rerun()
+
+sync.finish_rerun()
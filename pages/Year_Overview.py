@@ -0,0 +1,90 @@
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+from urllib.parse import urlencode
+import html
+
+from planner import analytics, overview, store, sync, weeks
+
+st.set_page_config(
+    page_title="Year Overview",
+    page_icon="🗓️",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun("Year_Overview")
+
+# Team switcher
+team = sync.select_team()
+
+# Load team members
+team_members = store.load_team()
+
+YEAR = 2026
+PAGES_DIR = Path(__file__).parent
+
+# Status colors (To be started, In progress, Done)
+STATUS_COLORS = ["#cc0000", "#b8860b", "#228b22"]
+
+
+@st.cache_data
+def year_grid_html(team, versions, members, week_pages):
+    """Build the weeks x members grid as an HTML table for a given version of the data files."""
+    stats = analytics.load_stats(team)
+    support = store.load_support(store.support_file(team))
+    grid = overview.year_matrix(stats, support, YEAR)
+    on_hold = overview.on_hold_counts(store.load_on_hold(store.on_hold_file(team)))
+
+    # Roster first, then anyone who still owns tasks or support days
+    data_members = sorted(set(grid.columns.get_level_values(0))) if not grid.empty else []
+    members = list(members) + [m for m in data_members if m not in members]
+    last_week = max(52, int(grid.index.max()) if not grid.empty else 0)
+
+    cell = 'style="padding: 4px 6px; border: 1px solid #ddd; text-align: center; white-space: nowrap;"'
+    rows = ['<table style="border-collapse: collapse; font-size: 0.85em;">', '<tr style="background-color: #f0f2f6;">']
+    rows.append(f'<th {cell}>Week</th>')
+    for member in members:
+        paused = f"<br>⏸️ {on_hold[member]}" if on_hold.get(member) else ""
+        rows.append(f'<th {cell}>{html.escape(member)}{paused}</th>')
+    rows.append(f'<th {cell}>Total</th></tr>')
+
+    for week in range(1, last_week + 1):
+        counts = grid.loc[week] if week in grid.index else None
+        rows.append(f'<tr><td {cell}><b>{week}</b></td>')
+        week_total = [0] * len(overview.MEASURES)
+        for member in members:
+            values = [int(counts.get((member, m), 0)) if counts is not None else 0 for m in overview.MEASURES]
+            week_total = [a + b for a, b in zip(week_total, values)]
+            text = _cell_text(values)
+            if text and week in week_pages:
+                link = f"Week_{week:02d}?" + urlencode({"team": team, "member": member})
+                text = f'<a href="{link}" target="_self" style="text-decoration: none;">{text}</a>'
+            rows.append(f"<td {cell}>{text}</td>")
+        rows.append(f"<td {cell}>{_cell_text(week_total)}</td></tr>")
+    rows.append("</table>")
+    return "".join(rows)
+
+
+def _cell_text(values):
+    """Colored task counts by status, then support days."""
+    *statuses, support_days = values
+    parts = [f'<span style="color: {c};">{n}</span>' for c, n in zip(STATUS_COLORS, statuses)]
+    text = "·".join(parts) if any(statuses) else ""
+    if support_days:
+        text += f" 🛟{support_days}"
+    return text
+
+
+# Header
+st.title("🗓️ Year Overview")
+st.markdown("Tasks and support days for every week and team member • click a cell to open that week")
+st.markdown("---")
+
+week_pages = tuple(weeks.existing_weeks(PAGES_DIR))
+versions = tuple(store.file_signature(path) for path in (store.tasks_file(), store.support_file(), store.on_hold_file()))
+st.markdown(year_grid_html(team, versions, tuple(team_members), week_pages), unsafe_allow_html=True)
+
+st.caption("Cells: :red[to be started] · :orange[in progress] · :green[done] • 🛟 support days • ⏸️ open on-hold projects")
+
+sync.finish_rerun()
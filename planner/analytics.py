@@ -0,0 +1,204 @@
+"""Materialized weekly aggregates behind the Analytics page.
+
+Two small tables are kept next to the tasks file:
+
+- weekly_stats.csv: one row per week x team member x status with the task count
+  and carry-over figures, which is all the charts need.
+- task_ages.csv: the carry-over age of every open task, by week. A week's ages
+  only depend on the previous week's, so saving a week recomputes that week
+  (and any later ones) without rescanning the rest of the history.
+
+A task is "carried over" when a task with the same member, label and
+description was still open in the previous week; its age is the number of
+consecutive weeks it has been carried.
+
+Archived tasks (see planner.archive) are added back for the weeks being
+computed, so the aggregates cover them too.
+"""
+import numpy as np
+import pandas as pd
+
+from planner import archive, metrics, store
+
+STATS_COLUMNS = ["week", "team_member", "status", "tasks", "carried_over", "age_total", "age_max"]
+AGES_COLUMNS = ["week", "task_key", "age"]
+
+# (week + 1, task key) index over each team's ages file, with the file signature it was built from
+_ages_index = {}
+
+
+def stats_file(team=None):
+    return store.data_path("weekly_stats.csv", team)
+
+
+def ages_file(team=None):
+    return store.data_path("task_ages.csv", team)
+
+
+def meta_file(team=None):
+    return store.data_path("weekly_stats.json", team)
+
+
+def _week_aggregates(week, week_tasks, prev_ages):
+    """Compute the stats rows and open-task ages for one week.
+
+    `prev_ages` maps task keys to their age in the previous week (open tasks only).
+    """
+    keys = store.task_keys(week_tasks).values
+    ages = pd.Series(keys).map(prev_ages).fillna(-1).astype("int64").values + 1
+
+    frame = pd.DataFrame({
+        "team_member": week_tasks["team_member"].values,
+        "status": week_tasks["status"].values,
+        "age": ages,
+        "carried": ages > 0,
+    })
+    stats = frame.groupby(["team_member", "status"], as_index=False, observed=True).agg(
+        tasks=("age", "size"),
+        carried_over=("carried", "sum"),
+        age_total=("age", "sum"),
+        age_max=("age", "max"),
+    ).astype({"team_member": object, "status": object})
+    stats.insert(0, "week", week)
+
+    is_open = (frame["status"] != "Done").values
+    week_ages = pd.DataFrame({"week": week, "task_key": keys[is_open], "age": ages[is_open]})
+    week_ages = week_ages.groupby(["week", "task_key"], as_index=False)["age"].max()
+    return stats, week_ages
+
+
+def _ages_lookup(ages_df, week):
+    """Return {task_key: age} for the open tasks of a week."""
+    week_ages = ages_df[ages_df["week"] == week]
+    return pd.Series(week_ages["age"].values, index=week_ages["task_key"].values)
+
+
+def _compute(all_tasks, weeks, ages_df):
+    """Compute aggregates for `weeks` (ascending), chaining ages from `ages_df` and each other."""
+    grouped = all_tasks.groupby("week").indices
+    stats_parts, ages_parts = [], []
+    prev_week, prev_ages = None, None
+    for week in weeks:
+        if prev_week == week - 1:
+            lookup = prev_ages
+        else:
+            lookup = _ages_lookup(ages_df, week - 1)
+        week_tasks = all_tasks.iloc[grouped[week]] if week in grouped else all_tasks.iloc[0:0]
+        stats, week_ages = _week_aggregates(week, week_tasks, lookup)
+        stats_parts.append(stats)
+        ages_parts.append(week_ages)
+        prev_week = week
+        prev_ages = pd.Series(week_ages["age"].values, index=week_ages["task_key"].values)
+    stats = pd.concat(stats_parts, ignore_index=True) if stats_parts else pd.DataFrame(columns=STATS_COLUMNS)
+    ages = pd.concat(ages_parts, ignore_index=True) if ages_parts else pd.DataFrame(columns=AGES_COLUMNS)
+    return stats[STATS_COLUMNS], ages[AGES_COLUMNS]
+
+
+def _write(stats, ages, team=None):
+    store.write_csv(stats.sort_values(["week", "team_member", "status"]), stats_file(team))
+    store.write_csv(ages.sort_values(["week", "task_key"]), ages_file(team))
+    store.write_json({"tasks_signature": store.file_signature(store.tasks_file(team))}, meta_file(team))
+
+
+def _load_ages():
+    if ages_file().exists():
+        return pd.read_csv(ages_file(), dtype={"task_key": "uint64"})
+    return pd.DataFrame(columns=AGES_COLUMNS)
+
+
+def task_ages(tasks, team=None):
+    """Return the carry-over age of each task in `tasks` as an int array (0 if it wasn't carried over).
+
+    A task's age is one more than its age among the previous week's open
+    tasks, so Done tasks and unsaved edits get the right age too.
+    """
+    team = team or store.active_team()
+    signature = store.file_signature(ages_file(team))
+    cached = _ages_index.get(team)
+    metrics.cache("task_ages", cached is not None and cached[0] == signature)
+    if cached is None or cached[0] != signature:
+        ages = pd.read_csv(ages_file(team), dtype={"task_key": "uint64"}) if signature else pd.DataFrame(columns=AGES_COLUMNS)
+        index = pd.MultiIndex.from_arrays([ages["week"].to_numpy(dtype="int64") + 1, ages["task_key"].to_numpy(dtype="uint64")])
+        cached = (signature, index, ages["age"].to_numpy(dtype="int64"))
+        _ages_index[team] = cached
+    _, index, ages = cached
+    if tasks.empty or not len(ages):
+        return np.zeros(len(tasks), dtype="int64")
+    keys = pd.MultiIndex.from_arrays([tasks["week"].to_numpy(dtype="int64"), store.task_keys(tasks).to_numpy()])
+    positions = index.get_indexer(keys)
+    return np.where(positions >= 0, ages[positions] + 1, 0)
+
+
+def is_current(signature=None, team=None):
+    """Return True if the aggregates were built from the tasks file as it is now (or at `signature`)."""
+    if signature is None:
+        signature = store.file_signature(store.tasks_file(team))
+    meta = store.read_json(meta_file(team), default={})
+    recorded = meta.get("tasks_signature")
+    return stats_file(team).exists() and recorded is not None and tuple(recorded) == tuple(signature or ())
+
+
+def rebuild(all_tasks=None, team=None):
+    """Recompute every week's aggregates from the tasks file (and the archive) in one pass."""
+    if all_tasks is None:
+        all_tasks = store.load_tasks(store.tasks_file(team))
+    all_tasks = archive.with_archived(all_tasks, team=team)
+    weeks = sorted(int(w) for w in all_tasks["week"].dropna().unique())
+    stats, ages = _compute(all_tasks, weeks, pd.DataFrame(columns=AGES_COLUMNS))
+    _write(stats, ages, team)
+    return stats
+
+
+def update_weeks(all_tasks, weeks, since=None):
+    """Refresh the aggregates after `weeks` were saved.
+
+    `since` is the tasks file signature from before the save. If the aggregates
+    weren't built from that version (e.g. the file was edited by hand) they are
+    rebuilt in full; otherwise only the saved weeks and the weeks after them,
+    whose carry-over ages depend on them, are recomputed.
+    """
+    if since is None or not is_current(since):
+        return rebuild(all_tasks)
+
+    first = min(weeks)
+    later_weeks = [int(w) for w in all_tasks["week"].dropna().unique() if w > first]
+    stats_df = pd.read_csv(stats_file())
+    ages_df = _load_ages()
+    recompute = sorted(set(int(w) for w in weeks) | set(later_weeks) | set(stats_df.loc[stats_df["week"] > first, "week"]))
+
+    stats, ages = _compute(archive.with_archived(all_tasks, recompute), recompute, ages_df)
+    stats_df = pd.concat([stats_df[~stats_df["week"].isin(recompute)], stats], ignore_index=True)
+    ages_df = pd.concat([ages_df[~ages_df["week"].isin(recompute)], ages], ignore_index=True)
+    _write(stats_df, ages_df)
+    return stats_df
+
+
+def load_stats(team=None):
+    """Load a team's weekly aggregates, rebuilding them if its tasks file changed since they were built."""
+    if not is_current(team=team):
+        return rebuild(team=team)
+    return pd.read_csv(stats_file(team))
+
+
+def throughput(stats):
+    """Tasks done per team member per week (weeks as rows, members as columns)."""
+    done = stats[stats["status"] == "Done"]
+    return done.pivot_table(index="week", columns="team_member", values="tasks", aggfunc="sum", fill_value=0)
+
+
+def backlog_trend(stats):
+    """Open and done task counts per week."""
+    is_done = stats["status"] == "Done"
+    trend = pd.DataFrame({
+        "Open": stats[~is_done].groupby("week")["tasks"].sum(),
+        "Done": stats[is_done].groupby("week")["tasks"].sum(),
+    }).fillna(0).astype(int)
+    return trend.sort_index()
+
+
+def carry_over_age(stats):
+    """Average carry-over age (in weeks) of open tasks per team member per week."""
+    open_stats = stats[stats["status"] != "Done"]
+    grouped = open_stats.groupby(["week", "team_member"])[["age_total", "tasks"]].sum()
+    average = (grouped["age_total"] / grouped["tasks"]).rename("age")
+    return average.unstack("team_member").fillna(0).round(2)
@@ -0,0 +1,164 @@
+"""Archive of finished tasks, kept out of the hot tasks file.
+
+weekly_tasks.csv is loaded, filtered and rewritten by every Week page load
+and save. archive_done() moves the Done tasks of closed weeks (all weeks up to
+a cut-off, by default the current week minus KEEP_WEEKS) into a gzip-compressed
+partition, tasks_archive.csv.gz, so the hot file only holds recent weeks and
+open work. Run it from the Archive page, or on a schedule with
+`python cli.py archive` (e.g. from cron or Task Scheduler).
+
+Archived tasks stay reportable: the analytics aggregates, exports and weekly
+reports add back the archived rows of the weeks they cover (with_archived()),
+and search() looks through the archive. tasks_archive.json lists the number
+of archived tasks per week, so code that asks about weeks that were never
+archived doesn't open the archive at all.
+
+New task ids are allocated above the archived ones too (next_id()), so an
+archived id is never handed out again. A task is identified by its week and id
+together: archived rows are matched against the hot file on both.
+
+The archive is written before the hot file. If the process stops in between,
+the moved tasks are briefly in both: archived rows whose week and id are still
+in the hot file are ignored, and the next run finishes the move.
+"""
+import os
+from datetime import date
+
+import pandas as pd
+
+from planner import backup, metrics, store
+
+KEEP_WEEKS = 8
+
+# Archived tasks per team, with the archive file signature they were read from
+_cache = {}
+
+
+def archive_file(team=None):
+    return store.data_path("tasks_archive.csv.gz", team)
+
+
+def meta_file(team=None):
+    return store.data_path("tasks_archive.json", team)
+
+
+def week_counts(team=None):
+    """Return {week: number of archived tasks} without opening the archive."""
+    meta = store.read_json(meta_file(team), default={})
+    return {int(week): count for week, count in meta.get("weeks", {}).items()}
+
+
+def max_id(team=None):
+    """Return the largest archived task id (0 if none), from the metadata when it has it."""
+    meta = store.read_json(meta_file(team), default={})
+    if "max_id" in meta:
+        return int(meta["max_id"])
+    ids = load_archive(team)["id"].dropna()
+    return int(ids.max()) if not ids.empty else 0
+
+
+def next_id(tasks, team=None):
+    """Return the first task id above those of `tasks` and of the archive."""
+    ids = tasks["id"].dropna()
+    return max(int(ids.max()) if not ids.empty else 0, max_id(team)) + 1
+
+
+def _task_ids(df):
+    """Return the (week, id) pairs of tasks, which identify them across the hot file and the archive."""
+    return pd.MultiIndex.from_frame(df[["week", "id"]].astype("Int64"))
+
+
+def load_archive(team=None):
+    """Load every archived task (cached until the archive changes)."""
+    team = team or store.active_team()
+    path = archive_file(team)
+    signature = store.file_signature(path)
+    cached = _cache.get(team)
+    metrics.cache("archive", cached is not None and cached[0] == signature)
+    if cached is None or cached[0] != signature:
+        if signature is None:
+            df = pd.DataFrame(columns=store.TASK_COLUMNS)
+        else:
+            df = pd.read_csv(path, compression="gzip", dtype={"team_member": "category", "status": "category"})
+        cached = (signature, store.typed_tasks(df))
+        _cache[team] = cached
+    return cached[1]
+
+
+def with_archived(tasks, weeks=None, team=None):
+    """Return `tasks` plus the archived tasks of `weeks` (all weeks if None) that aren't in `tasks`."""
+    archived_weeks = set(week_counts(team))
+    if weeks is not None:
+        archived_weeks &= {int(w) for w in weeks}
+    if not archived_weeks:
+        return tasks
+    archived = load_archive(team)
+    archived = archived[archived["week"].isin(archived_weeks) & ~_task_ids(archived).isin(_task_ids(tasks))]
+    if archived.empty:
+        return tasks
+    return store.typed_tasks(pd.concat([tasks, archived], ignore_index=True))
+
+
+@metrics.gauge("planner_rows", "Rows of each data table, by team and table.")
+def _archived_rows():
+    return {(("table", "archived_tasks"), ("team", team)): sum(week_counts(team).values()) for team in store.list_teams()}
+
+
+def default_cutoff(keep_weeks=KEEP_WEEKS, today=None):
+    """Return the last closed week: the current week minus `keep_weeks` (weeks are numbered in 2026)."""
+    today = today or date.today()
+    current_week = max(1, min(today.isocalendar()[1], 52)) if today.year == 2026 else 1
+    return current_week - keep_weeks
+
+
+def archivable(tasks, through_week):
+    """Return the mask of Done tasks in weeks up to `through_week`."""
+    return ((tasks["status"] == "Done") & (tasks["week"] <= through_week)).to_numpy()
+
+
+def archive_done(through_week, team=None):
+    """Move the Done tasks of weeks up to `through_week` from the tasks file to the archive.
+
+    Returns {week: tasks moved}. The tasks file is rewritten once. The status
+    history is unchanged, and the analytics aggregates are rebuilt once on
+    their next load, with the archived tasks still counted.
+    """
+    team = team or store.active_team()
+    tasks_path = store.tasks_file(team)
+    tasks = store.load_tasks(tasks_path)
+    mask = archivable(tasks, through_week)
+    moved = tasks[mask]
+    if moved.empty:
+        return {}
+    backup.take_snapshot(f"before archiving weeks up to {through_week}")
+
+    archived = load_archive(team)
+    archived = archived[~_task_ids(archived).isin(_task_ids(moved))]
+    archived = pd.concat([archived.astype(object), moved.astype(object)], ignore_index=True).sort_values(["week", "id"])
+    path = archive_file(team)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    archived[store.TASK_COLUMNS].to_csv(tmp_file, index=False, compression="gzip")
+    os.replace(tmp_file, path)
+    counts = archived["week"].astype(int).value_counts().sort_index()
+    store.write_json({
+        "weeks": {str(week): int(n) for week, n in counts.items()},
+        "max_id": int(archived["id"].max()),
+    }, meta_file(team))
+
+    store.write_csv(tasks[~mask], tasks_path)
+    backup.take_snapshot(f"archived weeks up to {through_week}")
+    return {int(week): int(n) for week, n in moved["week"].value_counts().sort_index().items()}
+
+
+def search(text="", members=None, weeks=None, team=None):
+    """Return archived tasks whose label or description contains `text`, optionally by member and weeks."""
+    archived = load_archive(team)
+    mask = pd.Series(True, index=archived.index)
+    if text:
+        mask &= (archived["label"].astype(str).str.contains(text, case=False, regex=False)
+                 | archived["description"].astype(str).str.contains(text, case=False, regex=False))
+    if members:
+        mask &= archived["team_member"].isin(members)
+    if weeks is not None:
+        mask &= archived["week"].isin(list(weeks))
+    return archived[mask]
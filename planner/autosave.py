@@ -0,0 +1,161 @@
+"""Write-behind autosave: edited tables are queued and written in the background.
+
+Sessions hand their edited table to queue(). A newer edit of the same table
+(team, partition) by the same session replaces the queued one, so a burst of
+edits costs a single write; edits of other sessions are queued alongside. A
+background thread writes a table once it has had no edits for
+DEBOUNCE_SECONDS, or after MAX_DELAY_SECONDS under continuous editing.
+Everything due at the same time is written in one batch, followed by one
+backup snapshot per team. Pending writes are flushed when the process exits.
+
+A writer that finds the table changed elsewhere in a way it can't merge
+raises Conflict: the edit is dropped from the queue and reported to its
+session (see conflict()) instead of being retried.
+
+This module has no Streamlit dependency: the writer passed to queue() must
+not touch session state (see sync.write_partition).
+"""
+import atexit
+import threading
+import time
+
+from planner import backup, metrics, store
+
+DEBOUNCE_SECONDS = 2.0
+MAX_DELAY_SECONDS = 10.0
+
+_cond = threading.Condition()
+# Serialises batches between the background thread and flushes from pages or at exit
+_write_lock = threading.Lock()
+_pending = {}    # (team, key, session) -> {"df", "write", "first", "last"}
+_writing = set()  # (team, key, session) of the batch being written
+_written = {}    # (team, key) -> (session, file signature) of the last autosave
+_errors = {}     # (team, key) -> message of the last failed autosave
+_conflicts = {}  # (team, key, session) -> Conflict that refused the session's last autosave
+_thread = None
+
+
+class Conflict(Exception):
+    """Raised by a writer when the table changed elsewhere in a way the edit can't be merged with."""
+
+
+def queue(team, key, df, write, session):
+    """Queue `df` to be written by `write(df)` (with `team` active) once edits pause.
+
+    `df` must not be modified afterwards; pages replace partitions rather than
+    editing them in place. Returns immediately.
+    """
+    global _thread
+    now = time.monotonic()
+    with _cond:
+        entry = _pending.get((team, key, session))
+        first = entry["first"] if entry else now
+        _pending[(team, key, session)] = {"df": df, "write": write, "first": first, "last": now}
+        _errors.pop((team, key), None)
+        _conflicts.pop((team, key, session), None)
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="autosave", daemon=True)
+            _thread.start()
+        _cond.notify()
+
+
+def is_pending(team, key, session=None):
+    """Return True if a write of the table is queued or under way (by `session`, if given)."""
+    with _cond:
+        if session is not None:
+            return (team, key, session) in _pending or (team, key, session) in _writing
+        return any(k[:2] == (team, key) for k in (*_pending, *_writing))
+
+
+def discard(team, key, session=None):
+    """Drop the queued writes of a table (only `session`'s, if given), e.g. before a manual save."""
+    with _cond:
+        for k in [k for k in _pending if k[:2] == (team, key) and session in (None, k[2])]:
+            del _pending[k]
+
+
+def last_write(team, key):
+    """Return (session, file signature) of the last autosave of a table, or None."""
+    return _written.get((team, key))
+
+
+def last_error(team, key):
+    return _errors.get((team, key))
+
+
+def conflict(team, key, session):
+    """Return the Conflict that refused the session's last autosave of a table, or None."""
+    return _conflicts.get((team, key, session))
+
+
+def clear_conflict(team, key, session):
+    _conflicts.pop((team, key, session), None)
+
+
+def _due(entry, now):
+    return now - entry["last"] >= DEBOUNCE_SECONDS or now - entry["first"] >= MAX_DELAY_SECONDS
+
+
+def flush(force=False):
+    """Write the queued tables that are due (all of them with `force`) and return their (team, key, session)s."""
+    with _write_lock:
+        now = time.monotonic()
+        with _cond:
+            batch = {k: e for k, e in _pending.items() if force or _due(e, now)}
+            for k in batch:
+                del _pending[k]
+            # Until written, the edits are still the session's own: it must not reload over them
+            _writing.update(batch)
+
+        # Pages flush on their own thread: give them back the team they had active
+        previous_team = store.active_team()
+        try:
+            for team in sorted({team for team, _, _ in batch}):
+                store.use_team(team)
+                for (entry_team, key, session), entry in batch.items():
+                    if entry_team != team:
+                        continue
+                    try:
+                        with metrics.timer("planner_save_duration_seconds", table=key, mode="autosave"):
+                            _written[(team, key)] = (session, entry["write"](entry["df"]))
+                    except Conflict as exc:
+                        # Retrying can't help: the session decides (see sync.show_changes)
+                        _conflicts[(team, key, session)] = exc
+                    except Exception as exc:
+                        # Keep the edit queued for another attempt unless a newer one replaced it
+                        _errors[(team, key)] = str(exc)
+                        metrics.inc("planner_autosave_errors_total", table=key)
+                        with _cond:
+                            _pending.setdefault((team, key, session), {**entry, "last": time.monotonic()})
+                backup.take_snapshot("autosave")
+        finally:
+            store.use_team(previous_team)
+            with _cond:
+                _writing.difference_update(batch)
+        return list(batch)
+
+
+def _next_due(now):
+    """Seconds until the next queued table is due, or None if the queue is empty."""
+    if not _pending:
+        return None
+    return max(0.0, min(min(e["last"] + DEBOUNCE_SECONDS, e["first"] + MAX_DELAY_SECONDS) - now for e in _pending.values()))
+
+
+def _run():
+    while True:
+        with _cond:
+            wait = _next_due(time.monotonic())
+            while wait is None or wait > 0:
+                _cond.wait(timeout=wait)
+                wait = _next_due(time.monotonic())
+        flush()
+
+
+@metrics.gauge("planner_autosave_pending", "Edited tables queued for autosave.")
+def _pending_writes():
+    with _cond:
+        return {(): len(_pending)}
+
+
+atexit.register(flush, force=True)
@@ -0,0 +1,136 @@
+"""Team leave periods and availability lookups.
+
+Leave is stored in leave.csv as (team_member, start, end, reason) rows. For
+lookups each member's periods are merged into sorted, disjoint intervals
+kept as two numpy date arrays, so checking a day (or a whole array of days)
+is a binary search. The index is rebuilt only when the leave file changes.
+"""
+import numpy as np
+import pandas as pd
+
+from planner import backup, store
+
+LEAVE_COLUMNS = ["team_member", "start", "end", "reason"]
+
+# Leave index per team, with the leave file signature it was built from
+_index_cache = {}
+
+
+def leave_file(team=None):
+    return store.data_path("leave.csv", team)
+
+
+def load_leave(path=None):
+    """Load leave periods with real dates."""
+    path = path or leave_file()
+    if not path.exists():
+        return pd.DataFrame({
+            "team_member": pd.Series(dtype="str"),
+            "start": pd.Series(dtype="datetime64[ns]"),
+            "end": pd.Series(dtype="datetime64[ns]"),
+            "reason": pd.Series(dtype="str"),
+        })
+    leave = pd.read_csv(path, keep_default_na=False)
+    leave["start"] = pd.to_datetime(leave["start"])
+    leave["end"] = pd.to_datetime(leave["end"])
+    return leave[LEAVE_COLUMNS]
+
+
+def save_leave(leave, path=None):
+    """Save leave periods, dropping incomplete rows."""
+    path = path or leave_file()
+    leave = leave.dropna(subset=["team_member", "start", "end"])
+    leave = leave[leave["team_member"] != ""].copy()
+    leave["start"] = pd.to_datetime(leave["start"]).dt.strftime("%Y-%m-%d")
+    leave["end"] = pd.to_datetime(leave["end"]).dt.strftime("%Y-%m-%d")
+    store.write_csv(leave[LEAVE_COLUMNS].sort_values(["start", "team_member"]), path)
+    backup.take_snapshot(f"saved {path.name}")
+
+
+def _merge_periods(periods):
+    """Merge overlapping or touching periods into sorted, disjoint (start, end) pairs."""
+    merged = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1] + pd.Timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def build_index(leave):
+    """Return {member: (starts, ends)} arrays of sorted, disjoint leave periods."""
+    index = {}
+    leave = leave[leave["end"] >= leave["start"]]
+    for member, periods in leave.groupby("team_member"):
+        merged = _merge_periods(zip(periods["start"], periods["end"]))
+        starts = np.array([p[0] for p in merged], dtype="datetime64[D]")
+        ends = np.array([p[1] for p in merged], dtype="datetime64[D]")
+        index[member] = (starts, ends)
+    return index
+
+
+def leave_index():
+    """Return the active team's per-member leave index, rebuilding it only if its leave file changed."""
+    team = store.active_team()
+    signature = store.file_signature(leave_file())
+    cached = _index_cache.get(team)
+    if cached is None or cached[0] != signature or signature is None:
+        cached = (signature, build_index(load_leave()))
+        _index_cache[team] = cached
+    return cached[1]
+
+
+def on_leave_mask(member, days, index=None):
+    """Return a boolean array: True where the member is on leave on each of `days`."""
+    index = leave_index() if index is None else index
+    days = np.array([np.datetime64(pd.Timestamp(d).date(), "D") for d in days], dtype="datetime64[D]")
+    if member not in index:
+        return np.zeros(len(days), dtype=bool)
+    starts, ends = index[member]
+    i = starts.searchsorted(days, side="right") - 1
+    return (i >= 0) & (days <= ends[np.maximum(i, 0)])
+
+
+def is_on_leave(member, day, index=None):
+    """Return True if the member is on leave on that day."""
+    index = leave_index() if index is None else index
+    if member not in index:
+        return False
+    starts, ends = index[member]
+    day = np.datetime64(pd.Timestamp(day).date(), "D")
+    i = starts.searchsorted(day, side="right") - 1
+    return bool(i >= 0 and day <= ends[i])
+
+
+def members_on_leave(day, members, index=None):
+    """Return the members who are on leave on a given day."""
+    index = leave_index() if index is None else index
+    return [m for m in members if m in index and is_on_leave(m, day, index)]
+
+
+def unavailable_dates(members, start, end, index=None):
+    """Return {member: set of dates} on leave between start and end, for the rota scheduler."""
+    index = leave_index() if index is None else index
+    days = pd.date_range(start, end)
+    unavailable = {}
+    for member in members:
+        if member in index:
+            mask = on_leave_mask(member, days, index)
+            if mask.any():
+                unavailable[member] = {d.date() for d in days[mask]}
+    return unavailable
+
+
+def week_capacity(year, week_num, members, index=None):
+    """Return (available person-days, total person-days, {member: days on leave}) for a week."""
+    index = leave_index() if index is None else index
+    days = store.week_dates(year, week_num)
+    days_off = {}
+    for member in members:
+        if member in index:
+            off = int(sum(on_leave_mask(member, days, index)))
+            if off:
+                days_off[member] = off
+    total = len(members) * len(days)
+    return total - sum(days_off.values()), total, days_off
@@ -0,0 +1,247 @@
+"""Automatic snapshots of a team's data files, with point-in-time restore.
+
+A snapshot is a small manifest (backups/manifests/<id>.json) mapping each
+data file to the SHA-256 of its content. File contents are stored once,
+gzip-compressed, in backups/objects/ under their hash, so unchanged files
+cost nothing and identical versions are shared between snapshots.
+
+The tasks file, which holds every week and is rewritten by every save, is
+stored as one object per week (plus its header row), so a save compresses and
+stores only the weeks it changed. Its manifest entry is {"header": hash,
+"weeks": {week: hash}} instead of a hash; restoring it writes the weeks in
+order.
+
+backups/index.json remembers the signature (mtime, size, inode) and hash of
+each file at the last snapshot: only files whose signature changed are read
+and hashed, so taking a snapshot costs what changed, not the history size.
+Snapshots, pruning and restores of the process hold a lock, so concurrent
+saves don't overwrite each other's index updates.
+
+Retention keeps every snapshot from the last KEEP_ALL_HOURS, then the last
+one of each day for KEEP_DAILY_DAYS and of each week for KEEP_WEEKLY_WEEKS.
+Pruning runs at most once every PRUNE_EVERY_HOURS and then deletes objects
+no kept snapshot refers to.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from planner import store
+
+# Source data files; derived files (analytics aggregates, status history) are rebuilt from these
+BACKED_UP = ["weekly_tasks.csv", "daily_support.csv", "on_hold.csv", "team_members.csv", "leave.csv", "team.json",
+             "tasks_archive.csv.gz", "tasks_archive.json", "filter_views.json"]
+
+# Files stored as one object per week
+PARTITIONED = {"weekly_tasks.csv"}
+
+KEEP_ALL_HOURS = 24
+KEEP_DAILY_DAYS = 30
+KEEP_WEEKLY_WEEKS = 26
+PRUNE_EVERY_HOURS = 1
+
+ID_FORMAT = "%Y%m%dT%H%M%S%f"
+
+# Serialises the read-modify-write of index.json (restore() snapshots while holding it)
+_lock = threading.RLock()
+
+
+def backup_dir(team=None):
+    return store.data_path("backups", team)
+
+
+def _objects_dir():
+    return backup_dir() / "objects"
+
+
+def _manifests_dir():
+    return backup_dir() / "manifests"
+
+
+def _index_file():
+    return backup_dir() / "index.json"
+
+
+def _object_path(sha):
+    return _objects_dir() / sha[:2] / f"{sha}.gz"
+
+
+def _store_object(data):
+    """Store file content under its hash (once) and return the hash."""
+    sha = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = store.tmp_path(path)
+        tmp_file.write_bytes(gzip.compress(data, compresslevel=6))
+        os.replace(tmp_file, path)
+    return sha
+
+
+def read_object(sha):
+    """Return the content of a stored file version."""
+    return gzip.decompress(_object_path(sha).read_bytes())
+
+
+def _store_file(name, path):
+    """Store a data file and return its manifest entry: its hash, or the hashes of its weeks if partitioned."""
+    if name in PARTITIONED:
+        try:
+            header, weeks = store.week_partitions(path)
+        except ValueError:
+            # Not in the current layout (e.g. before a migration): stored whole
+            pass
+        else:
+            return {"header": _store_object(header),
+                    "weeks": {str(week): _store_object(rows) for week, rows in sorted(weeks.items())}}
+    return _store_object(path.read_bytes())
+
+
+def _entry_objects(entry):
+    """Return the object hashes a manifest entry refers to."""
+    if isinstance(entry, str):
+        return [entry]
+    return [entry["header"], *entry["weeks"].values()]
+
+
+def read_file(entry):
+    """Return the content of a file version from its manifest entry."""
+    if isinstance(entry, str):
+        return read_object(entry)
+    weeks = sorted(entry["weeks"].items(), key=lambda item: int(item[0]))
+    return read_object(entry["header"]) + b"".join(read_object(sha) for _, sha in weeks)
+
+
+def snapshot_time(snapshot_id):
+    return datetime.strptime(snapshot_id, ID_FORMAT)
+
+
+def list_snapshots():
+    """Return the snapshot manifests, oldest first."""
+    if not _manifests_dir().exists():
+        return []
+    ids = sorted(p.stem for p in _manifests_dir().glob("*.json"))
+    return [{"id": i, **store.read_json(_manifests_dir() / f"{i}.json")} for i in ids]
+
+
+def take_snapshot(reason="save", now=None):
+    """Snapshot the data files that changed since the last snapshot.
+
+    Returns the new snapshot id, or None if nothing changed.
+    """
+    with _lock:
+        now = now or datetime.now()
+        index = store.read_json(_index_file(), default={"files": {}, "last": None, "pruned_at": None})
+        files, changed = {}, []
+        for name in BACKED_UP:
+            path = store.data_path(name)
+            signature = store.file_signature(path)
+            if signature is None:
+                continue
+            known = index["files"].get(name)
+            if known and tuple(known["signature"]) == signature:
+                files[name] = known["sha"]
+                continue
+            sha = _store_file(name, path)
+            index["files"][name] = {"signature": list(signature), "sha": sha}
+            files[name] = sha
+            if not known or known["sha"] != sha:
+                changed.append(name)
+
+        removed = [name for name in index["files"] if name not in files]
+        for name in removed:
+            del index["files"][name]
+        if index["last"] and not changed and not removed:
+            store.write_json(index, _index_file())
+            return None
+
+        snapshot_id = now.strftime(ID_FORMAT)
+        _manifests_dir().mkdir(parents=True, exist_ok=True)
+        store.write_json({
+            "taken_at": now.isoformat(timespec="seconds"),
+            "reason": reason,
+            "changed": changed + removed,
+            "files": files,
+        }, _manifests_dir() / f"{snapshot_id}.json")
+        index["last"] = snapshot_id
+
+        if not index["pruned_at"] or now - datetime.fromisoformat(index["pruned_at"]) >= timedelta(hours=PRUNE_EVERY_HOURS):
+            prune(now)
+            index["pruned_at"] = now.isoformat(timespec="seconds")
+        store.write_json(index, _index_file())
+        return snapshot_id
+
+
+def _kept(snapshot_ids, now):
+    """Apply the retention policy to snapshot ids and return the ones to keep."""
+    keep, days, weeks = set(), set(), set()
+    for snapshot_id in sorted(snapshot_ids, reverse=True):
+        taken = snapshot_time(snapshot_id)
+        age = now - taken
+        if age <= timedelta(hours=KEEP_ALL_HOURS):
+            keep.add(snapshot_id)
+        elif age <= timedelta(days=KEEP_DAILY_DAYS):
+            if taken.date() not in days:
+                days.add(taken.date())
+                keep.add(snapshot_id)
+        elif age <= timedelta(weeks=KEEP_WEEKLY_WEEKS):
+            if taken.isocalendar()[:2] not in weeks:
+                weeks.add(taken.isocalendar()[:2])
+                keep.add(snapshot_id)
+    if snapshot_ids:
+        keep.add(max(snapshot_ids))
+    return keep
+
+
+def prune(now=None):
+    """Delete snapshots outside the retention policy and the file versions only they used."""
+    with _lock:
+        snapshots = list_snapshots()
+        keep = _kept([s["id"] for s in snapshots], now or datetime.now())
+        referenced = set()
+        for snapshot in snapshots:
+            if snapshot["id"] in keep:
+                for entry in snapshot["files"].values():
+                    referenced.update(_entry_objects(entry))
+            else:
+                (_manifests_dir() / f"{snapshot['id']}.json").unlink(missing_ok=True)
+        # Objects written in the last hour may belong to a snapshot another process is still writing
+        recent = time.time() - 3600
+        if _objects_dir().exists():
+            for path in _objects_dir().glob("*/*.gz"):
+                if path.name[:-3] not in referenced and path.stat().st_mtime < recent:
+                    path.unlink(missing_ok=True)
+
+
+def snapshot_at(when):
+    """Return the id of the latest snapshot taken at or before `when`, or None."""
+    ids = [s["id"] for s in list_snapshots() if snapshot_time(s["id"]) <= when]
+    return ids[-1] if ids else None
+
+
+def restore(snapshot_id, names=None):
+    """Restore data files to their version in a snapshot (all of them by default).
+
+    The current files are snapshotted first, so a restore can itself be undone.
+    Files that didn't exist when the snapshot was taken are left alone.
+    Returns the list of restored file names.
+    """
+    manifest = store.read_json(_manifests_dir() / f"{snapshot_id}.json")
+    if manifest is None:
+        raise ValueError(f"No snapshot {snapshot_id}")
+    with _lock:
+        take_snapshot("before restore")
+        restored = []
+        for name, entry in manifest["files"].items():
+            if names and name not in names:
+                continue
+            path = store.data_path(name)
+            tmp_file = store.tmp_path(path)
+            tmp_file.write_bytes(read_file(entry))
+            os.replace(tmp_file, path)
+            restored.append(name)
+        take_snapshot(f"restored {snapshot_id}")
+    return restored
@@ -0,0 +1,165 @@
+"""Chart images for the PDF reports and the Analytics page, cached on disk.
+
+Charts are drawn with Pillow (installed with fpdf2) from the materialized
+weekly aggregates (see analytics). Each image is stored in the team's charts/
+directory under the SHA-256 of the data it shows, so a chart is drawn once per
+version of its data: every report and page showing the same data reuses the
+same PNG, and generating a PDF only pays for the charts whose data changed.
+The least recently used images are removed beyond MAX_CHARTS.
+"""
+import hashlib
+import os
+
+from planner import analytics, metrics, store
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    CHARTS_AVAILABLE = True
+except ImportError:
+    CHARTS_AVAILABLE = False
+
+# Bump when the drawing changes, so cached images are redrawn
+CHART_VERSION = 1
+MAX_CHARTS = 200
+
+WIDTH, HEIGHT = 900, 500
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 130, 30, 60, 75
+
+# Same colors as the PDF status text and the Year Overview
+STATUS_COLORS = {"To be started": (204, 0, 0), "In progress": (184, 134, 11), "Done": (34, 139, 34)}
+OPEN_COLOR = (30, 136, 229)
+GRID_COLOR = (225, 225, 225)
+
+
+def charts_dir(team=None):
+    return store.data_path("charts", team)
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _cached(kind, data, draw):
+    """Return the path of the chart of `data`, drawing it with `draw(data)` only if it isn't cached."""
+    digest = hashlib.sha256(f"{kind}|{CHART_VERSION}|{WIDTH}x{HEIGHT}\n".encode("utf-8")
+                            + data.to_csv().encode("utf-8")).hexdigest()
+    path = charts_dir() / f"{kind}-{digest[:24]}.png"
+    metrics.cache("chart_images", path.exists())
+    if path.exists():
+        os.utime(path)
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    draw(data).save(tmp_file, format="PNG", optimize=True)
+    os.replace(tmp_file, path)
+    _prune()
+    return path
+
+
+def _prune():
+    images = sorted(charts_dir().glob("*.png"), key=lambda p: p.stat().st_mtime)
+    for old in images[:-MAX_CHARTS]:
+        old.unlink(missing_ok=True)
+
+
+def _canvas(title):
+    image = Image.new("RGB", (WIDTH, HEIGHT), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((WIDTH // 2, 25), title, fill="black", font=_font(22), anchor="mm")
+    return image, draw
+
+
+def _legend(draw, items):
+    x = MARGIN_LEFT
+    for label, color in items:
+        draw.rectangle([x, HEIGHT - 30, x + 14, HEIGHT - 16], fill=color)
+        draw.text((x + 20, HEIGHT - 23), label, fill="black", font=_font(14), anchor="lm")
+        x += 40 + int(draw.textlength(label, font=_font(14)))
+
+
+def _draw_status(breakdown):
+    """Stacked horizontal bars of task counts by status, one bar per member."""
+    image, draw = _canvas("Tasks by status")
+    plot_width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    most = max(int(breakdown.sum(axis=1).max()), 1) if not breakdown.empty else 1
+    row = plot_height / max(len(breakdown), 1)
+    bar = min(row * 0.7, 40)
+    for i, (member, counts) in enumerate(breakdown.iterrows()):
+        y = MARGIN_TOP + i * row + (row - bar) / 2
+        draw.text((MARGIN_LEFT - 10, y + bar / 2), str(member)[:16], fill="black", font=_font(14), anchor="rm")
+        x = MARGIN_LEFT
+        for status, count in counts.items():
+            if count:
+                width = plot_width * count / most
+                draw.rectangle([x, y, x + width, y + bar], fill=STATUS_COLORS.get(status, (128, 128, 128)))
+                if width > 20:
+                    draw.text((x + width / 2, y + bar / 2), str(int(count)), fill="white", font=_font(13), anchor="mm")
+                x += width
+    _legend(draw, [(status, STATUS_COLORS.get(status, (128, 128, 128))) for status in breakdown.columns])
+    return image
+
+
+def _draw_burndown(trend):
+    """Open and done tasks per week, as lines."""
+    image, draw = _canvas("Burndown: open vs done tasks per week")
+    plot_width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    # Round the axis up so its four steps are whole numbers
+    top = max(-(-int(trend.to_numpy().max()) // 4) * 4, 4) if not trend.empty else 4
+    weeks = list(trend.index)
+
+    for i in range(5):
+        value = top * i / 4
+        y = MARGIN_TOP + plot_height - plot_height * i / 4
+        draw.line([MARGIN_LEFT, y, WIDTH - MARGIN_RIGHT, y], fill=GRID_COLOR)
+        draw.text((MARGIN_LEFT - 10, y), str(int(value)), fill="black", font=_font(13), anchor="rm")
+
+    def point(i, value):
+        x = MARGIN_LEFT + (plot_width * i / (len(weeks) - 1) if len(weeks) > 1 else plot_width / 2)
+        return x, MARGIN_TOP + plot_height - plot_height * value / top
+
+    step = max(1, len(weeks) // 13)
+    for i, week in enumerate(weeks):
+        if i % step == 0 or i == len(weeks) - 1:
+            draw.text((point(i, 0)[0], MARGIN_TOP + plot_height + 12), f"W{week}", fill="black", font=_font(13), anchor="mm")
+    for column, color in [("Open", OPEN_COLOR), ("Done", STATUS_COLORS["Done"])]:
+        points = [point(i, value) for i, value in enumerate(trend[column])]
+        if len(points) > 1:
+            draw.line(points, fill=color, width=3)
+        for x, y in points:
+            draw.ellipse([x - 4, y - 4, x + 4, y + 4], fill=color)
+    _legend(draw, [("Open", OPEN_COLOR), ("Done", STATUS_COLORS["Done"])])
+    return image
+
+
+def status_chart(stats, week):
+    """Return the path of the status breakdown chart of a week (members x statuses), or None if it has no tasks."""
+    week_stats = stats[stats["week"] == week]
+    if week_stats.empty:
+        return None
+    breakdown = week_stats.pivot_table(index="team_member", columns="status", values="tasks", aggfunc="sum", fill_value=0)
+    statuses = [s for s in store.STATUS_OPTIONS if s in breakdown.columns]
+    breakdown = breakdown[statuses + [s for s in breakdown.columns if s not in statuses]].sort_index()
+    return _cached("status", breakdown, _draw_status)
+
+
+def burndown_chart(stats, through_week=None):
+    """Return the path of the open vs done chart of every week up to `through_week`, or None without data."""
+    trend = analytics.backlog_trend(stats)
+    if through_week is not None:
+        trend = trend[trend.index <= through_week]
+    if trend.empty:
+        return None
+    return _cached("burndown", trend, _draw_burndown)
+
+
+def report_charts(week, stats=None):
+    """Return the (status, burndown) chart paths of a week's report, each None if there is nothing to show."""
+    if not CHARTS_AVAILABLE:
+        return None, None
+    stats = analytics.load_stats() if stats is None else stats
+    return status_chart(stats, week), burndown_chart(stats, week)
@@ -0,0 +1,160 @@
+"""Weekly digest per team member: their tasks, support days, leave and on-hold projects.
+
+build_digests() loads the week's data once for the whole team (only that
+week's rows of the tasks file, see store.load_weeks) and splits each table by
+member with a single groupby, so rendering every member costs one load, not
+one per member. Each digest has a subject and a plain text and an HTML body.
+
+Digests are delivered by a sender, picked by name from SENDERS:
+
+    file  writes <member>.txt and <member>.html to a directory
+    smtp  sends one multipart email per member over a single SMTP connection,
+          e.g. to a local debugging server (python -m aiosmtpd -n -l localhost:1025)
+
+A sender is any object with a send(digests) method.
+"""
+import html
+import re
+import smtplib
+from email.message import EmailMessage
+from pathlib import Path
+
+import pandas as pd
+
+from planner import availability, store
+
+YEAR = 2026
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", ".", name.lower()).strip(".") or "member"
+
+
+def _week_data(week, year, members):
+    """Load the week's tasks, support days, leave and open on-hold projects, grouped by member."""
+    days = store.week_dates(year, week)
+    tasks = store.load_weeks([week])
+    # To be started, then in progress, then done
+    rank = tasks["status"].astype(object).map({s: i for i, s in enumerate(store.STATUS_OPTIONS)})
+    tasks = tasks.assign(rank=rank.fillna(len(store.STATUS_OPTIONS))).sort_values(["rank", "label"])
+    support = store.load_support()
+    support = support[support["date"].between(pd.Timestamp(days[0]), pd.Timestamp(days[-1]))]
+    duties = pd.concat([
+        pd.DataFrame({"member": support[column].astype(object), "date": support["date"], "role": role})
+        for column, role in [("primary_support", "Primary"), ("secondary_support", "Secondary")]
+    ]).sort_values("date")
+    on_hold = store.load_on_hold()
+    on_hold = on_hold[on_hold["status"] != "Done"]
+    _, _, days_off = availability.week_capacity(year, week, members)
+    return {
+        "days": days,
+        "tasks": dict(tuple(tasks.groupby("team_member", observed=True))),
+        "support": dict(tuple(duties.groupby("member"))),
+        "on_hold": dict(tuple(on_hold.groupby("team_member", observed=True))),
+        "days_off": days_off,
+    }
+
+
+def _render(member, week, data):
+    """Return (plain text, HTML) of one member's digest."""
+    tasks = data["tasks"].get(member, pd.DataFrame(columns=store.TASK_COLUMNS))
+    support = data["support"].get(member)
+    on_hold = data["on_hold"].get(member)
+    days_off = data["days_off"].get(member, 0)
+    first, last = data["days"][0], data["days"][-1]
+
+    sections = []
+    counts = tasks["status"].value_counts()
+    summary = ", ".join(f"{counts[s]} {s.lower()}" for s in store.STATUS_OPTIONS if counts.get(s))
+    sections.append((f"Tasks ({summary or 'none'})",
+                     [f"[{t.status}] {t.label}: {t.description}" for t in tasks.itertuples()]))
+    sections.append(("Support days", [f"{d:%a %d %b} ({role})" for d, role in zip(support["date"], support["role"])]
+                     if support is not None else []))
+    if days_off:
+        sections.append(("Leave", [f"{days_off} day(s) off this week"]))
+    if on_hold is not None:
+        sections.append(("On hold", [f"[{p.status}] {p.label}" for p in on_hold.itertuples()]))
+
+    title = f"Week {week} ({first:%d %b} - {last:%d %b %Y})"
+    text = [f"Hi {member},", "", f"Your plan for {title}:"]
+    body = [f"<p>Hi {html.escape(member)},</p>", f"<p>Your plan for <b>{html.escape(title)}</b>:</p>"]
+    for heading, lines in sections:
+        text += ["", heading] + [f"  - {line}" for line in lines or ["nothing"]]
+        items = "".join(f"<li>{html.escape(line)}</li>" for line in lines) or "<li><i>nothing</i></li>"
+        body.append(f"<h3>{html.escape(heading)}</h3><ul>{items}</ul>")
+    return "\n".join(text) + "\n", "<html><body>" + "".join(body) + "</body></html>"
+
+
+def build_digests(week, members=None, year=YEAR):
+    """Return a digest per member of the active team: {"member", "subject", "text", "html"} dicts."""
+    members = store.load_team() if members is None else list(members)
+    data = _week_data(week, year, members)
+    digests = []
+    for member in members:
+        text, body = _render(member, week, data)
+        digests.append({
+            "member": member,
+            "subject": f"{store.team_name()}: your week {week}",
+            "text": text,
+            "html": body,
+        })
+    return digests
+
+
+class FileSender:
+    """Writes each digest to <directory>/<member>.txt and .html."""
+
+    def __init__(self, directory="digests"):
+        self.directory = Path(directory)
+
+    def send(self, digests):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        for digest in digests:
+            base = self.directory / _slug(digest["member"])
+            base.with_suffix(".txt").write_text(digest["text"], encoding="utf-8")
+            base.with_suffix(".html").write_text(digest["html"], encoding="utf-8")
+            written.append(str(base.with_suffix(".txt")))
+        return written
+
+
+class SmtpSender:
+    """Sends each digest as a multipart email, all over one SMTP connection.
+
+    Members are mailed at `addresses[member]`, or <member>@<domain>.
+    """
+
+    def __init__(self, host="localhost", port=1025, sender="planner@localhost", domain="localhost",
+                 addresses=None, username=None, password=None, starttls=False):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.domain = domain
+        self.addresses = addresses or {}
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def address(self, member):
+        return self.addresses.get(member) or f"{_slug(member)}@{self.domain}"
+
+    def send(self, digests):
+        sent = []
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for digest in digests:
+                message = EmailMessage()
+                message["Subject"] = digest["subject"]
+                message["From"] = self.sender
+                message["To"] = self.address(digest["member"])
+                message.set_content(digest["text"])
+                message.add_alternative(digest["html"], subtype="html")
+                smtp.send_message(message)
+                sent.append(message["To"])
+        return sent
+
+
+SENDERS = {"file": FileSender, "smtp": SmtpSender}
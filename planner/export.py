@@ -0,0 +1,156 @@
+"""Export the whole planner to an Excel workbook or a zip of CSV files.
+
+Data files are streamed in chunks: the workbook is written with xlsxwriter's
+constant_memory mode, which flushes each row to disk as soon as it's written,
+and CSV files are written straight into the zip archive. Neither ever holds
+more than one chunk of rows in memory.
+
+Both take an optional filter expression (see planner.filters), applied to each
+chunk as it streams by, to export only part of the planner.
+"""
+import zipfile
+
+import pandas as pd
+
+from planner import analytics, archive, filters, store
+
+try:
+    import xlsxwriter
+    XLSX_AVAILABLE = True
+except ImportError:
+    XLSX_AVAILABLE = False
+
+CHUNK_SIZE = 10000
+
+TASK_HEADERS = ["ID", "Team Member", "Label", "Description", "Status"]
+SUMMARY_HEADERS = ["Week", "Team Member", *store.STATUS_OPTIONS, "Carried Over"]
+SUPPORT_HEADERS = ["Date", "Primary Support", "Secondary Support"]
+ON_HOLD_HEADERS = ["ID", "Team Member", "Label", "Description", "Status"]
+
+
+def _chunks(path, **kwargs):
+    """Read a CSV file in chunks, yielding nothing if it doesn't exist."""
+    if not path.exists():
+        return
+    yield from pd.read_csv(path, chunksize=CHUNK_SIZE, keep_default_na=False, **kwargs)
+
+
+def _filtered(chunks, expression):
+    """Yield the rows of each chunk that match a filter expression."""
+    predicate = filters.compile_filter(expression or "")
+    for chunk in chunks:
+        yield chunk[predicate(chunk)] if predicate.expression else chunk
+
+
+def _task_chunks(expression=""):
+    """Yield task chunks in the standard column layout, then the archived tasks (see planner.archive)."""
+    def chunks():
+        hot = set()
+        for chunk in _chunks(store.tasks_file()):
+            hot.update(zip(chunk["week"], chunk["id"]))
+            yield chunk[store.TASK_COLUMNS]
+        path = archive.archive_file()
+        if path.exists():
+            for chunk in _chunks(path, compression="gzip"):
+                # Skip the tasks still in the hot file (an interrupted archive run), by week and id
+                archived = [key not in hot for key in zip(chunk["week"], chunk["id"])]
+                yield chunk.loc[archived, store.TASK_COLUMNS]
+    return _filtered(chunks(), expression)
+
+
+def _weeks(expression=""):
+    """Return the sorted week numbers of the tasks file (reads only the week column) and the archive.
+
+    Only the week terms of `expression` narrow them down.
+    """
+    weeks = set()
+    for chunk in _chunks(store.tasks_file(), usecols=["week"]):
+        weeks.update(int(w) for w in chunk["week"].unique())
+    weeks = pd.DataFrame({"week": sorted(weeks | set(archive.week_counts()))})
+    return [int(w) for w in next(_filtered([weeks], expression))["week"]]
+
+
+def summary_rows(expression=""):
+    """Tasks per week x member x status from the materialized analytics aggregates (member and week terms apply)."""
+    stats = analytics.load_stats()
+    if stats.empty:
+        return pd.DataFrame(columns=SUMMARY_HEADERS)
+    summary = stats.pivot_table(index=["week", "team_member"], columns="status", values="tasks", aggfunc="sum", fill_value=0)
+    summary = summary.reindex(columns=store.STATUS_OPTIONS, fill_value=0)
+    summary["Carried Over"] = stats.groupby(["week", "team_member"])["carried_over"].sum()
+    return next(_filtered([summary.reset_index()], expression))
+
+
+def write_workbook(output, expression=""):
+    """Write every week, a summary, the support schedule and on-hold projects to an .xlsx file.
+
+    `output` must be a file path: constant_memory mode needs temporary files on disk.
+    With a filter `expression`, only the matching tasks and projects are written.
+    """
+    workbook = xlsxwriter.Workbook(str(output), {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True, "bg_color": "#E6E6E6", "border": 1})
+
+    def add_sheet(name, headers, widths):
+        sheet = workbook.add_worksheet(name)
+        sheet.write_row(0, 0, headers, header_format)
+        for i, width in enumerate(widths):
+            sheet.set_column(i, i, width)
+        sheet.freeze_panes(1, 0)
+        return sheet
+
+    # Summary first so it opens by default
+    summary_sheet = add_sheet("Summary", SUMMARY_HEADERS, [8, 20, 14, 14, 14, 14])
+    for i, row in enumerate(summary_rows(expression).itertuples(index=False), start=1):
+        summary_sheet.write_row(i, 0, row)
+
+    # One sheet per week, created in week order, then filled as chunks stream by
+    week_sheets = {w: add_sheet(f"Week {w:02d}", TASK_HEADERS, [8, 20, 25, 60, 14]) for w in _weeks(expression)}
+    next_row = dict.fromkeys(week_sheets, 1)
+    for chunk in _task_chunks(expression):
+        for week, rows in chunk.groupby("week", sort=False):
+            sheet = week_sheets[int(week)]
+            for row in rows[["id", "team_member", "label", "description", "status"]].itertuples(index=False):
+                sheet.write_row(next_row[int(week)], 0, row)
+                next_row[int(week)] += 1
+
+    support_sheet = add_sheet("Daily Support", SUPPORT_HEADERS, [14, 20, 20])
+    row_num = 1
+    for chunk in _chunks(store.support_file()):
+        for row in chunk[store.SUPPORT_COLUMNS].itertuples(index=False):
+            support_sheet.write_row(row_num, 0, row)
+            row_num += 1
+
+    on_hold_sheet = add_sheet("On Hold", ON_HOLD_HEADERS, [8, 20, 25, 60, 14])
+    row_num = 1
+    for chunk in _filtered(_chunks(store.on_hold_file()), expression):
+        for row in chunk[[c for c in store.ON_HOLD_COLUMNS if c in chunk.columns]].itertuples(index=False):
+            on_hold_sheet.write_row(row_num, 0, row)
+            row_num += 1
+
+    workbook.close()
+
+
+def write_csv_zip(output, expression=""):
+    """Write the planner as a zip of CSV files (tasks, summary, support, on hold), optionally filtered."""
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        with zip_file.open("weekly_tasks.csv", "w") as f:
+            header = True
+            for chunk in _task_chunks(expression):
+                f.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+                header = False
+            if header:
+                f.write(pd.DataFrame(columns=store.TASK_COLUMNS).to_csv(index=False).encode("utf-8"))
+
+        zip_file.writestr("weekly_summary.csv", summary_rows(expression).to_csv(index=False))
+
+        for name, path, columns in [
+            ("daily_support.csv", store.support_file(), store.SUPPORT_COLUMNS),
+            ("on_hold.csv", store.on_hold_file(), store.ON_HOLD_COLUMNS),
+        ]:
+            with zip_file.open(name, "w") as f:
+                header = True
+                for chunk in _filtered(_chunks(path), expression):
+                    f.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+                    header = False
+                if header:
+                    f.write(pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8"))
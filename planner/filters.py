@@ -0,0 +1,347 @@
+"""Filter expressions shared by the Week pages, On Hold, the Range View and exports.
+
+A filter is a short text expression, e.g.
+
+    member:Alice,Bob status:open week:10-14 "release notes" age:>=2
+
+Terms are separated by spaces (quote values that contain spaces) and must all
+match. Prefix a term with - to exclude what it matches (-status:Done).
+
+    member:NAME[,NAME...]   tasks of any of these members
+    status:STATUS[,...]     To be started, In progress, Done, or open (not Done)
+    week:RANGE              week numbers, e.g. 12, 10-14, >=20, <5
+    age:RANGE               carry-over age in weeks (see planner.analytics), e.g. 0, >=2
+    text:WORDS or WORDS     label or description contains the words
+
+Names, statuses and text match case-insensitively. A term whose column a
+table doesn't have (week or age on the on-hold projects, say) doesn't filter it.
+
+Expressions are normalized (so equivalent spellings share everything below)
+and compiled once into a predicate that builds a boolean mask with vectorized
+column operations; member and status tests work on the category codes. apply()
+also keeps the matching row positions of recent results, keyed on the
+expression and a version of the data, so a rerun with the same filter on
+unchanged data doesn't evaluate it at all.
+
+Named views are saved per team in filter_views.json. filter_bar() shows the
+view picker and the expression box and keeps them in the URL (?view=... or
+?filter=...), so a filtered page can be bookmarked or shared.
+"""
+import functools
+import shlex
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from planner import analytics, metrics, store
+
+FIELDS = ["member", "status", "week", "age", "text"]
+
+# Columns a table needs for a field to filter it
+FIELD_COLUMNS = {
+    "member": ["team_member"],
+    "status": ["status"],
+    "week": ["week"],
+    "age": ["week", *store.TASK_KEY],
+    "text": ["label", "description"],
+}
+
+SYNTAX_HELP = (
+    "Terms like member:Alice,Bob status:open week:10-14 age:>=2 or words to look for in the label and "
+    "description. All terms must match; prefix one with - to exclude it. Quote values with spaces."
+)
+
+RESULT_CACHE_SIZE = 256
+NO_VIEW = "—"
+
+# Row positions matching (expression, team, version, rows), most recently used last
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def views_file(team=None):
+    return store.data_path("filter_views.json", team)
+
+
+# --- Parsing ---
+
+def _values(value):
+    return tuple(sorted({v.strip().casefold() for v in value.split(",") if v.strip()}))
+
+
+def _statuses(value):
+    known = {s.casefold() for s in store.STATUS_OPTIONS}
+    statuses = set()
+    for status in _values(value):
+        if status == "open":
+            statuses.update(known - {"done"})
+        elif status in known:
+            statuses.add(status)
+        else:
+            raise ValueError(f"Unknown status '{status}' (use {', '.join(store.STATUS_OPTIONS)} or open)")
+    return tuple(sorted(statuses))
+
+
+def _bounds(value):
+    """Parse 12, 10-14, >=20, >19, <=4 or <5 into inclusive (low, high) bounds, None for open ends."""
+    text = value.replace(" ", "")
+    try:
+        for op, bounds in [(">=", lambda n: (n, None)), ("<=", lambda n: (None, n)),
+                           (">", lambda n: (n + 1, None)), ("<", lambda n: (None, n - 1))]:
+            if text.startswith(op):
+                return bounds(int(text[len(op):]))
+        low, sep, high = text.partition("-")
+        if sep:
+            return int(low), int(high)
+        return int(text), int(text)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a number or range like 12, 10-14 or >=2") from None
+
+
+PARSERS = {"member": _values, "status": _statuses, "week": _bounds, "age": _bounds, "text": str.casefold}
+
+
+def _format_value(field, value):
+    if field in ("week", "age"):
+        low, high = value
+        if low is None:
+            return f"<={high}"
+        if high is None:
+            return f">={low}"
+        return str(low) if low == high else f"{low}-{high}"
+    return ",".join(value) if isinstance(value, tuple) else value
+
+
+def _quote(value):
+    if any(c.isspace() for c in value) or "'" in value or '"' in value:
+        return shlex.quote(value)
+    return value
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def parse(expression):
+    """Parse an expression into a sorted tuple of (negated, field, value) terms; raises ValueError if invalid."""
+    try:
+        tokens = shlex.split(expression or "")
+    except ValueError as e:
+        raise ValueError(f"Can't read the filter: {e}") from None
+    terms = set()
+    for token in tokens:
+        negated = token.startswith("-") and len(token) > 1
+        if negated:
+            token = token[1:]
+        field, sep, value = token.partition(":")
+        field = field.casefold()
+        if not sep or field not in PARSERS:
+            # Anything else, colons included, is text to look for
+            field, value = "text", token
+        if not value.strip():
+            raise ValueError(f"Nothing to match after '{field}:'")
+        parsed = PARSERS[field](value)
+        if field in ("member", "status") and not parsed:
+            raise ValueError(f"Nothing to match after '{field}:'")
+        terms.add((negated, field, parsed))
+    return tuple(sorted(terms, key=lambda t: (FIELDS.index(t[1]), t[0], repr(t[2]))))
+
+
+def normalize(expression):
+    """Return the canonical spelling of an expression ("" for no filter)."""
+    return " ".join(
+        ("-" if negated else "") + f"{field}:" + _quote(_format_value(field, value))
+        for negated, field, value in parse(expression)
+    )
+
+
+# --- Compiling ---
+
+def _casefold_isin(column, values):
+    """Vectorized case-insensitive isin; on a categorical only the categories are compared."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Missing values have code -1, which picks the trailing False
+        hits = np.append(column.cat.categories.astype(str).str.casefold().isin(values), False)
+        return hits[column.cat.codes.to_numpy()]
+    return column.astype(str).str.casefold().isin(values).to_numpy()
+
+
+def _between(values, bounds):
+    low, high = bounds
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def _contains(df, text):
+    mask = np.zeros(len(df), dtype=bool)
+    for column in FIELD_COLUMNS["text"]:
+        if column in df.columns:
+            mask |= df[column].astype(str).str.contains(text, case=False, regex=False).to_numpy()
+    return mask
+
+
+TESTS = {
+    "member": lambda df, value: _casefold_isin(df["team_member"], value),
+    "status": lambda df, value: _casefold_isin(df["status"], value),
+    "week": lambda df, value: _between(df["week"].to_numpy(dtype="int64"), value),
+    "age": lambda df, value: _between(analytics.task_ages(df), value),
+    "text": _contains,
+}
+
+
+def _applies(field, df):
+    columns = FIELD_COLUMNS[field]
+    if field == "text":
+        return any(c in df.columns for c in columns)
+    return all(c in df.columns for c in columns)
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def compile_filter(expression):
+    """Compile an expression into predicate(df) -> boolean numpy mask of the matching rows."""
+    terms = parse(expression)
+
+    def predicate(df):
+        mask = np.ones(len(df), dtype=bool)
+        for negated, field, value in terms:
+            if len(df) and _applies(field, df):
+                hit = TESTS[field](df, value)
+                mask &= ~hit if negated else hit
+        return mask
+
+    predicate.expression = normalize(expression)
+    return predicate
+
+
+def apply(df, expression, version=None):
+    """Return the rows of `df` matching `expression` (all of them for an empty one).
+
+    `version` is any hashable value that changes whenever the rows of `df` do,
+    e.g. the tasks file signature and the week shown. With a version, the
+    matching rows are cached; pass None for data with unsaved edits.
+    """
+    predicate = compile_filter(expression or "")
+    if not predicate.expression:
+        return df
+    if version is None:
+        return df[predicate(df)]
+    key = (predicate.expression, store.active_team(), version, len(df))
+    with _results_lock:
+        positions = _results.get(key)
+        if positions is not None:
+            _results.move_to_end(key)
+    metrics.cache("filter_results", positions is not None)
+    if positions is None:
+        positions = np.flatnonzero(predicate(df))
+        with _results_lock:
+            _results[key] = positions
+            while len(_results) > RESULT_CACHE_SIZE:
+                _results.popitem(last=False)
+    return df.iloc[positions]
+
+
+def cache_size():
+    """Return the number of cached results (hits and misses are counted in planner.metrics)."""
+    with _results_lock:
+        return len(_results)
+
+
+# --- Named views ---
+
+def load_views(team=None):
+    """Return the team's saved views as {name: expression}."""
+    return store.read_json(views_file(team), default={}).get("views", {})
+
+
+def save_view(name, expression, team=None):
+    """Save (or replace) a named view; raises ValueError for a missing name or an invalid expression."""
+    name = (name or "").strip()
+    if not name or name == NO_VIEW:
+        raise ValueError("Give the view a name")
+    parse(expression)
+    views = load_views(team)
+    views[name] = expression.strip()
+    store.write_json({"views": dict(sorted(views.items()))}, views_file(team))
+
+
+def delete_view(name, team=None):
+    views = load_views(team)
+    if views.pop(name, None) is not None:
+        store.write_json({"views": views}, views_file(team))
+
+
+# --- Filter bar ---
+
+def _set_param(name, value):
+    if value:
+        st.query_params[name] = value
+    elif name in st.query_params:
+        del st.query_params[name]
+
+
+def filter_bar(key, default="", url=True):
+    """Show the saved-view picker and the filter expression box, and return the expression to apply.
+
+    The filter starts from ?view= or ?filter= in the URL (when `url` is set),
+    else `default`, and is written back to the URL as it changes. An invalid
+    expression is reported and nothing is filtered.
+    """
+    views = load_views()
+    expression_key, view_key = f"{key}_filter", f"{key}_view"
+    pending = st.session_state.pop(f"{key}_pending_view", None)
+    if pending is not None:
+        st.session_state[view_key] = pending
+        st.session_state[expression_key] = views.get(pending, st.session_state.get(expression_key, ""))
+    if expression_key not in st.session_state:
+        view = st.query_params.get("view") if url else None
+        if view in views:
+            st.session_state[view_key], st.session_state[expression_key] = view, views[view]
+        else:
+            st.session_state[expression_key] = st.query_params.get("filter", default) if url else default
+    if st.session_state.get(view_key) not in views:
+        st.session_state[view_key] = NO_VIEW
+
+    def pick_view():
+        view = st.session_state[view_key]
+        if view in views:
+            st.session_state[expression_key] = views[view]
+
+    def edit_expression():
+        if views.get(st.session_state[view_key]) != st.session_state[expression_key]:
+            st.session_state[view_key] = NO_VIEW
+
+    col1, col2, col3 = st.columns([2, 5, 1], vertical_alignment="bottom")
+    with col1:
+        view = st.selectbox("View", options=[NO_VIEW, *views], key=view_key, on_change=pick_view)
+    with col2:
+        expression = st.text_input("Filter", key=expression_key, on_change=edit_expression,
+                                   placeholder="e.g. member:Alice status:open", help=SYNTAX_HELP)
+    with col3:
+        with st.popover("💾 Views", use_container_width=True):
+            name = st.text_input("Save this filter as", value="" if view == NO_VIEW else view, key=f"{key}_view_name")
+            if st.button("Save view", key=f"{key}_save_view"):
+                try:
+                    save_view(name, expression)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.session_state[f"{key}_pending_view"] = name.strip()
+                    st.rerun()
+            if view != NO_VIEW and st.button(f"🗑️ Delete view '{view}'", key=f"{key}_delete_view"):
+                delete_view(view)
+                st.session_state[f"{key}_pending_view"] = NO_VIEW
+                st.rerun()
+
+    if url:
+        _set_param("view", view if view != NO_VIEW else "")
+        _set_param("filter", expression.strip() if view == NO_VIEW else "")
+    try:
+        compile_filter(expression)
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+        return ""
+    return expression
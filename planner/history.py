@@ -0,0 +1,268 @@
+"""Append-only log of task status changes, with snapshots for fast reports.
+
+Week pages and the On Hold page append one row to status_events.csv for every
+task whose status changed when they save. Tasks are identified by their week
+and id ("<week>:<id>", "on_hold:<id>" for on-hold projects, see task_keys()):
+saves keep the ids of edited tasks, so a task keeps its history when it is
+renamed, and a copy carried over into a new week has a history of its own.
+
+Every SNAPSHOT_EVERY events the folded state of every task (current status,
+when it was created, started and finished, and the hours spent in each
+status) is written to status_snapshots/. Reports and "as of" queries start
+from the latest snapshot before the requested date and only replay the
+events logged after it.
+"""
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from planner import archive, store
+
+# Number of logged events between two snapshots
+SNAPSHOT_EVERY = 500
+
+
+def events_file(team=None):
+    return store.data_path("status_events.csv", team)
+
+
+def snapshot_dir(team=None):
+    return store.data_path("status_snapshots", team)
+
+
+EVENT_COLUMNS = ["timestamp", "source", "task_key", "week", "team_member", "label", "from_status", "to_status"]
+
+# Hours spent in each status are accumulated in these snapshot columns
+STATUS_HOURS = {
+    "To be started": "hours_to_be_started",
+    "In progress": "hours_in_progress",
+    "Done": "hours_done",
+}
+STATE_COLUMNS = [
+    "task_key", "source", "team_member", "label", "status", "status_since",
+    "created_at", "started_at", "done_at", *STATUS_HOURS.values(),
+]
+
+
+def task_keys(df, source):
+    """Key each task by its week and id, or by `source` and id in a table without weeks (on hold)."""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+    where = df["week"].astype("Int64").astype(str) if "week" in df.columns else source
+    return (where + ":" + df["id"].astype("Int64").astype(str)).astype(object)
+
+
+def status_changes(before, after, source, week=None, timestamp=None):
+    """Return the events for tasks whose status differs between two versions of a table.
+
+    New tasks are logged with an empty `from_status`, removed ones with an empty `to_status`.
+    """
+    timestamp = timestamp or datetime.now().isoformat(timespec="seconds")
+    old = before.assign(task_key=task_keys(before, source).values)
+    new = after.assign(task_key=task_keys(after, source).values)
+    old = old.drop_duplicates("task_key", keep="last").set_index("task_key")
+    new = new.drop_duplicates("task_key", keep="last").set_index("task_key")
+
+    merged = old[["team_member", "label", "status"]].astype(object).join(
+        new[["team_member", "label", "status"]].astype(object), how="outer", lsuffix="_old", rsuffix="_new"
+    )
+    from_status = merged["status_old"].fillna("")
+    to_status = merged["status_new"].fillna("")
+    changed = merged[from_status != to_status]
+    if changed.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    return pd.DataFrame({
+        "timestamp": timestamp,
+        "source": source,
+        "task_key": changed.index.values,
+        "week": week if week is not None else "",
+        "team_member": changed["team_member_new"].fillna(changed["team_member_old"]).values,
+        "label": changed["label_new"].fillna(changed["label_old"]).values,
+        "from_status": from_status[changed.index].values,
+        "to_status": to_status[changed.index].values,
+    })[EVENT_COLUMNS]
+
+
+def _manifest():
+    return store.read_json(snapshot_dir() / "manifest.json", default={"snapshots": []})
+
+
+def _read_events(offset=0):
+    """Read the events logged from a byte offset onwards."""
+    if not events_file().exists():
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    with open(events_file(), "rb") as f:
+        f.seek(offset)
+        if f.read(1) == b"":
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        f.seek(offset)
+        return pd.read_csv(f, names=EVENT_COLUMNS, header=0 if offset == 0 else None,
+                           dtype={"task_key": str, "week": "string"}, keep_default_na=False)
+
+
+# Appends and the snapshots they trigger: one at a time (autosave thread and page saves, and other processes)
+_lock = threading.Lock()
+
+
+def append_events(events):
+    """Append events to the log and take a snapshot when enough have accumulated."""
+    if events.empty:
+        return
+    with _lock, store.file_lock(events_file()):
+        is_new = not events_file().exists()
+        events.to_csv(events_file(), mode="a", header=is_new, index=False)
+
+        snapshots = _manifest()["snapshots"]
+        offset = snapshots[-1]["offset"] if snapshots else 0
+        if events_file().stat().st_size > offset and len(_read_events(offset)) >= SNAPSHOT_EVERY:
+            take_snapshot()
+
+
+def record_changes(before, after, source, week=None):
+    """Log the status changes between two versions of a task table."""
+    append_events(status_changes(before, after, source, week=week))
+
+
+def rekey_events(events):
+    """Migration keying events logged by content hash (before saves kept task ids) by week and id.
+
+    Hashes are matched with the tasks as they are now, archived ones included.
+    Events of a task deleted since keep its hash, under their week. Imports
+    were logged without a week: they go to the first week holding the task
+    (later ones hold its carried-over copies). The snapshots hold the old
+    keys, so they are dropped; the next ones replay the log from the start.
+    """
+    old = events["task_key"].str.fullmatch(r"\d+")
+    if not old.any():
+        return events
+    tasks = archive.with_archived(store.load_tasks())
+    on_hold = store.load_on_hold()
+    known = pd.concat([
+        pd.DataFrame({"where": tasks["week"].astype(str), "hash": store.task_keys(tasks).astype(str).values,
+                      "id": tasks["id"].astype(str)}),
+        pd.DataFrame({"where": "on_hold", "hash": store.task_keys(on_hold).astype(str).values,
+                      "id": on_hold["id"].astype(str)}),
+    ], ignore_index=True)
+    in_weeks = known[known["where"] != "on_hold"]
+    first_week = in_weeks.sort_values("where", key=lambda w: w.astype(int)).drop_duplicates("hash")
+    first_week = first_week.set_index("hash")["where"]
+    ids = known.drop_duplicates(["where", "hash"]).set_index(["where", "hash"])["id"]
+
+    logged = events[old]
+    where = logged["week"].mask(logged["source"] == "on_hold", "on_hold")
+    where = where.mask(where == "", logged["task_key"].map(first_week)).fillna(logged["source"])
+    task_id = ids.reindex(pd.MultiIndex.from_arrays([where, logged["task_key"]])).to_numpy()
+    task_id = pd.Series(task_id, index=logged.index).fillna(logged["task_key"])
+    events.loc[old, "task_key"] = where + ":" + task_id
+
+    for snapshot in _manifest()["snapshots"]:
+        (snapshot_dir() / snapshot["file"]).unlink(missing_ok=True)
+    if snapshot_dir().exists():
+        store.write_json({"snapshots": []}, snapshot_dir() / "manifest.json")
+    return events
+
+
+def _empty_state():
+    return pd.DataFrame(columns=STATE_COLUMNS)
+
+
+def _replay(state, events):
+    """Fold events into a state table (one row per task) and return the new state."""
+    if events.empty:
+        return state
+    tasks = {row["task_key"]: row for row in state.to_dict("records")}
+    for event in events.itertuples(index=False):
+        ts = event.timestamp
+        task = tasks.get(event.task_key)
+        if task is None:
+            task = {c: None for c in STATE_COLUMNS}
+            task.update({"task_key": event.task_key, "source": event.source, "created_at": ts, "status_since": ts})
+            task.update({c: 0.0 for c in STATUS_HOURS.values()})
+            tasks[event.task_key] = task
+        elif task["status"] in STATUS_HOURS:
+            elapsed = datetime.fromisoformat(ts) - datetime.fromisoformat(task["status_since"])
+            task[STATUS_HOURS[task["status"]]] += elapsed.total_seconds() / 3600
+
+        task["team_member"] = event.team_member
+        task["label"] = event.label
+        task["status"] = event.to_status or None
+        task["status_since"] = ts
+        if event.to_status == "In progress" and not task["started_at"]:
+            task["started_at"] = ts
+        if event.to_status == "Done":
+            task["done_at"] = ts
+        elif event.to_status:
+            task["done_at"] = None
+    return pd.DataFrame(list(tasks.values()), columns=STATE_COLUMNS)
+
+
+def _read_snapshot(entry):
+    state = pd.read_csv(snapshot_dir() / entry["file"], dtype={"task_key": str})
+    return state.astype(object).where(state.notna(), None)
+
+
+def take_snapshot():
+    """Write the current folded state of every task and register it in the manifest."""
+    manifest = _manifest()
+    snapshots = manifest["snapshots"]
+    if snapshots:
+        state = _read_snapshot(snapshots[-1])
+        events = _read_events(snapshots[-1]["offset"])
+    else:
+        state = _empty_state()
+        events = _read_events()
+    if events.empty:
+        return
+
+    state = _replay(state, events)
+    as_of = events["timestamp"].iloc[-1]
+    snapshot_dir().mkdir(exist_ok=True)
+    file_name = f"state_{len(snapshots) + 1:05d}.csv"
+    store.write_csv(state, snapshot_dir() / file_name)
+    snapshots.append({"file": file_name, "as_of": as_of, "offset": events_file().stat().st_size})
+    store.write_json(manifest, snapshot_dir() / "manifest.json")
+
+
+def state_as_of(as_of=None):
+    """Return every task's state at a point in time (default: now).
+
+    Starts from the latest snapshot taken before `as_of` and replays only the
+    events logged after it.
+    """
+    as_of = as_of.isoformat(timespec="seconds") if isinstance(as_of, datetime) else as_of
+    snapshots = _manifest()["snapshots"]
+    if as_of is not None:
+        snapshots = [s for s in snapshots if s["as_of"] <= as_of]
+
+    if snapshots:
+        state = _read_snapshot(snapshots[-1])
+        events = _read_events(snapshots[-1]["offset"])
+    else:
+        state = _empty_state()
+        events = _read_events()
+    if as_of is not None:
+        events = events[events["timestamp"] <= as_of]
+    state = _replay(state, events)
+    return state[state["status"].notna()].reset_index(drop=True)
+
+
+def time_in_status(state, as_of=None):
+    """Hours each task has spent in each status, including the time in its current status."""
+    as_of = pd.Timestamp(as_of or datetime.now())
+    report = state[["task_key", "source", "team_member", "label", "status", *STATUS_HOURS.values()]].copy()
+    ongoing = (as_of - pd.to_datetime(state["status_since"])).dt.total_seconds() / 3600
+    for status, column in STATUS_HOURS.items():
+        report[column] = report[column].astype(float) + ongoing.where(state["status"] == status, 0.0)
+    return report
+
+
+def cycle_times(state):
+    """Cycle time (started to done) and lead time (created to done) in days for finished tasks."""
+    done = state[state["status"] == "Done"].copy()
+    done_at = pd.to_datetime(done["done_at"])
+    started_at = pd.to_datetime(done["started_at"].fillna(done["created_at"]))
+    done["cycle_days"] = (done_at - started_at).dt.total_seconds() / 86400
+    done["lead_days"] = (done_at - pd.to_datetime(done["created_at"])).dt.total_seconds() / 86400
+    return done[["task_key", "source", "team_member", "label", "done_at", "cycle_days", "lead_days"]]
@@ -0,0 +1,192 @@
+"""iCalendar (.ics) feed of the support rota, for the whole team or one member.
+
+The feed is generated from daily_support.csv as a stream: the file is read in
+chunks and each chunk's events are yielded as soon as they are written, so a
+feed never holds more than one chunk in memory.
+
+serve() answers calendar clients from a small local HTTP server:
+
+    GET /<team>/support.ics
+    GET /<team>/support.ics?member=Alice
+
+Every response carries an ETag derived from the support file's signature
+(mtime, size, inode) and the member, so it is known without reading the file.
+A client that sends it back in If-None-Match gets a bodiless 304 until the
+schedule changes: polling an unchanged rota never reads the schedule.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import pandas as pd
+
+from planner import store
+
+CHUNK_SIZE = 5000
+# Bump when the generated events change, so clients don't keep a stale feed
+FEED_VERSION = 1
+
+ROLES = {"primary_support": "Primary support", "secondary_support": "Secondary support"}
+
+
+def feed_name(member=None):
+    return f"support_{member}.ics" if member else "support.ics"
+
+
+def content_disposition(member=None):
+    """Return the Content-Disposition of a feed: the file name in UTF-8 (RFC 5987), with an ASCII fallback.
+
+    Header values are sent as latin-1, so a member name outside it can't go in the plain filename.
+    """
+    name = feed_name(member)
+    fallback = "".join(c if c.isascii() and c not in '"\\' else "_" for c in name)
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+def etag(team=None, member=None):
+    """Return the ETag of a feed, or None if the team has no support schedule."""
+    signature = store.file_signature(store.support_file(team))
+    if signature is None:
+        return None
+    key = f"{FEED_VERSION}|{team or store.active_team()}|{member or ''}|{signature}"
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _escape(text):
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Split a content line into lines of at most 75 octets, as RFC 5545 requires."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        # Don't split a multi-byte character
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _events(chunk, team, member, stamp):
+    """Content lines of the events of one chunk of the support schedule."""
+    lines = []
+    days = pd.to_datetime(chunk["date"], errors="coerce")
+    for column, role in ROLES.items():
+        people = chunk[column]
+        mask = days.notna() & (people == member if member else people != "")
+        for day, person in zip(days[mask], people[mask]):
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{day:%Y%m%d}-{column}@{team}.planner",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+                f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+                "SUMMARY:" + _escape(role if member else f"{role}: {person}"),
+                "TRANSP:TRANSPARENT",
+                "END:VEVENT",
+            ]
+    return lines
+
+
+def iter_calendar(team=None, member=None):
+    """Yield the feed as UTF-8 byte chunks, one per chunk of the support file."""
+    team = team or store.active_team()
+    title = f"{store.team_name(team)} support" + (f" - {member}" if member else "")
+    header = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Team Weekly Planner//Support rota//EN",
+              "CALSCALE:GREGORIAN", "X-WR-CALNAME:" + _escape(title)]
+    yield "".join(_fold(line) for line in header).encode("utf-8")
+
+    path = store.support_file(team)
+    if path.exists():
+        # Stamped with the file's modification time, so a given ETag always means the same bytes
+        stamp = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE, dtype=str, keep_default_na=False):
+            lines = _events(chunk, team, member, stamp)
+            if lines:
+                yield "".join(_fold(line) for line in lines).encode("utf-8")
+    yield _fold("END:VCALENDAR").encode("utf-8")
+
+
+def write_calendar(output, team=None, member=None):
+    """Write a feed to a path or binary file object."""
+    if hasattr(output, "write"):
+        for part in iter_calendar(team, member):
+            output.write(part)
+    else:
+        with open(output, "wb") as f:
+            write_calendar(f, team, member)
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Serves /<team>/support.ics with ETag-based conditional responses."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _feed(self):
+        """Return (team, member) of the requested feed, or None after answering 404."""
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        team = parts[0] if len(parts) == 2 and parts[1] == "support.ics" else None
+        if team not in store.list_teams():
+            self.send_error(404, "Feeds are at /<team>/support.ics[?member=<name>]")
+            return None
+        member = parse_qs(url.query).get("member", [None])[0]
+        if member and member not in store.load_team(store.team_file(team)):
+            self.send_error(404, f"No member '{member}' in team '{team}'")
+            return None
+        return team, member
+
+    def _respond(self, body):
+        feed = self._feed()
+        if feed is None:
+            return
+        team, member = feed
+        tag = etag(team, member)
+        if tag and tag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar; charset=utf-8")
+        self.send_header("Content-Disposition", content_disposition(member))
+        self.send_header("Cache-Control", "no-cache")
+        if tag:
+            self.send_header("ETag", tag)
+        if not body:
+            self.end_headers()
+            return
+        # Stream the feed as it is generated
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for part in iter_calendar(team, member):
+            self.wfile.write(f"{len(part):X}\r\n".encode("ascii") + part + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8502):
+    """Serve the support feeds of every team until interrupted."""
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
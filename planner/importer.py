@@ -0,0 +1,220 @@
+"""Streaming import of tasks exported from other trackers (CSV or JSON Lines).
+
+Files are read CHUNK_SIZE rows at a time: each chunk is mapped onto the task
+columns, validated against the team roster and STATUS_OPTIONS, deduplicated
+against existing and archived tasks by a hash of week, member, label and
+description, and appended as one batch to a copy of the tasks file, which
+replaces it once every chunk is in. Memory use depends on the chunk size, not
+on the size of the file being imported.
+"""
+import os
+import shutil
+
+import pandas as pd
+
+from planner import archive, backup, history, store
+
+CHUNK_SIZE = 5000
+
+# Keep at most this many rejected rows (with their reason) for the report
+MAX_BAD_ROWS = 1000
+
+# Columns a source file can be mapped onto
+IMPORT_FIELDS = ["team_member", "label", "description", "status", "week"]
+REQUIRED_FIELDS = ["team_member", "label", "description"]
+
+
+def detect_format(file_name):
+    """Guess the file format from its extension."""
+    return "jsonl" if str(file_name).lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_chunks(source, fmt="csv", chunk_size=CHUNK_SIZE):
+    """Iterate over a CSV or JSON Lines file as DataFrames of at most `chunk_size` rows."""
+    if fmt == "jsonl":
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        reader = pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        yield chunk.fillna("").astype(str)
+
+
+def preview_columns(source, fmt="csv"):
+    """Return the column names of a file from its first few rows."""
+    chunk = next(read_chunks(source, fmt, chunk_size=20), pd.DataFrame())
+    return list(chunk.columns)
+
+
+def guess_mapping(columns):
+    """Map import fields to source columns with the same name (case-insensitive)."""
+    by_name = {c.strip().lower(): c for c in columns}
+    aliases = {
+        "team_member": ["team_member", "member", "assignee", "owner"],
+        "label": ["label", "title", "summary", "key"],
+        "description": ["description", "details", "body"],
+        "status": ["status", "state"],
+        "week": ["week", "week_num"],
+    }
+    mapping = {}
+    for field, names in aliases.items():
+        mapping[field] = next((by_name[n] for n in names if n in by_name), None)
+    return mapping
+
+
+def _map_chunk(chunk, mapping, defaults):
+    """Rename mapped source columns to task fields and fill unmapped fields with defaults."""
+    mapped = pd.DataFrame(index=chunk.index)
+    for field in IMPORT_FIELDS:
+        column = mapping.get(field)
+        if column:
+            mapped[field] = chunk[column].str.strip()
+        else:
+            mapped[field] = str(defaults.get(field, ""))
+    return mapped
+
+
+def _validate(mapped, members, statuses):
+    """Normalise members/statuses/weeks and return (valid rows, rejected rows with an error)."""
+    error = pd.Series("", index=mapped.index)
+
+    member = mapped["team_member"].str.lower().map(members)
+    error = error.mask((error == "") & member.isna(), "unknown team member")
+
+    status = mapped["status"].str.lower().map(statuses)
+    error = error.mask((error == "") & status.isna(), "unknown status")
+
+    week = pd.to_numeric(mapped["week"], errors="coerce")
+    error = error.mask((error == "") & ~(week.between(1, 52) & (week % 1 == 0)), "week must be 1-52")
+
+    for field in REQUIRED_FIELDS[1:]:
+        error = error.mask((error == "") & (mapped[field] == ""), f"missing {field}")
+
+    valid = error == ""
+    tasks = mapped[valid].assign(
+        team_member=member[valid],
+        status=status[valid],
+        week=week[valid].astype("int64"),
+    )
+    rejected = mapped[~valid].assign(error=error[~valid])
+    return tasks, rejected
+
+
+def _import_hashes(df):
+    """Hash week + member + label + description to detect tasks that already exist."""
+    cols = ["week", *store.TASK_KEY]
+    return pd.util.hash_pandas_object(df[cols].astype(str), index=False).values
+
+
+def _existing_state(path):
+    """Return (set of task hashes, max id) of the tasks file, read in chunks, and of the archive.
+
+    New ids start above the archived ones too (see planner.archive). Ids that
+    are missing or not numbers (e.g. after a hand edit) are ignored.
+    """
+    archived = archive.load_archive()
+    hashes = set(_import_hashes(archived).tolist()) if not archived.empty else set()
+    max_id = archive.max_id()
+    if not path.exists():
+        return hashes, max_id
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    if header != store.TASK_COLUMNS:
+        # Rewrite once in the standard layout (adds ids) so batches can be appended
+        store.write_csv(store.load_tasks(path)[store.TASK_COLUMNS], path)
+    for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+        if chunk.empty:
+            continue
+        hashes.update(_import_hashes(chunk).tolist())
+        ids = pd.to_numeric(chunk["id"], errors="coerce")
+        if ids.notna().any():
+            max_id = max(max_id, int(ids.max()))
+    return hashes, max_id
+
+
+def import_tasks(source, fmt="csv", mapping=None, defaults=None, chunk_size=CHUNK_SIZE, on_progress=None):
+    """Stream tasks from `source` into the tasks file.
+
+    `mapping` maps each import field to a source column (None to use the
+    default from `defaults`). `on_progress(report)` is called after each chunk.
+    Returns a report dict with row counts, the weeks touched and a sample of
+    rejected rows.
+    """
+    tasks_file = store.tasks_file()
+    backup.take_snapshot("before import")
+    # Saves wait for the import: it replaces the whole file at the end
+    with store.file_lock(tasks_file):
+        staged = _stage(tasks_file)
+        try:
+            report, imported = _import_chunks(source, fmt, mapping, defaults, chunk_size, on_progress, staged)
+            if imported:
+                os.replace(staged, tasks_file)
+        finally:
+            staged.unlink(missing_ok=True)
+    if imported:
+        new_tasks = pd.concat(imported, ignore_index=True)
+        history.record_changes(new_tasks.iloc[0:0], new_tasks, "import")
+
+    report["weeks"] = sorted(report["weeks"])
+    backup.take_snapshot("import")
+    return report
+
+
+def _stage(tasks_file):
+    """Copy the tasks file to a temporary file the batches are appended to, ending it with a newline."""
+    staged = store.tmp_path(tasks_file)
+    if not tasks_file.exists():
+        staged.unlink(missing_ok=True)
+        return staged
+    shutil.copyfile(tasks_file, staged)
+    with open(staged, "rb+") as f:
+        # A file saved without a final newline would get the first batch glued to its last row
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return staged
+
+
+def _import_chunks(source, fmt, mapping, defaults, chunk_size, on_progress, staged):
+    """Append the new tasks of each chunk to `staged` and return (report, imported batches)."""
+    defaults = {"status": "To be started", "week": 1, **(defaults or {})}
+    members = {m.lower(): m for m in store.load_team()}
+    statuses = {s.lower(): s for s in store.STATUS_OPTIONS}
+    hashes, max_id = _existing_state(staged)
+    write_header = not staged.exists()
+
+    imported = []
+    report = {"rows_read": 0, "imported": 0, "duplicates": 0, "rejected": 0, "weeks": set(), "bad_rows": []}
+    line_offset = 2 if fmt == "csv" else 1
+    for chunk in read_chunks(source, fmt, chunk_size):
+        if mapping is None:
+            mapping = guess_mapping(chunk.columns)
+        mapped = _map_chunk(chunk, mapping, defaults)
+        tasks, rejected = _validate(mapped, members, statuses)
+
+        # Drop duplicates of existing tasks and of rows earlier in the file
+        task_hashes = _import_hashes(tasks)
+        is_new = ~pd.Series(task_hashes).isin(hashes).values & ~pd.Series(task_hashes).duplicated().values
+        hashes.update(task_hashes[is_new].tolist())
+        new_tasks = tasks[is_new]
+
+        if not new_tasks.empty:
+            new_tasks = new_tasks.assign(id=range(max_id + 1, max_id + 1 + len(new_tasks)))[store.TASK_COLUMNS]
+            max_id += len(new_tasks)
+            new_tasks.to_csv(staged, mode="a", header=write_header, index=False)
+            write_header = False
+            imported.append(new_tasks)
+            report["weeks"].update(new_tasks["week"].unique().tolist())
+
+        if not rejected.empty and len(report["bad_rows"]) < MAX_BAD_ROWS:
+            sample = rejected.head(MAX_BAD_ROWS - len(report["bad_rows"]))
+            lines = sample.index + line_offset
+            report["bad_rows"].extend(sample.assign(line=lines).to_dict("records"))
+
+        report["rows_read"] += len(chunk)
+        report["imported"] += len(new_tasks)
+        report["duplicates"] += len(tasks) - len(new_tasks)
+        report["rejected"] += len(rejected)
+        if on_progress:
+            on_progress(report)
+    return report, imported
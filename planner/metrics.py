@@ -0,0 +1,211 @@
+"""Operational metrics of the running planner, in the Prometheus text format.
+
+The app process counts what it does: page reruns, partition loads, saves
+(manual and autosave), save conflicts, report and export generation, and the
+hits and misses of its caches. Durations go into histograms with fixed buckets.
+Recording a value is a dictionary update under a lock, so instrumenting a
+rerun costs a few microseconds.
+
+Gauges (data file sizes and row counts per team, active sessions, queued
+autosaves) are computed only when the metrics are scraped, by collectors that
+the modules owning the data register with gauge().
+
+start_server() serves the metrics at http://127.0.0.1:9464/metrics from a
+background thread of the app process (started by the first page rerun, see
+sync.startup). Set PLANNER_METRICS_PORT to use another port, or to 0 to
+turn the endpoint off; it only listens on PLANNER_METRICS_HOST (default
+127.0.0.1). This module has no Streamlit dependency.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = os.environ.get("PLANNER_METRICS_HOST", "127.0.0.1")
+PORT = int(os.environ.get("PLANNER_METRICS_PORT", "9464"))
+
+# Histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A session counts as active if it reran within this many seconds
+SESSION_TIMEOUT = 300
+
+COUNTERS = {
+    "planner_reruns_total": "Page reruns, by page.",
+    "planner_save_conflicts_total": "Saves refused because what they change was changed elsewhere since the session loaded it, by table.",
+    "planner_external_reloads_total": "Partitions reloaded because another session or process changed them, by table.",
+    "planner_autosave_errors_total": "Failed autosave writes (retried), by table.",
+    "planner_cache_requests_total": "Cache lookups, by cache and result (hit or miss).",
+}
+
+HISTOGRAMS = {
+    "planner_rerun_duration_seconds": "Time to run a page script, by page.",
+    "planner_data_load_duration_seconds": "Time to load a data partition into a session, by table.",
+    "planner_save_duration_seconds": "Time to save a data partition, by table and mode (manual or autosave).",
+    "planner_report_duration_seconds": "Time to generate a report or export, by kind.",
+}
+
+_lock = threading.Lock()
+_counters = {}     # (name, labels) -> value
+_histograms = {}   # (name, labels) -> [count per bucket..., count above the last bucket, sum]
+_gauges = {}       # name -> (help, [collector...])
+_sessions = {}     # session id -> time.monotonic() of its last rerun
+_server = None
+
+_log = logging.getLogger(__name__)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add `amount` to a counter."""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    """Record a duration in a histogram."""
+    key = (name, _labels(labels))
+    with _lock:
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        values[bisect.bisect_left(BUCKETS, seconds)] += 1
+        values[-1] += seconds
+
+
+@contextmanager
+def timer(name, **labels):
+    """Record the duration of a `with` block in a histogram (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def cache(name, hit):
+    """Count a lookup of a cache."""
+    inc("planner_cache_requests_total", cache=name, result="hit" if hit else "miss")
+
+
+def seen_session(session_id):
+    """Note that a session reran, for the active sessions gauge."""
+    with _lock:
+        _sessions[session_id] = time.monotonic()
+
+
+def gauge(name, help_text):
+    """Register a collector of a gauge: a function returning {((label, value), ...): sample}.
+
+    Several collectors can contribute samples to the same gauge.
+    """
+    def register(collector):
+        with _lock:
+            _gauges.setdefault(name, (help_text, []))[1].append(collector)
+        return collector
+    return register
+
+
+@gauge("planner_sessions", "Sessions that reran a page in the last SESSION_TIMEOUT seconds.")
+def _active_sessions():
+    # render() calls collectors outside the lock, so taking it here is safe
+    cutoff = time.monotonic() - SESSION_TIMEOUT
+    with _lock:
+        for session_id, last in list(_sessions.items()):
+            if last < cutoff:
+                del _sessions[session_id]
+        return {(): len(_sessions)}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format(name, labels, value, extra=()):
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in (*labels, *extra))
+    return f"{name}{{{pairs}}} {_number(value)}" if pairs else f"{name} {_number(value)}"
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        gauges = {name: (help_text, list(collectors)) for name, (help_text, collectors) in _gauges.items()}
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [_format(name, labels, value) for (metric, labels), value in sorted(counters.items()) if metric == name]
+    for name, help_text in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), values):
+                cumulative += count
+                lines.append(_format(f"{name}_bucket", labels, cumulative, [("le", bound if bound == "+Inf" else repr(bound))]))
+            lines.append(_format(f"{name}_count", labels, cumulative))
+            lines.append(_format(f"{name}_sum", labels, values[-1]))
+    for name, (help_text, collectors) in sorted(gauges.items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for collector in collectors:
+            try:
+                samples = collector()
+            except Exception:
+                # A broken collector must not take the other metrics down
+                _log.exception("Metrics collector %s failed", collector.__name__)
+                continue
+            lines += [_format(name, labels, value) for labels, value in sorted(samples.items())]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics returns render(); anything else is a 404."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404, "Metrics are at /metrics")
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app's console
+        pass
+
+
+def start_server(host=HOST, port=PORT):
+    """Serve /metrics from a background thread, once per process. Returns the port, or None if not serving."""
+    global _server
+    if not port:
+        return None
+    if _server is not None:
+        return _server.server_address[1] if _server else None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                # E.g. another app process already serves its metrics on this port
+                _log.warning("Metrics endpoint not started on %s:%s: %s", host, port, e)
+                _server = False
+            else:
+                threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server.server_address[1] if _server else None
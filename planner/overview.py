@@ -0,0 +1,50 @@
+"""Year-at-a-glance matrix: weeks x team members.
+
+Task counts come from the materialized weekly aggregates (see analytics), support
+days from the schedule. Both are stacked into one long (week, member, measure,
+count) table and turned into the grid with a single pivot.
+"""
+import pandas as pd
+
+from planner import store
+
+SUPPORT_MEASURE = "Support days"
+MEASURES = [*store.STATUS_OPTIONS, SUPPORT_MEASURE]
+
+
+def support_weeks(support, year):
+    """Support days per week and member (primary and secondary both count)."""
+    if support.empty:
+        return pd.DataFrame(columns=["week", "team_member", "measure", "count"])
+    # ISO weeks, as store.week_dates(); days in another year's weeks are left out below
+    iso = pd.to_datetime(support["date"]).dt.isocalendar()
+    weeks = iso["week"].where(iso["year"] == year, 0).astype("int64")
+    assigned = pd.concat([
+        pd.DataFrame({"week": weeks.values, "team_member": support[role].values})
+        for role in ["primary_support", "secondary_support"]
+    ], ignore_index=True)
+    assigned = assigned[assigned["team_member"].notna() & (assigned["team_member"].astype(str) != "")]
+    assigned = assigned[(assigned["week"] >= 1) & (assigned["week"] <= 53)]
+    counts = assigned.groupby(["week", "team_member"], observed=True).size().rename("count").reset_index()
+    return counts.assign(measure=SUPPORT_MEASURE)
+
+
+def year_matrix(stats, support, year):
+    """Return a weeks x (member, measure) grid of task counts by status and support days."""
+    tasks = stats[["week", "team_member", "status", "tasks"]].rename(columns={"status": "measure", "tasks": "count"})
+    parts = [part for part in (tasks, support_weeks(support, year)) if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    long = pd.concat(parts, ignore_index=True)
+    long["team_member"] = long["team_member"].astype(str)
+    long["week"] = long["week"].astype(int)
+    grid = long.pivot_table(index="week", columns=["team_member", "measure"], values="count", aggfunc="sum", fill_value=0)
+    return grid.astype(int)
+
+
+def on_hold_counts(on_hold):
+    """Open on-hold projects per member."""
+    if on_hold.empty:
+        return {}
+    open_projects = on_hold[on_hold["status"] != "Done"]
+    return open_projects["team_member"].astype(str).value_counts().to_dict()
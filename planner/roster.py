@@ -0,0 +1,223 @@
+"""Team roster with stable member ids, and renames, merges and removals applied everywhere.
+
+team_members.csv gives every member an id that never changes. The other data
+files store member names, so renaming or merging a member rewrites every file
+that mentions them. Each member column is remapped in one vectorized pass over
+its category codes, however many years of data it holds.
+
+All rewritten files are swapped in together: they are written next to the
+originals, listed in a journal, then renamed into place. If the process stops
+half-way, recover() (run on the next page load) finishes the swap from the
+journal, so a change is applied to every file or to none. Changes and
+recovery hold a lock, so one session never swaps or deletes the files another
+is staging; without a journal, recover() only deletes staged files older than
+STALE_SECONDS (left by a process that stopped before journaling them).
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from planner import backup, store
+
+# Member name columns of each data file
+MEMBER_COLUMNS = {
+    "weekly_tasks.csv": ["team_member"],
+    "daily_support.csv": ["primary_support", "secondary_support"],
+    "on_hold.csv": ["team_member"],
+    "leave.csv": ["team_member"],
+    "tasks_archive.csv.gz": ["team_member"],
+}
+
+# Staged files without a journal are deleted once they are this old
+STALE_SECONDS = 3600
+
+# Serialises roster changes and recovery between sessions
+_lock = threading.Lock()
+
+
+def journal_file(team=None):
+    return store.data_path("roster_journal.json", team)
+
+
+def load_roster(team=None):
+    """Return the roster as a DataFrame of member ids and names."""
+    return pd.read_csv(store.team_file(team), dtype={"name": str})[["id", "name"]]
+
+
+def _read(name):
+    """Read a data file as text, so columns the change doesn't touch are written back unchanged."""
+    path = store.data_path(name)
+    if not path.exists():
+        return None
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _remap(series, mapping):
+    """Rename values through the column's categories, in one pass over the codes."""
+    series = series.astype("category")
+    renamed = pd.Index([mapping.get(c, c) for c in series.cat.categories])
+    merged = renamed.unique()
+    lookup = merged.get_indexer(renamed)
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, lookup[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, merged), index=series.index)
+
+
+def _commit(frames, reason):
+    """Replace several data files at once (see the module docstring)."""
+    backup.take_snapshot(f"before {reason}")
+    with _lock:
+        staged = {}
+        for name, df in frames.items():
+            path = store.data_path(name)
+            tmp_file = path.with_name(path.name + ".roster")
+            df.to_csv(tmp_file, index=False, compression="gzip" if name.endswith(".gz") else None)
+            staged[name] = tmp_file.name
+        store.write_json({"reason": reason, "files": staged}, journal_file())
+        _replay(store.active_team())
+    backup.take_snapshot(reason)
+
+
+def _replay(team):
+    """Rename the journaled files into place, or delete stale staged files if there is no journal."""
+    journal = store.read_json(journal_file(team))
+    if journal is None:
+        cutoff = time.time() - STALE_SECONDS
+        for tmp_file in store.team_dir(team).glob("*.roster"):
+            try:
+                if tmp_file.stat().st_mtime < cutoff:
+                    tmp_file.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+        return False
+    for name, tmp_name in journal["files"].items():
+        tmp_file = store.data_path(tmp_name, team)
+        if tmp_file.exists():
+            os.replace(tmp_file, store.data_path(name, team))
+    journal_file(team).unlink(missing_ok=True)
+    return True
+
+
+def recover(team=None):
+    """Finish a roster change that was interrupted, or clear one that never got journaled.
+
+    Returns True if a journaled change was finished.
+    """
+    with _lock:
+        return _replay(team or store.active_team())
+
+
+def _rename_everywhere(mapping, roster, reason):
+    """Apply a name mapping to the roster and every member column, and return rows changed per file."""
+    frames, changed = {"team_members.csv": roster}, {}
+    for name, columns in MEMBER_COLUMNS.items():
+        df = _read(name)
+        if df is None:
+            continue
+        touched = np.zeros(len(df), dtype=bool)
+        for column in columns:
+            touched |= df[column].isin(list(mapping)).to_numpy()
+            df[column] = _remap(df[column], mapping)
+        if touched.any():
+            frames[name] = df
+            changed[name] = int(touched.sum())
+    _commit(frames, reason)
+    return changed
+
+
+def _member(roster, member_id):
+    match = roster[roster["id"] == member_id]
+    if match.empty:
+        raise ValueError(f"No member with id {member_id}")
+    return match.iloc[0]["name"]
+
+
+def add_member(name):
+    """Add a member to the active team's roster and return their id."""
+    name = name.strip()
+    roster = load_roster()
+    if not name or name in set(roster["name"]):
+        raise ValueError(f"'{name}' is already in the team or is not a valid name")
+    member_id = int(roster["id"].max()) + 1 if not roster.empty else 1
+    roster = pd.concat([roster, pd.DataFrame({"id": [member_id], "name": [name]})], ignore_index=True)
+    store.write_csv(roster, store.team_file())
+    backup.take_snapshot(f"added {name}")
+    return member_id
+
+
+def rename_member(member_id, new_name):
+    """Rename a member in the roster and in every data file. Returns rows changed per file."""
+    new_name = new_name.strip()
+    roster = load_roster()
+    old_name = _member(roster, member_id)
+    if not new_name or new_name in set(roster["name"]) - {old_name}:
+        raise ValueError(f"'{new_name}' is already in the team (merge the members instead) or is not a valid name")
+    roster.loc[roster["id"] == member_id, "name"] = new_name
+    return _rename_everywhere({old_name: new_name}, roster, f"renamed {old_name} to {new_name}")
+
+
+def merge_members(source_id, target_id):
+    """Give everything of one member to another and drop the first from the roster. Returns rows changed per file."""
+    roster = load_roster()
+    source, target = _member(roster, source_id), _member(roster, target_id)
+    if source_id == target_id:
+        raise ValueError("Pick two different members to merge")
+    roster = roster[roster["id"] != source_id]
+    return _rename_everywhere({source: target}, roster, f"merged {source} into {target}")
+
+
+def remove_member(member_id, reassign_to=None, from_week=1, from_date=None):
+    """Remove a member from the roster, optionally handing over their open work.
+
+    With `reassign_to`, their tasks that aren't Done from `from_week` on, their
+    open on-hold projects and their support days from `from_date` on go to
+    that member. Finished work and past days keep the name. Returns rows
+    changed per file.
+    """
+    roster = load_roster()
+    name = _member(roster, member_id)
+    new_owner = _member(roster, reassign_to) if reassign_to is not None else None
+    roster = roster[roster["id"] != member_id]
+    frames, changed = {"team_members.csv": roster}, {}
+    if new_owner is not None:
+        tasks = _read("weekly_tasks.csv")
+        if tasks is not None:
+            mask = (tasks["team_member"] == name) & (tasks["status"] != "Done") & (pd.to_numeric(tasks["week"]) >= from_week)
+            tasks.loc[mask, "team_member"] = new_owner
+            frames["weekly_tasks.csv"], changed["weekly_tasks.csv"] = tasks, int(mask.sum())
+
+        on_hold = _read("on_hold.csv")
+        if on_hold is not None:
+            mask = (on_hold["team_member"] == name) & (on_hold["status"] != "Done")
+            on_hold.loc[mask, "team_member"] = new_owner
+            frames["on_hold.csv"], changed["on_hold.csv"] = on_hold, int(mask.sum())
+
+        support = _read("daily_support.csv")
+        if support is not None:
+            upcoming = support["date"] >= pd.Timestamp(from_date or pd.Timestamp.today()).strftime("%Y-%m-%d")
+            touched = np.zeros(len(support), dtype=bool)
+            for column in MEMBER_COLUMNS["daily_support.csv"]:
+                mask = upcoming & (support[column] == name)
+                support.loc[mask, column] = new_owner
+                touched |= mask.to_numpy()
+            frames["daily_support.csv"], changed["daily_support.csv"] = support, int(touched.sum())
+    _commit(frames, f"removed {name}" + (f", work handed to {new_owner}" if new_owner else ""))
+    return changed
+
+
+def member_load(team_members, from_week=1, from_date=None):
+    """Open tasks, open on-hold projects and upcoming support days per member, for the roster table."""
+    tasks = store.load_tasks()
+    on_hold = store.load_on_hold()
+    support = store.load_support()
+    open_tasks = tasks.loc[(tasks["status"] != "Done") & (tasks["week"] >= from_week), "team_member"]
+    upcoming = support[support["date"] >= pd.Timestamp(from_date or pd.Timestamp.today().normalize())]
+    support_days = pd.concat([upcoming[c].astype(object) for c in MEMBER_COLUMNS["daily_support.csv"]])
+    return pd.DataFrame({
+        "Open tasks": open_tasks.astype(object).value_counts(),
+        "On hold": on_hold.loc[on_hold["status"] != "Done", "team_member"].astype(object).value_counts(),
+        "Upcoming support days": support_days.value_counts(),
+    }).reindex(team_members).fillna(0).astype(int)
@@ -0,0 +1,173 @@
+"""Automatic fair support rota.
+
+Days are filled in date order. For each role (primary, secondary) a heap
+keeps members ordered by how many days they have covered in that role and
+how long ago they last did, so the next pick is always the least-loaded,
+longest-rested member. Members who are unavailable that day, already on
+duty in the other role, or who would exceed the consecutive-day limit are
+skipped and put back on the heap.
+"""
+import heapq
+from datetime import timedelta
+
+import pandas as pd
+
+ROLES = ["primary_support", "secondary_support"]
+
+
+def weekdays(start, end):
+    """Return the Monday-Friday dates from start to end (inclusive)."""
+    days = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def expand_unavailability(periods):
+    """Turn (member, start, end) periods into {member: set of unavailable dates}."""
+    unavailable = {}
+    for member, start, end in periods:
+        if not member or pd.isna(start) or pd.isna(end):
+            continue
+        start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        unavailable.setdefault(member, set()).update(
+            start + timedelta(days=i) for i in range((end - start).days + 1)
+        )
+    return unavailable
+
+
+def schedule_rota(days, members, unavailable=None, pinned=None, max_consecutive=2, prior_counts=None):
+    """Assign a primary and a secondary support member to every day.
+
+    - `unavailable`: {member: set of dates} the member can't be scheduled on.
+    - `pinned`: {date: (primary, secondary)} days to keep as they are.
+    - `max_consecutive`: maximum number of consecutive scheduled days on duty.
+    - `prior_counts`: {role: {member: days}} already covered outside `days`,
+      so fairness is balanced across the whole schedule.
+
+    Returns (schedule DataFrame with date/primary_support/secondary_support,
+    list of dates where a role couldn't be filled).
+    """
+    unavailable = unavailable or {}
+    pinned = pinned or {}
+    days = sorted(days)
+
+    counts = {role: dict.fromkeys(members, 0) for role in ROLES}
+    for role in ROLES:
+        for member, n in (prior_counts or {}).get(role, {}).items():
+            if member in counts[role]:
+                counts[role][member] += int(n)
+    for assignment in pinned.values():
+        for role, member in zip(ROLES, assignment):
+            if member in counts[role]:
+                counts[role][member] += 1
+
+    # Heap entries are (days covered, index of last day in this role, member);
+    # an entry is stale once the member's count or last day has moved on
+    last_in_role = {role: dict.fromkeys(members, -1) for role in ROLES}
+    heaps = {role: [(counts[role][m], -1, m) for m in members] for role in ROLES}
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    last_on_duty = {}
+    streak = {}
+
+    def is_fresh(role, entry):
+        n, last, member = entry
+        return counts[role][member] == n and last_in_role[role][member] == last
+
+    def can_work(member, index, day, taken):
+        if member in taken or day in unavailable.get(member, ()):
+            return False
+        return not (last_on_duty.get(member) == index - 1 and streak.get(member, 0) >= max_consecutive)
+
+    def go_on_duty(role, member, index, counted):
+        if member not in counts[role]:
+            return
+        if not counted:
+            counts[role][member] += 1
+        last_in_role[role][member] = index
+        heapq.heappush(heaps[role], (counts[role][member], index, member))
+        streak[member] = streak.get(member, 0) + 1 if last_on_duty.get(member) == index - 1 else 1
+        last_on_duty[member] = index
+
+    def pick(role, index, day, taken):
+        heap = heaps[role]
+        skipped = []
+        chosen = None
+        while heap:
+            entry = heapq.heappop(heap)
+            if not is_fresh(role, entry):
+                continue
+            if can_work(entry[2], index, day, taken):
+                chosen = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    rows = []
+    unfilled = []
+    for index, day in enumerate(days):
+        if day in pinned:
+            assignment = pinned[day]
+            for role, member in zip(ROLES, assignment):
+                if member:
+                    go_on_duty(role, member, index, counted=True)
+            rows.append((day, *assignment))
+            continue
+
+        taken = set()
+        assignment = []
+        for role in ROLES:
+            member = pick(role, index, day, taken)
+            if member is None:
+                unfilled.append(day)
+                assignment.append("")
+                continue
+            taken.add(member)
+            go_on_duty(role, member, index, counted=False)
+            assignment.append(member)
+        rows.append((day, *assignment))
+
+    schedule = pd.DataFrame(rows, columns=["date", *ROLES])
+    schedule["date"] = pd.to_datetime(schedule["date"])
+    return schedule, sorted(set(unfilled))
+
+
+def role_counts(schedule_df):
+    """Return {role: {member: days}} for an existing schedule."""
+    counts = {}
+    for role in ROLES:
+        role_days = schedule_df[role].value_counts()
+        counts[role] = role_days[(role_days > 0) & (role_days.index != "")].to_dict()
+    return counts
+
+
+def pinned_days(schedule_df, days):
+    """Return {date: (primary, secondary)} for the given days that already have someone assigned."""
+    wanted = {pd.Timestamp(d): d for d in days}
+    pinned = {}
+    for row in schedule_df[schedule_df["date"].isin(list(wanted))].itertuples(index=False):
+        primary = row.primary_support if pd.notna(row.primary_support) else ""
+        secondary = row.secondary_support if pd.notna(row.secondary_support) else ""
+        if primary or secondary:
+            pinned[wanted[row.date]] = (primary, secondary)
+    return pinned
+
+
+def fill_range(schedule_df, start, end, members, unavailable=None, max_consecutive=2, keep_existing=True, balance_with_rest=True):
+    """Auto-schedule start..end into an existing schedule and return (new schedule, unfilled dates)."""
+    days = weekdays(start, end)
+    in_range = schedule_df["date"].isin(pd.to_datetime(days))
+
+    pinned = pinned_days(schedule_df, days) if keep_existing else {}
+    prior_counts = role_counts(schedule_df[~in_range]) if balance_with_rest else None
+    new_days, unfilled = schedule_rota(days, members, unavailable, pinned, max_consecutive, prior_counts)
+
+    merged = pd.concat([schedule_df[~in_range], new_days], ignore_index=True)
+    return merged.sort_values("date").reset_index(drop=True), unfilled
@@ -0,0 +1,233 @@
+"""Versioned schema of the data files, with one-time migrations.
+
+SCHEMAS lists every data file with its columns and the migrations that bring
+an older file up to date; a file's current version is its number of
+migrations. schema.json in each team's data directory records the version
+each file was last migrated to, so migrations run once per file, not on
+every load, and the loaders can trust what they read.
+
+Migrations are idempotent: running one on a file that is already up to date
+changes nothing. Restoring a file from a backup resets its version (see
+invalidate()) so it is migrated again. Only files that exist get a version:
+a file created later is checked by the next migration run.
+
+Rows a migration can't keep (no valid week number, unreadable dates,
+duplicates) are not lost: they are appended as read, with the migration that
+dropped them, to <file>.rejected.csv next to the file (see rejected()).
+"""
+import threading
+
+import pandas as pd
+
+from planner import availability, backup, history, store
+
+
+def schema_file(team=None):
+    return store.data_path("schema.json", team)
+
+
+def _with_columns(columns):
+    """Migration adding missing columns (empty) and putting them in order."""
+    def migrate(df):
+        for column in columns:
+            if column not in df.columns:
+                df[column] = ""
+        return df[columns]
+    return migrate
+
+
+def _add_ids(df):
+    """Number the rows that have no id after the highest existing id."""
+    ids = pd.to_numeric(df["id"], errors="coerce")
+    missing = ids.isna()
+    if missing.any():
+        start = int(ids.max()) + 1 if ids.notna().any() else 1
+        ids[missing] = range(start, start + int(missing.sum()))
+    return df.assign(id=ids.astype("int64"))
+
+
+def _valid_weeks(df):
+    """Keep the rows whose week is a whole number (the others are set aside by migrate())."""
+    week = pd.to_numeric(df["week"], errors="coerce")
+    keep = week.notna() & (week == week.round())
+    return df[keep].assign(week=week[keep].astype("int64"))
+
+
+def _dates(*columns, drop_duplicates=None):
+    """Migration rewriting date columns as YYYY-MM-DD, dropping rows whose dates can't be read."""
+    def migrate(df):
+        for column in columns:
+            parsed = pd.to_datetime(df[column].str.strip(), format="mixed", errors="coerce")
+            df = df[parsed.notna()].assign(**{column: parsed[parsed.notna()].dt.strftime("%Y-%m-%d")})
+        if drop_duplicates:
+            df = df.drop_duplicates(drop_duplicates, keep="last").sort_values(drop_duplicates)
+        return df
+    return migrate
+
+
+def _strip(*columns):
+    """Migration trimming whitespace around names and statuses."""
+    def migrate(df):
+        return df.assign(**{column: df[column].str.strip() for column in columns})
+    return migrate
+
+
+def _unique_names(df):
+    return df[df["name"] != ""].drop_duplicates("name")
+
+
+def _member_ids(df):
+    """Give every member a stable id (see planner.roster)."""
+    return _add_ids(_with_columns(["id", "name"])(df))
+
+
+# Columns and migrations of each data file, oldest migration first. Only append:
+# a file's version is the number of migrations already applied to it.
+SCHEMAS = {
+    "weekly_tasks.csv": {
+        "columns": store.TASK_COLUMNS,
+        "migrations": [
+            ("add missing columns", _with_columns(store.TASK_COLUMNS)),
+            ("give every task an id", _add_ids),
+            ("set aside tasks without a valid week number", _valid_weeks),
+            ("trim member names and statuses", _strip("team_member", "status")),
+        ],
+    },
+    "daily_support.csv": {
+        "columns": store.SUPPORT_COLUMNS,
+        "migrations": [
+            ("add missing columns", _with_columns(store.SUPPORT_COLUMNS)),
+            ("write dates as YYYY-MM-DD, one row per day", _dates("date", drop_duplicates="date")),
+            ("trim member names", _strip("primary_support", "secondary_support")),
+        ],
+    },
+    "on_hold.csv": {
+        "columns": store.ON_HOLD_COLUMNS,
+        "migrations": [
+            ("add missing columns", _with_columns(store.ON_HOLD_COLUMNS)),
+            ("give every project an id", _add_ids),
+            ("trim member names and statuses", _strip("team_member", "status")),
+        ],
+    },
+    "team_members.csv": {
+        "columns": ["id", "name"],
+        "migrations": [
+            ("trim names", _strip("name")),
+            ("drop blank and duplicate names", _unique_names),
+            ("give every member an id", _member_ids),
+        ],
+    },
+    "leave.csv": {
+        "columns": availability.LEAVE_COLUMNS,
+        "migrations": [
+            ("add missing columns", _with_columns(availability.LEAVE_COLUMNS)),
+            ("write dates as YYYY-MM-DD", _dates("start", "end")),
+        ],
+    },
+    # After the task files: the migration matches the events with the tasks
+    "status_events.csv": {
+        "columns": history.EVENT_COLUMNS,
+        "migrations": [
+            ("key events by week and task id", history.rekey_events),
+        ],
+    },
+}
+
+
+def rejected(team=None):
+    """Return {file name: number of rows set aside by migrations (see store.rejects_file())} for a team."""
+    counts = {}
+    for name in SCHEMAS:
+        path = store.rejects_file(name, team)
+        if path.exists():
+            counts[name] = len(pd.read_csv(path, dtype=str, usecols=["reason"]))
+    return counts
+
+
+def current_version(name):
+    return len(SCHEMAS[name]["migrations"])
+
+
+def _versions(team=None):
+    return store.read_json(schema_file(team), default={})
+
+
+def pending(team=None):
+    """Return {file name: [descriptions of the migrations it still needs]} for a team."""
+    versions = _versions(team)
+    todo = {}
+    for name, spec in SCHEMAS.items():
+        if not store.data_path(name, team).exists():
+            continue
+        steps = spec["migrations"][versions.get(name, 0):]
+        if steps:
+            todo[name] = [description for description, _ in steps]
+    return todo
+
+
+def migrate(team=None):
+    """Run the pending migrations of a team's files and return {file name: descriptions of what ran}.
+
+    The files are snapshotted first, so a migration can be rolled back from the Backups page.
+    """
+    team = team or store.active_team()
+    versions = _versions(team)
+    todo = pending(team)
+    if todo:
+        previous_team = store.active_team()
+        store.use_team(team)
+        try:
+            backup.take_snapshot("before migration")
+            for name in todo:
+                path = store.data_path(name, team)
+                try:
+                    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+                except pd.errors.EmptyDataError:
+                    df = pd.DataFrame(columns=SCHEMAS[name]["columns"])
+                dropped = []
+                for description, step in SCHEMAS[name]["migrations"][versions.get(name, 0):]:
+                    migrated = step(df)
+                    dropped.append(df[~df.index.isin(migrated.index)].assign(reason=description))
+                    df = migrated
+                dropped = pd.concat(dropped, ignore_index=True)
+                if not dropped.empty:
+                    store.set_aside(path, dropped)
+                    todo[name].append(f"set aside {len(dropped)} row(s) in {store.rejects_file(name, team).name}")
+                store.write_csv(df, path)
+            backup.take_snapshot("migrated " + ", ".join(todo))
+        finally:
+            store.use_team(previous_team)
+
+    # A file created later gets migrated then (the migrations leave a current file unchanged)
+    up_to_date = {name: current_version(name) for name in SCHEMAS if store.data_path(name, team).exists()}
+    if versions != up_to_date:
+        store.write_json(up_to_date, schema_file(team))
+    return todo
+
+
+def invalidate(names, team=None):
+    """Mark files as needing all their migrations again (e.g. after restoring them from a backup)."""
+    versions = _versions(team)
+    for name in names:
+        versions.pop(name, None)
+    store.write_json(versions, schema_file(team))
+
+
+# schema.json signature per team when this process last made sure it was migrated
+_checked = {}
+_lock = threading.Lock()
+
+
+def ensure(team=None):
+    """Migrate a team's files unless this process already did since schema.json last changed.
+
+    Costs one stat of schema.json once the files are up to date, so it is safe to call on every rerun.
+    """
+    team = team or store.active_team()
+    signature = store.file_signature(schema_file(team))
+    if signature is not None and _checked.get(team) == signature:
+        return {}
+    with _lock:
+        ran = migrate(team)
+        _checked[team] = store.file_signature(schema_file(team))
+    return ran
@@ -0,0 +1,439 @@
+"""File paths, loaders and writers for the planner data files.
+
+Each team has its own data partition: the default team uses the data/
+directory itself, other teams live in data/teams/<team>/ with the same
+files. Paths resolve against the team activated with use_team() for the
+current thread, so concurrent sessions working on different teams never
+see each other's files.
+"""
+import contextvars
+import io
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from planner import metrics
+
+try:
+    import fcntl
+    FILE_LOCKS_AVAILABLE = True
+except ImportError:
+    FILE_LOCKS_AVAILABLE = False
+
+# File paths (PLANNER_DATA_DIR points the planner at another data directory, e.g. for load tests)
+DATA_DIR = Path(os.environ.get("PLANNER_DATA_DIR", Path(__file__).parent.parent / "data"))
+TEAMS_DIR = DATA_DIR / "teams"
+DEFAULT_TEAM = "default"
+DEFAULT_TEAM_NAME = "My team name"
+
+# Status options
+STATUS_OPTIONS = ["To be started", "In progress", "Done"]
+
+# Column layouts
+TASK_COLUMNS = ["id", "week", "team_member", "label", "description", "status"]
+SUPPORT_COLUMNS = ["date", "primary_support", "secondary_support"]
+ON_HOLD_COLUMNS = ["id", "team_member", "label", "description", "status"]
+
+# Column types applied at load time. Members and statuses repeat on every row,
+# so they are stored once as categories; weeks fit in 16 bits and ids may be
+# missing on hand-edited rows. Support dates are parsed into real dates.
+TASK_DTYPES = {"id": "Int64", "week": "int16", "team_member": "category", "status": "category"}
+SUPPORT_DTYPES = {"primary_support": "category", "secondary_support": "category"}
+ON_HOLD_DTYPES = {"id": "Int64", "team_member": "category", "status": "category"}
+
+# Fields that identify a task across weeks (a copy carried over into a new week gets a new id)
+TASK_KEY = ["team_member", "label", "description"]
+
+_active_team = contextvars.ContextVar("active_team", default=DEFAULT_TEAM)
+
+
+def use_team(team):
+    """Make `team` the partition that data paths resolve to in this thread."""
+    _active_team.set(team or DEFAULT_TEAM)
+
+
+def active_team():
+    """Return the team data paths currently resolve to."""
+    return _active_team.get()
+
+
+def team_dir(team=None):
+    """Return the data directory of a team (the active team by default)."""
+    team = team or active_team()
+    return DATA_DIR if team == DEFAULT_TEAM else TEAMS_DIR / team
+
+
+def data_path(name, team=None):
+    """Return the path of a data file in a team's partition."""
+    return team_dir(team) / name
+
+
+def tasks_file(team=None):
+    return data_path("weekly_tasks.csv", team)
+
+
+def support_file(team=None):
+    return data_path("daily_support.csv", team)
+
+
+def on_hold_file(team=None):
+    return data_path("on_hold.csv", team)
+
+
+def team_file(team=None):
+    return data_path("team_members.csv", team)
+
+
+def list_teams():
+    """Return the ids of all teams, the default team first."""
+    teams = [DEFAULT_TEAM]
+    if TEAMS_DIR.exists():
+        teams += sorted(d.name for d in TEAMS_DIR.iterdir() if (d / "team_members.csv").exists())
+    return teams
+
+
+def team_name(team=None):
+    """Return the display name of a team."""
+    team = team or active_team()
+    info = read_json(data_path("team.json", team), default={})
+    return info.get("name") or (DEFAULT_TEAM_NAME if team == DEFAULT_TEAM else team)
+
+
+def create_team(name, members):
+    """Create a new team partition with its roster and return the team id."""
+    team = re.sub(r"[^a-z0-9]+", "-", name.strip().lower()).strip("-")
+    if not team or team in list_teams():
+        raise ValueError(f"A team called '{name}' already exists or the name is invalid")
+    directory = TEAMS_DIR / team
+    directory.mkdir(parents=True)
+    write_json({"name": name.strip()}, directory / "team.json")
+    write_csv(pd.DataFrame({"id": range(1, len(members) + 1), "name": members}), directory / "team_members.csv")
+    return team
+
+
+def task_keys(df):
+    """Hash the member, label and description of each task into a stable uint64 key."""
+    return pd.util.hash_pandas_object(df[TASK_KEY].astype(str), index=False).astype("uint64")
+
+
+def file_signature(path):
+    """Return a cheap (mtime, size, inode) signature of a file, or None if it doesn't exist.
+
+    Only the file metadata is read, so this is safe to call on every rerun.
+    """
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def tmp_path(path):
+    """Return a temporary name next to `path` that no other process or thread writes to."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on `path` across processes, around a read-modify-write of it.
+
+    Without fcntl (Windows) nothing is locked: only threads of one server
+    process are kept apart, by the caller's own lock.
+    """
+    if not FILE_LOCKS_AVAILABLE:
+        yield
+        return
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_csv(df, path):
+    """Write a DataFrame to CSV atomically so readers never see a half-written file."""
+    path = Path(path)
+    tmp_file = tmp_path(path)
+    df.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, path)
+
+
+def _with_dtypes(df, dtypes):
+    """Apply the compact column types to the columns of `df` that have them.
+
+    Status categories always include every STATUS_OPTIONS value, so setting a
+    known status on a row never needs a new category.
+    """
+    dtypes = {c: t for c, t in dtypes.items() if c in df.columns}
+    if "status" in dtypes:
+        status = df["status"].astype("category")
+        extra = sorted(set(status.cat.categories.astype(str)) - set(STATUS_OPTIONS))
+        dtypes["status"] = pd.CategoricalDtype(STATUS_OPTIONS + extra)
+    changed = {c: t for c, t in dtypes.items() if df[c].dtype != t}
+    return df.astype(changed) if changed else df
+
+
+def typed_tasks(df):
+    """Return tasks with the compact column types (e.g. after concatenating edited rows)."""
+    return _with_dtypes(df, TASK_DTYPES)
+
+
+def typed_support(df):
+    """Return a support schedule with real dates and the compact column types."""
+    df = _with_dtypes(df, SUPPORT_DTYPES)
+    return df.assign(date=pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce"))
+
+
+def typed_on_hold(df):
+    """Return on-hold projects with the compact column types."""
+    return _with_dtypes(df, ON_HOLD_DTYPES)
+
+
+def load_team(path=None):
+    """Load the team member names."""
+    return pd.read_csv(path or team_file())["name"].tolist()
+
+
+def week_dates(year, week_num):
+    """Return the Monday to Friday dates of ISO week `week_num` (week 1 holds the year's first Thursday)."""
+    return [date.fromisocalendar(year, week_num, day) for day in range(1, 6)]
+
+
+def rejects_file(name, team=None):
+    """Return the file where the rows of data file `name` that couldn't be kept are set aside."""
+    return data_path(f"{name.split('.')[0]}.rejected.csv", team)
+
+
+def set_aside(path, rows):
+    """Append rows of a data file (as read, with the reason in a `reason` column) to its rejects file."""
+    path = Path(path)
+    rejects = path.with_name(f"{path.name.split('.')[0]}.rejected.csv")
+    if rejects.exists():
+        rows = pd.concat([pd.read_csv(rejects, dtype=str, keep_default_na=False), rows], ignore_index=True)
+    write_csv(rows, rejects)
+
+
+def _whole_weeks(df):
+    """Return the week numbers of tasks as numbers, and which of them are whole numbers."""
+    week = pd.to_numeric(df["week"], errors="coerce")
+    return week, week.notna() & (week == week.round())
+
+
+# Tasks file versions whose rows without a valid week were set aside: path -> signature
+_set_aside_versions = {}
+
+
+def load_tasks(path=None):
+    """Load the weekly tasks file (migrated to the current layout, see planner.schema).
+
+    Rows without a valid week number (e.g. from a hand edit since the file was
+    migrated) are left out and set aside, once per version of the file, as
+    the migration does.
+    """
+    path = path or tasks_file()
+    if not Path(path).exists():
+        return typed_tasks(pd.DataFrame(columns=TASK_COLUMNS))
+    df = pd.read_csv(path, dtype={"team_member": "category", "status": "category"})
+    week, valid = _whole_weeks(df)
+    if not valid.all():
+        signature = file_signature(path)
+        if _set_aside_versions.get(str(path)) != signature:
+            set_aside(path, df[~valid].assign(reason="set aside tasks without a valid week number"))
+            _set_aside_versions[str(path)] = signature
+        df = df[valid].assign(week=week[valid]).reset_index(drop=True)
+    return typed_tasks(df)
+
+
+# Byte ranges and row counts of each week in a tasks file, with the file signature they were read from
+_week_index = {}
+
+# Row counts of the support and on-hold files (path -> (signature, rows)), for the metrics
+_row_counts = {}
+
+
+def _scan_weeks(f):
+    """Read the header, and the byte ranges and row count of each week, from an open tasks file.
+
+    Works on the raw bytes with numpy: rows end at newlines outside quoted
+    fields, and the week is read from between the commas around it (the
+    columns before it are never quoted). Nothing is parsed into a DataFrame.
+    An empty file has an empty header and no weeks.
+    """
+    data = f.read()
+    if not data.strip():
+        return b"", {}, {}
+    raw = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(raw == ord("\n"))
+    quotes = np.flatnonzero(raw == ord('"'))
+    if len(quotes):
+        newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+    header_end = int(newlines[0]) + 1 if len(newlines) else len(data)
+    week_field = data[:header_end].decode("utf-8").strip().split(",").index("week")
+    ends = newlines[1:] + 1
+    if header_end < len(data) and data[-1:] != b"\n":
+        ends = np.append(ends, len(data))
+    starts = np.append(header_end, ends[:-1])[:len(ends)]
+    # Skip blank lines, as read_csv does (a task row has at least its commas)
+    rows = np.flatnonzero(ends - starts > 2)
+    starts, ends = starts[rows], ends[rows]
+
+    commas = np.append(np.flatnonzero(raw == ord(",")), len(data))
+    first = np.searchsorted(commas, starts)
+    field_start = commas[first + week_field - 1] + 1 if week_field else starts
+    field_end = commas[first + week_field]
+    weeks = np.zeros(len(starts), dtype=np.int64)
+    for i in range(int((field_end - field_start).max(initial=0))):
+        pos = field_start + i
+        digit = pos < field_end
+        weeks[digit] = weeks[digit] * 10 + raw[pos[digit]] - ord("0")
+
+    ranges, counts = {}, {}
+    order = np.argsort(weeks, kind="stable")
+    for week, rows in zip(*_group_sorted(weeks[order], order)):
+        # Rows that follow each other in the file are read in one go
+        breaks = np.flatnonzero(starts[rows][1:] != ends[rows][:-1]) + 1
+        ranges[int(week)] = [(int(starts[run[0]]), int(ends[run[-1]])) for run in np.split(rows, breaks)]
+        counts[int(week)] = len(rows)
+    return data[:header_end], ranges, counts
+
+
+def _group_sorted(keys, values):
+    """Split `values` into groups of equal (sorted) `keys`; returns (group keys, groups)."""
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    return keys[np.concatenate([[0], bounds])] if len(keys) else [], np.split(values, bounds) if len(keys) else []
+
+
+def _indexed(f, path):
+    """Return the week index of an open tasks file, scanning it only if it changed."""
+    stat = os.fstat(f.fileno())
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cached = _week_index.get(path)
+    metrics.cache("week_index", cached is not None and cached[0] == signature)
+    if cached is None or cached[0] != signature:
+        cached = (signature, _scan_weeks(f))
+        _week_index[path] = cached
+    return cached[1]
+
+
+def week_sizes(path=None):
+    """Return {week: number of tasks} without loading the tasks."""
+    path = Path(path or tasks_file())
+    if not path.exists():
+        return {}
+    with open(path, "rb") as f:
+        return dict(_indexed(f, path)[2])
+
+
+def load_weeks(weeks, path=None):
+    """Load the tasks of some weeks only, reading just their rows from the tasks file.
+
+    The file is indexed by week once per version (see _scan_weeks), so loading
+    a week costs about its own size rather than the whole year's.
+    """
+    path = Path(path or tasks_file())
+    if not path.exists():
+        return typed_tasks(pd.DataFrame(columns=TASK_COLUMNS))
+    with open(path, "rb") as f:
+        header, ranges, _ = _indexed(f, path)
+        if not header:
+            return typed_tasks(pd.DataFrame(columns=TASK_COLUMNS))
+        chunks = [header if header.endswith(b"\n") else header + b"\n"]
+        for week in weeks:
+            for start, end in ranges.get(week, []):
+                f.seek(start)
+                chunk = f.read(end - start)
+                # The last row of the file may have no newline, and other rows may follow it here
+                chunks.append(chunk if chunk.endswith(b"\n") else chunk + b"\n")
+    df = pd.read_csv(io.BytesIO(b"".join(chunks)), dtype={"team_member": "category", "status": "category"})
+    # Rows without a valid week are set aside by load_tasks()
+    week, valid = _whole_weeks(df)
+    if not valid.all():
+        df = df[valid].assign(week=week[valid]).reset_index(drop=True)
+    return typed_tasks(df)
+
+
+def week_partitions(path=None):
+    """Return the header row and {week: its rows} of a tasks file as raw bytes (see _scan_weeks)."""
+    path = Path(path or tasks_file())
+    with open(path, "rb") as f:
+        header, ranges, _ = _indexed(f, path)
+        weeks = {}
+        for week, runs in ranges.items():
+            parts = []
+            for start, end in runs:
+                f.seek(start)
+                parts.append(f.read(end - start))
+            rows = b"".join(parts)
+            weeks[week] = rows if rows.endswith(b"\n") else rows + b"\n"
+    return header, weeks
+
+
+def load_support(path=None):
+    """Load the daily support schedule."""
+    path = path or support_file()
+    if Path(path).exists():
+        return typed_support(pd.read_csv(path, dtype=SUPPORT_DTYPES))
+    return typed_support(pd.DataFrame(columns=SUPPORT_COLUMNS))
+
+
+def load_on_hold(path=None):
+    """Load the on-hold projects (migrated to the current layout, see planner.schema)."""
+    path = path or on_hold_file()
+    if Path(path).exists():
+        return typed_on_hold(pd.read_csv(path, dtype={"team_member": "category", "status": "category"}))
+    return typed_on_hold(pd.DataFrame(columns=ON_HOLD_COLUMNS))
+
+
+def write_json(data, path):
+    """Write a small JSON document atomically."""
+    path = Path(path)
+    tmp_file = tmp_path(path)
+    tmp_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp_file, path)
+
+
+def read_json(path, default=None):
+    """Read a JSON document, returning `default` if the file doesn't exist."""
+    path = Path(path)
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _row_count(path):
+    signature = file_signature(path)
+    if signature is None:
+        return 0
+    cached = _row_counts.get(path)
+    if cached is None or cached[0] != signature:
+        cached = (signature, len(pd.read_csv(path, usecols=[0])))
+        _row_counts[path] = cached
+    return cached[1]
+
+
+@metrics.gauge("planner_rows", "Rows of each data table, by team and table.")
+def _table_rows():
+    samples = {}
+    for team in list_teams():
+        samples[(("table", "tasks"), ("team", team))] = sum(week_sizes(tasks_file(team)).values())
+        samples[(("table", "support"), ("team", team))] = _row_count(support_file(team))
+        samples[(("table", "on_hold"), ("team", team))] = _row_count(on_hold_file(team))
+    return samples
+
+
+@metrics.gauge("planner_data_file_bytes", "Size of each data file, by team and file.")
+def _file_sizes():
+    samples = {}
+    for team in list_teams():
+        for path in team_dir(team).glob("*"):
+            if path.suffix in (".csv", ".json", ".gz") and path.is_file():
+                samples[(("file", path.name), ("team", team))] = path.stat().st_size
+    return samples
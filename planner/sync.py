@@ -0,0 +1,539 @@
+"""Keep session-state copies of the data files in step with what is on disk.
+
+Every session records the signature (mtime, size, inode) of each file it loaded.
+On each rerun, and periodically through a fragment, only that signature is
+checked; the file is re-read only when another session (or an external edit)
+has changed it, and just the affected partition is reloaded.
+
+With autosave on (the default), edits are handed to the write-behind queue in
+planner.autosave instead of waiting for a manual save. Either way a save only
+writes the groups (weeks, support days, projects) the session changed since it
+loaded them, on top of the file as it is at that point, so edits saved by other
+sessions in the meantime are kept. A save that changes a group someone else
+changed too is refused and shown to the user (see show_changes()).
+
+Page reruns, loads, saves and conflicts are counted in planner.metrics: every
+page starts with start_rerun() and select_team() and ends with finish_rerun().
+The first rerun of the process runs its start-up (startup()), and the first
+selection of each team the team's (open_team()).
+"""
+import threading
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from planner import analytics, archive, autosave, backup, history, metrics, roster, schema, store
+
+# How often open pages check the data files for changes made elsewhere
+REFRESH_INTERVAL = "15s"
+
+# Data file (for the active team) and loader behind each session-state partition
+PARTITIONS = {
+    "all_tasks": (store.tasks_file, store.load_tasks),
+    "daily_df": (store.support_file, store.load_support),
+    "on_hold_tasks": (store.on_hold_file, store.load_on_hold),
+}
+
+
+def _group_digests(df, by, ignore=()):
+    """Return an order-insensitive content digest for each group of rows."""
+    if df.empty:
+        return {}
+    cols = [c for c in df.columns if c not in ignore]
+    # Blanks hash alike whether typed in a session ("") or read back from the CSV (missing)
+    values = df[cols].astype(object)
+    hashes = pd.util.hash_pandas_object(values.where(values.notna(), "").astype(str), index=False)
+    return hashes.groupby(df[by].values).sum().to_dict()
+
+
+def diff_partition(old, new, by, ignore=()):
+    """Return the group keys that were added, removed and changed between two versions of a table."""
+    old_digests = _group_digests(old, by, ignore)
+    new_digests = _group_digests(new, by, ignore)
+    added = sorted(k for k in new_digests if k not in old_digests)
+    removed = sorted(k for k in old_digests if k not in new_digests)
+    changed = sorted(k for k in new_digests if k in old_digests and new_digests[k] != old_digests[k])
+    return added, removed, changed
+
+
+def _format_keys(keys, limit=5):
+    shown = ", ".join(str(k) for k in keys[:limit])
+    if len(keys) > limit:
+        shown += f" (+{len(keys) - limit} more)"
+    return shown
+
+
+def describe_changes(key, old, new):
+    """Summarise what changed in a partition as a short list of sentences."""
+    if key == "all_tasks":
+        # Ids change when a merge renumbers new tasks (see _renumber()), so compare whole weeks instead
+        added, removed, changed = diff_partition(old, new, "week", ignore=("id",))
+        weeks = sorted(set(added) | set(removed) | set(changed))
+        return [f"Tasks updated in week {_format_keys(weeks)}"] if weeks else []
+
+    if key == "daily_df":
+        added, removed, changed = (
+            [pd.Timestamp(d).strftime("%Y-%m-%d") for d in keys] for keys in diff_partition(old, new, "date")
+        )
+        messages = []
+        if added:
+            messages.append(f"Support days added: {_format_keys(added)}")
+        if removed:
+            messages.append(f"Support days removed: {_format_keys(removed)}")
+        if changed:
+            messages.append(f"Support days changed: {_format_keys(changed)}")
+        return messages
+
+    added, removed, changed = diff_partition(old, new, "id")
+    messages = []
+    if added:
+        messages.append(f"{len(added)} project(s) added")
+    if removed:
+        messages.append(f"{len(removed)} project(s) removed")
+    if changed:
+        messages.append(f"{len(changed)} project(s) updated")
+    return messages
+
+
+# Column splitting each partition into the groups a save replaces, and columns ignored when comparing them
+MERGE_BY = {
+    "all_tasks": ("week", ("id",)),
+    "daily_df": ("date", ()),
+    "on_hold_tasks": ("id", ()),
+}
+
+TYPED = {
+    "all_tasks": store.typed_tasks,
+    "daily_df": store.typed_support,
+    "on_hold_tasks": store.typed_on_hold,
+}
+
+
+def partition_digests(key, df):
+    """Return the group digests of a version of a partition: the `base` write_partition() takes."""
+    by, ignore = MERGE_BY[key]
+    return _group_digests(df, by, ignore)
+
+
+def _describe_groups(key, groups):
+    if key == "all_tasks":
+        return f"week {_format_keys(groups)}"
+    if key == "daily_df":
+        return f"support days {_format_keys([pd.Timestamp(d).strftime('%Y-%m-%d') for d in groups])}"
+    return f"{len(groups)} project(s)"
+
+
+class SaveConflict(autosave.Conflict):
+    """A save changes groups (weeks, days, projects) that were changed differently elsewhere since it loaded them."""
+
+    def __init__(self, key, groups):
+        self.key = key
+        self.groups = groups
+        super().__init__(f"{_describe_groups(key, groups)} changed elsewhere since you loaded it")
+
+
+# Last table saved to each file: path -> (signature, table, group digests)
+_written_tables = {}
+# Groups each session saved since it last loaded a file: (path, session) -> {group: digest}
+_session_writes = {}
+# Merges read the file and write it back: one at a time (autosave thread and page saves, and other processes)
+_save_lock = threading.Lock()
+
+
+def _current(key, path):
+    """Return the file's table and its group digests (kept from the last save if the file hasn't changed since)."""
+    cached = _written_tables.get(path)
+    if cached is not None and cached[0] == store.file_signature(path):
+        return cached[1], cached[2]
+    table = PARTITIONS[key][1](path)
+    return table, partition_digests(key, table)
+
+
+def _renumber(ours, theirs):
+    """Give the session's tasks new ids where tasks saved elsewhere took the same ones."""
+    clash = ours["id"].isin(theirs["id"].dropna())
+    if not clash.any():
+        return ours
+    first_id = archive.next_id(pd.concat([theirs, ours]))
+    new_ids = pd.Series(range(first_id, first_id + int(clash.sum())), index=ours.index[clash])
+    return ours.assign(id=ours["id"].mask(clash, new_ids))
+
+
+def _merge(key, df, base, session, force):
+    """Replay the groups the session changed since `base` onto the file as it is now.
+
+    Returns (merged table, the file's table, changed groups, merged group
+    digests, whether other groups changed elsewhere).
+    """
+    path = PARTITIONS[key][0]()
+    by, _ = MERGE_BY[key]
+    current, current_digests = _current(key, path)
+    # What the session saved since it loaded the file is its base for those groups
+    base = {**base, **_session_writes.get((path, session), {})}
+    mine = partition_digests(key, df)
+    changed = sorted(g for g in mine.keys() | base.keys() if mine.get(g) != base.get(g))
+    conflicts = [g for g in changed if current_digests.get(g) not in (base.get(g), mine.get(g))]
+    if conflicts and not force:
+        metrics.inc("planner_save_conflicts_total", table=key)
+        raise SaveConflict(key, conflicts)
+    elsewhere = any(
+        current_digests.get(g) != base.get(g) for g in current_digests.keys() | base.keys() if g not in set(changed)
+    )
+    if not elsewhere:
+        return df, current, changed, mine, False
+    ours = df[df[by].isin(changed)]
+    theirs = current[~current[by].isin(changed)]
+    if key == "all_tasks":
+        ours = _renumber(ours, theirs)
+    merged = TYPED[key](pd.concat([theirs, ours], ignore_index=True)).sort_values(by, kind="stable", ignore_index=True)
+    digests = {g: d for g, d in current_digests.items() if g not in set(changed)}
+    digests.update((g, mine[g]) for g in changed if g in mine)
+    return merged, current, changed, digests, True
+
+
+def write_partition(key, df, base, session=None, force=False):
+    """Save a session's version of a partition without overwriting changes saved elsewhere.
+
+    `base` holds the group digests (see MERGE_BY) of the version the session
+    loaded. Only the groups it changed since are written; the rest of the file
+    keeps what it has now. Raises SaveConflict when one of those groups was also
+    changed elsewhere, unless `force`, in which case the session's version wins.
+    Status changes of the written groups are logged and, for tasks, their
+    aggregates refreshed. Returns the new file signature, or None when changes
+    made elsewhere were merged in (the session must reload). Touches no session
+    state, so the autosave thread can run it.
+    """
+    path = PARTITIONS[key][0]()
+    by, _ = MERGE_BY[key]
+    with _save_lock, store.file_lock(path):
+        previous_version = store.file_signature(path)
+        merged, current, changed, digests, elsewhere = _merge(key, df, base, session, force)
+        if changed:
+            before = current[current[by].isin(changed)]
+            after = merged[merged[by].isin(changed)]
+            if key == "all_tasks":
+                for week in changed:
+                    history.record_changes(before[before["week"] == week], after[after["week"] == week], "week", week=week)
+            elif key == "on_hold_tasks":
+                history.record_changes(before, after, "on_hold")
+            store.write_csv(merged, path)
+            if key == "all_tasks":
+                analytics.update_weeks(merged, changed, since=previous_version)
+            _written_tables[path] = (store.file_signature(path), merged, digests)
+            if session is not None:
+                _session_writes.setdefault((path, session), {}).update((g, digests.get(g)) for g in changed)
+        signature = store.file_signature(path)
+    return None if elsewhere else signature
+
+
+def _session_id():
+    if "_session_id" not in st.session_state:
+        st.session_state._session_id = uuid.uuid4().hex
+    return st.session_state._session_id
+
+
+def _versions():
+    if "_data_versions" not in st.session_state:
+        st.session_state._data_versions = {}
+    return st.session_state._data_versions
+
+
+def _bases():
+    """Group digests (see MERGE_BY) of the version of each partition this session last loaded or saved."""
+    if "_data_bases" not in st.session_state:
+        st.session_state._data_bases = {}
+    return st.session_state._data_bases
+
+
+def _adopt(key, signature):
+    """Take a version of a partition this session wrote as the one it holds."""
+    path = PARTITIONS[key][0]()
+    _versions()[key] = signature
+    cached = _written_tables.get(path)
+    if cached is not None and cached[0] == signature:
+        _bases()[key] = cached[2]
+        _session_writes.pop((path, _session_id()), None)
+
+
+def _known_version(key):
+    """Return the file version this session last loaded or saved, including its own autosaves."""
+    path_for, _ = PARTITIONS[key]
+    written = autosave.last_write(store.active_team(), key)
+    if written and written[0] == _session_id() and written[1] is not None and written[1] != _versions().get(key) \
+            and written[1] == store.file_signature(path_for()):
+        _adopt(key, written[1])
+    return _versions().get(key)
+
+
+def save_conflict(key):
+    """Return why the session's last save of a partition was refused (see SaveConflict), or None."""
+    message = st.session_state.get(f"{key}_conflict")
+    if message is None:
+        conflict = autosave.conflict(store.active_team(), key, _session_id())
+        message = str(conflict) if conflict is not None else None
+    return message
+
+
+def is_dirty(key):
+    """Return True if the session holds unsaved changes to a partition (queued or refused autosaves included)."""
+    return (
+        st.session_state.get(f"{key}_dirty", False)
+        or autosave.is_pending(store.active_team(), key, _session_id())
+        or save_conflict(key) is not None
+    )
+
+
+def data_version(key):
+    """Return the file version the session's copy of a partition matches, or None while it has unsaved edits."""
+    return None if is_dirty(key) else _known_version(key)
+
+
+def mark_dirty(key):
+    """Flag a partition as edited in this session but not yet saved."""
+    st.session_state[f"{key}_dirty"] = True
+
+
+def autosave_enabled():
+    return st.session_state.get("autosave", True)
+
+
+def autosave_toggle(*keys):
+    """Show the autosave switch and the save status of the given partitions in the sidebar."""
+    st.session_state.autosave = st.sidebar.toggle(
+        "💾 Autosave",
+        value=autosave_enabled(),
+        help=f"Save edits automatically {autosave.DEBOUNCE_SECONDS:g}s after you stop editing"
+    )
+    team = store.active_team()
+    for key in keys:
+        error = autosave.last_error(team, key)
+        if error:
+            st.sidebar.error(f"⚠️ Autosave failed, retrying: {error}")
+    if st.session_state.autosave and any(autosave.is_pending(team, key, _session_id()) for key in keys):
+        st.sidebar.caption("⏳ Saving...")
+
+
+def edited(key):
+    """Record an edit of a partition: queue it for autosave, or flag it as unsaved."""
+    if not autosave_enabled():
+        mark_dirty(key)
+        return
+    base, session = _bases().get(key, {}), _session_id()
+    autosave.queue(
+        store.active_team(), key, st.session_state[key],
+        lambda df: write_partition(key, df, base, session), session
+    )
+    st.session_state[f"{key}_dirty"] = False
+    st.session_state.pop(f"{key}_conflict", None)
+
+
+# Whether startup() ran, and the teams open_team() opened, in this process
+_started = False
+_opened_teams = set()
+_startup_lock = threading.Lock()
+
+
+def startup():
+    """Process start-up, run once: serve the metrics (see planner.metrics)."""
+    global _started
+    if _started:
+        return
+    with _startup_lock:
+        if not _started:
+            metrics.start_server()
+            _started = True
+
+
+def open_team(team):
+    """Team start-up, run once per team and process: finish an interrupted roster change and migrate the files.
+
+    Code that replaces data files while the app runs (restores) calls schema.ensure() itself.
+    """
+    if team in _opened_teams:
+        return
+    with _startup_lock:
+        if team not in _opened_teams:
+            roster.recover(team)
+            schema.ensure(team)
+            _opened_teams.add(team)
+
+
+def start_rerun(page):
+    """Count a rerun of `page` and start timing it (see finish_rerun()); call it first on every page."""
+    startup()
+    st.session_state._rerun = (page, time.perf_counter())
+    st.session_state._page_runs = st.session_state.get("_page_runs", 0) + 1
+    metrics.inc("planner_reruns_total", page=page)
+    metrics.seen_session(_session_id())
+
+
+def select_team():
+    """Show the team switcher in the sidebar and point the data helpers at the selected team.
+
+    The team is kept in the URL (?team=...) so links open the right team.
+    Switching team drops the session copies of the previous team's data.
+    """
+    teams = store.list_teams()
+    requested = st.query_params.get("team", st.session_state.get("team", store.DEFAULT_TEAM))
+    if requested not in teams:
+        requested = store.DEFAULT_TEAM
+
+    team = st.sidebar.selectbox(
+        "Team",
+        options=teams,
+        index=teams.index(requested),
+        format_func=store.team_name,
+        key="team_switcher"
+    ) if len(teams) > 1 else requested
+
+    if st.session_state.get("team") != team:
+        for key in PARTITIONS:
+            st.session_state.pop(key, None)
+            st.session_state.pop(f"{key}_dirty", None)
+            st.session_state.pop(f"{key}_conflict", None)
+        st.session_state.pop("_data_versions", None)
+        st.session_state.pop("_data_bases", None)
+        st.session_state.pop("_data_notified", None)
+        st.session_state.pop("_undo", None)
+        st.session_state.team = team
+    if team != store.DEFAULT_TEAM:
+        st.query_params["team"] = team
+    elif "team" in st.query_params:
+        del st.query_params["team"]
+    store.use_team(team)
+    open_team(team)
+    return team
+
+
+def finish_rerun():
+    """Record the duration of the page's rerun; call it last on every page.
+
+    Reruns cut short by st.stop() or st.rerun() are counted but not timed.
+    """
+    page, started = st.session_state.pop("_rerun", (None, None))
+    if page is not None:
+        metrics.observe("planner_rerun_duration_seconds", time.perf_counter() - started, page=page)
+
+
+def use_session_team():
+    """Point the data helpers at the team this session has selected."""
+    store.use_team(st.session_state.get("team", store.DEFAULT_TEAM))
+
+
+def reload_partition(key):
+    """Re-read a partition from disk, discarding unsaved changes, and return what changed."""
+    path_for, loader = PARTITIONS[key]
+    path = path_for()
+    team, session = store.active_team(), _session_id()
+    autosave.discard(team, key, session)
+    autosave.clear_conflict(team, key, session)
+    signature = store.file_signature(path)
+    old = st.session_state.get(key)
+    with metrics.timer("planner_data_load_duration_seconds", table=key):
+        new = loader(path)
+    st.session_state[key] = new
+    st.session_state[f"{key}_dirty"] = False
+    st.session_state.pop(f"{key}_conflict", None)
+    _versions()[key] = signature
+    _bases()[key] = partition_digests(key, new)
+    _session_writes.pop((path, session), None)
+    if old is None:
+        return []
+    return describe_changes(key, old, new)
+
+
+def sync_partition(key, editing=False):
+    """Load a partition into session state, reloading it if the file changed on disk.
+
+    Returns a list of change messages for a reload, or an empty list. A session
+    with unsaved edits is not reloaded; use is_stale() to warn about it instead.
+    Neither is one `editing` it: edits of this run not applied yet (e.g. typed
+    in a st.data_editor, which drops them when the table it shows changes).
+    """
+    path_for, _ = PARTITIONS[key]
+    if key not in st.session_state:
+        reload_partition(key)
+        return []
+    if _known_version(key) == store.file_signature(path_for()) or is_dirty(key) or editing:
+        return []
+    metrics.inc("planner_external_reloads_total", table=key)
+    return reload_partition(key)
+
+
+def is_stale(key):
+    """Return True if the file changed on disk since this session last loaded or saved it."""
+    path_for, _ = PARTITIONS[key]
+    return _known_version(key) != store.file_signature(path_for())
+
+
+def save_partition(key, force=False):
+    """Save a partition (see write_partition()) and record the new file version for this session.
+
+    When groups the session changed were also changed elsewhere, nothing is
+    written unless `force`: the conflict is kept for show_changes() and the page
+    reruns. Returns the file signature this session had loaded before the save.
+    """
+    path = PARTITIONS[key][0]()
+    team, session = store.active_team(), _session_id()
+    # A queued autosave of older edits must not overwrite this save
+    autosave.discard(team, key, session)
+    autosave.clear_conflict(team, key, session)
+    previous_version = _versions().get(key)
+    try:
+        with metrics.timer("planner_save_duration_seconds", table=key, mode="manual"):
+            signature = write_partition(key, st.session_state[key], _bases().get(key, {}), session, force)
+    except SaveConflict as exc:
+        st.session_state[f"{key}_conflict"] = str(exc)
+        st.rerun()
+    st.session_state[f"{key}_dirty"] = False
+    st.session_state.pop(f"{key}_conflict", None)
+    if signature is not None:
+        _adopt(key, signature)
+    backup.take_snapshot(f"saved {path.name}")
+    return previous_version
+
+
+def show_changes(key, changes):
+    """Tell the user about changes picked up from disk, and about saves refused or at risk because of them."""
+    for message in changes:
+        st.toast(f"🔄 {message}")
+    if changes:
+        st.info("🔄 Reloaded newer data saved elsewhere: " + "; ".join(changes))
+
+    conflict = save_conflict(key)
+    if conflict is not None:
+        st.error(f"⚠️ Your changes were not saved: {conflict}.")
+        reload_col, overwrite_col = st.columns(2)
+        if reload_col.button("🔄 Reload from disk (discard my changes)", key=f"{key}_reload"):
+            reload_partition(key)
+            st.rerun()
+        if overwrite_col.button("💾 Save mine over theirs", key=f"{key}_overwrite"):
+            save_partition(key, force=True)
+            st.rerun()
+    elif is_dirty(key) and is_stale(key):
+        st.warning(
+            "⚠️ This data was changed elsewhere since you loaded it. Saving keeps those changes, "
+            "unless they touch what you changed."
+        )
+        if st.button("🔄 Reload from disk (discard my unsaved changes)", key=f"{key}_reload"):
+            reload_partition(key)
+            st.rerun()
+
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def watch(*keys):
+    """Periodically check the given partitions and rerun the page when one changed on disk."""
+    # In a full page run the page has just synced: rerunning it would drop the input that started the run
+    if st.session_state.get("_watched_run") != st.session_state.get("_page_runs"):
+        st.session_state._watched_run = st.session_state.get("_page_runs")
+        return
+    use_session_team()
+    notified = st.session_state.setdefault("_data_notified", {})
+    for key in keys:
+        path_for, _ = PARTITIONS[key]
+        signature = store.file_signature(path_for())
+        if signature != _known_version(key) and signature != notified.get(key):
+            notified[key] = signature
+            st.rerun()
@@ -0,0 +1,122 @@
+"""Per-session undo/redo for the task, support and on-hold tables.
+
+Each change is kept as a row-level delta: the rows it removed and the rows it
+added, matched by a hash of their content (duplicates are told apart by
+occurrence). Unchanged rows are never copied, so a bulk edit touching a few
+rows costs a few rows of memory no matter how large the table is.
+
+Stacks live in session state and keep the last UNDO_LEVELS changes each.
+Undoing or redoing a change that was already saved writes the result back
+through the page's normal save path, or queues it when autosave is on.
+"""
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+
+from planner import store, sync
+
+UNDO_LEVELS = 50
+
+# Columns left out when matching rows: a merge can renumber a session's new tasks (see sync._renumber)
+IGNORE = {"all_tasks": ["id"]}
+
+# Column each partition is kept sorted by, and the schema to re-apply after a restore
+ORDER = {"all_tasks": "id", "daily_df": "date", "on_hold_tasks": "id"}
+TYPED = {"all_tasks": store.typed_tasks, "daily_df": store.typed_support, "on_hold_tasks": store.typed_on_hold}
+
+
+def _row_keys(df, key):
+    """Identify rows by content hash and occurrence, so duplicate rows stay distinct."""
+    if df.empty:
+        return pd.MultiIndex.from_arrays([[], []])
+    hashes = pd.util.hash_pandas_object(df.drop(columns=IGNORE.get(key, [])), index=False).values
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().values
+    return pd.MultiIndex.from_arrays([hashes, occurrence])
+
+
+def diff_rows(key, before, after):
+    """Return (removed rows, added rows) between two versions of a partition's table."""
+    old_keys, new_keys = _row_keys(before, key), _row_keys(after, key)
+    removed = before[~old_keys.isin(new_keys)] if not before.empty else before
+    added = after[~new_keys.isin(old_keys)] if not after.empty else after
+    return removed, added
+
+
+def apply_delta(key, df, remove, add):
+    """Remove the rows in `remove` (those still present) from `df` and add the rows in `add`."""
+    if not remove.empty and not df.empty:
+        df = df[~_row_keys(df, key).isin(_row_keys(remove[df.columns], key))]
+    parts = [part for part in (df, add[df.columns]) if not part.empty]
+    return pd.concat(parts, ignore_index=True) if parts else df.iloc[0:0]
+
+
+def _stacks(stack):
+    stacks = st.session_state.setdefault("_undo", {})
+    if stack not in stacks:
+        stacks[stack] = {"undo": deque(maxlen=UNDO_LEVELS), "redo": deque(maxlen=UNDO_LEVELS)}
+    return stacks[stack]
+
+
+def record(stack, key, before, after, label):
+    """Push the change to a partition from `before` to `after` onto an undo stack (clears redo).
+
+    `before` and `after` may be just the slice of the partition that changed.
+    """
+    removed, added = diff_rows(key, before, after)
+    if removed.empty and added.empty:
+        return
+    stacks = _stacks(stack)
+    stacks["undo"].append({"label": label, "removed": removed, "added": added})
+    stacks["redo"].clear()
+
+
+def _restore(key, remove, add):
+    df = apply_delta(key, st.session_state[key], remove, add)
+    df = TYPED[key](df).sort_values(ORDER[key], kind="stable").reset_index(drop=True)
+    st.session_state[key] = df
+
+
+def _step(stack, key, save, widgets, direction):
+    """Undo or redo the latest change on a stack, saving if the session had no unsaved edits."""
+    for widget in widgets:
+        st.session_state.pop(widget, None)
+    stacks = _stacks(stack)
+    entry = stacks[direction].pop()
+    before = st.session_state[key]
+    was_saved = not sync.is_dirty(key)
+    if direction == "undo":
+        _restore(key, entry["added"], entry["removed"])
+        stacks["redo"].append(entry)
+    else:
+        _restore(key, entry["removed"], entry["added"])
+        stacks["undo"].append(entry)
+
+    if was_saved and not sync.autosave_enabled():
+        save(before)
+    else:
+        sync.edited(key)
+    return entry["label"]
+
+
+def controls(stack, key, save, widgets=()):
+    """Show Undo and Redo buttons for a stack.
+
+    `save(before)` is the page's normal save path; it is called with the table
+    as it was before the undo/redo when the change being reverted was saved.
+    `widgets` are editor keys whose pending edits are dropped on undo/redo.
+    """
+    stacks = _stacks(stack)
+    col1, col2, _ = st.columns([1, 1, 6])
+    with col1:
+        last = stacks["undo"][-1]["label"] if stacks["undo"] else None
+        if st.button("↩️ Undo", key=f"{stack}_undo", disabled=last is None, help=f"Undo: {last}" if last else None):
+            st.session_state.undo_message = f"↩️ Undone: {_step(stack, key, save, widgets, 'undo')}"
+            st.rerun()
+    with col2:
+        last = stacks["redo"][-1]["label"] if stacks["redo"] else None
+        if st.button("↪️ Redo", key=f"{stack}_redo", disabled=last is None, help=f"Redo: {last}" if last else None):
+            st.session_state.undo_message = f"↪️ Redone: {_step(stack, key, save, widgets, 'redo')}"
+            st.rerun()
+    if st.session_state.get("undo_message"):
+        st.toast(st.session_state.pop("undo_message"))
@@ -0,0 +1,130 @@
+"""Checks for problems in the support schedule and in task ownership.
+
+Every check is a vectorized pass over the whole table, so validating years
+of schedule takes milliseconds and can run on every rerun.
+"""
+import pandas as pd
+
+from planner import store
+
+ISSUE_COLUMNS = ["date", "severity", "issue", "member"]
+TASK_ISSUE_COLUMNS = ["id", "week", "severity", "issue", "member"]
+
+
+def _issues(frame, mask, severity, issue, member=""):
+    """Build issue rows for the rows of `frame` selected by `mask`."""
+    hits = frame[mask]
+    return pd.DataFrame({
+        "date": hits["date"].values,
+        "severity": severity,
+        "issue": issue,
+        "member": hits[member].values if member else "",
+    })
+
+
+def _clean(series):
+    return series.astype(object).fillna("").astype(str).str.strip()
+
+
+def validate_schedule(schedule_df, members, leave=None):
+    """Return one row per problem found in the support schedule.
+
+    `leave` is an optional DataFrame of (team_member, start, end) periods;
+    assignments falling inside one are reported.
+    """
+    if schedule_df.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+
+    dates = pd.to_datetime(schedule_df["date"], errors="coerce").reset_index(drop=True)
+    frame = pd.DataFrame({
+        "date": dates.dt.strftime("%Y-%m-%d").fillna(schedule_df["date"].astype(str).reset_index(drop=True)).values,
+        "primary": _clean(schedule_df["primary_support"]).values,
+        "secondary": _clean(schedule_df["secondary_support"]).values,
+    })
+    known = pd.Index(members)
+    parts = [
+        _issues(frame, dates.isna(), "error", "invalid date"),
+        _issues(frame, dates.dt.weekday >= 5, "warning", "scheduled on a weekend"),
+        _issues(frame, frame["date"].duplicated(keep="first"), "error", "date scheduled twice"),
+        _issues(frame, (frame["primary"] != "") & (frame["primary"] == frame["secondary"]), "error",
+                "same person is primary and secondary", "primary"),
+        _issues(frame, frame["primary"] == "", "warning", "no primary support"),
+        _issues(frame, frame["secondary"] == "", "warning", "no secondary support"),
+        _issues(frame, (frame["primary"] != "") & ~frame["primary"].isin(known), "error",
+                "primary is not in the team", "primary"),
+        _issues(frame, (frame["secondary"] != "") & ~frame["secondary"].isin(known), "error",
+                "secondary is not in the team", "secondary"),
+    ]
+
+    # Weekdays inside the scheduled period with no entry at all
+    valid_dates = dates.dropna()
+    if not valid_dates.empty:
+        gaps = pd.bdate_range(valid_dates.min(), valid_dates.max()).difference(pd.DatetimeIndex(valid_dates))
+        parts.append(pd.DataFrame({
+            "date": gaps.strftime("%Y-%m-%d"),
+            "severity": "warning",
+            "issue": "no support assigned",
+            "member": "",
+        }))
+
+    if leave is not None and not leave.empty:
+        parts.append(_leave_conflicts(frame.assign(day=dates), leave))
+
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    issues = pd.concat(parts, ignore_index=True)
+    return issues.sort_values(["date", "severity"]).reset_index(drop=True)
+
+
+def _leave_conflicts(frame, leave):
+    """Assignments made on days the member is on leave."""
+    assigned = pd.concat([
+        frame[["date", "day"]].assign(member=frame["primary"], role="primary"),
+        frame[["date", "day"]].assign(member=frame["secondary"], role="secondary"),
+    ], ignore_index=True)
+    assigned = assigned[assigned["member"] != ""]
+    periods = leave.rename(columns={"team_member": "member"})[["member", "start", "end"]].assign(
+        start=lambda d: pd.to_datetime(d["start"]),
+        end=lambda d: pd.to_datetime(d["end"]),
+    )
+    merged = assigned.merge(periods, on="member")
+    hits = merged[(merged["day"] >= merged["start"]) & (merged["day"] <= merged["end"])]
+    hits = hits.drop_duplicates(["date", "member", "role"])
+    return pd.DataFrame({
+        "date": hits["date"].values,
+        "severity": "error",
+        "issue": "assigned as " + hits["role"] + " while on leave",
+        "member": hits["member"].values,
+    })
+
+
+def validate_tasks(tasks_df, members):
+    """Return one row per task owned by someone outside the team or with an unknown status."""
+    if tasks_df.empty:
+        return pd.DataFrame(columns=TASK_ISSUE_COLUMNS)
+    owner = _clean(tasks_df["team_member"])
+    status = _clean(tasks_df["status"])
+    checks = [
+        (~owner.isin(pd.Index(members)), "error", "owner is not in the team"),
+        (~status.isin(store.STATUS_OPTIONS), "warning", "unknown status"),
+    ]
+    parts = []
+    for mask, severity, issue in checks:
+        hits = tasks_df[mask.values]
+        parts.append(pd.DataFrame({
+            "id": hits["id"].values,
+            "week": hits["week"].values,
+            "severity": severity,
+            "issue": issue,
+            "member": owner[mask].values,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def issues_by_date(issues):
+    """Group schedule issues into {date: [messages]} for calendar highlighting."""
+    if issues.empty:
+        return {}
+    labels = issues["issue"] + issues["member"].map(lambda m: f" ({m})" if m else "")
+    return labels.groupby(issues["date"]).apply(list).to_dict()
@@ -0,0 +1,270 @@
+"""Week pages and the tasks they start with: creating (activating) a range of weeks at once.
+
+Activating a week writes its page (pages/Week_NN.py, from WEEK_PAGE_TEMPLATE)
+and carries over the open tasks of the nearest earlier active week. For a
+range of weeks the whole carry-over chain is computed in one vectorized pass:
+a new week's open tasks are exactly its source's (carried tasks stay open), so
+every new week takes the open tasks of the nearest earlier week that was
+already active or already has tasks, skipped weeks included. The tasks file is
+then written once, atomically, with one backup snapshot and one analytics
+update, whatever the number of weeks.
+"""
+import os
+import re
+
+import pandas as pd
+
+from planner import analytics, archive, autosave, backup, store
+
+LAST_WEEK = 52
+
+# Source of a week page; {week_num} is filled in, other braces are doubled
+WEEK_PAGE_TEMPLATE = '''import streamlit as st
+import pandas as pd
+
+from planner import archive, availability, filters, store, sync, undo, validation
+
+WEEK_NUM = {week_num}
+
+st.set_page_config(
+    page_title=f"Week {{WEEK_NUM}} Tasks",
+    page_icon="📅",
+    layout="wide"
+)
+
+# Count and time this rerun (see sync.finish_rerun() at the end)
+sync.start_rerun(f"Week_{{WEEK_NUM:02d}}")
+
+# Team switcher
+sync.select_team()
+
+# Load team members
+team_members = store.load_team()
+
+# Load tasks into session state (re-read only when the file changes on disk, and not under edits in the table)
+editor_state = st.session_state.get("task_editor", {{}})
+has_edits = any(editor_state.get(change) for change in ("edited_rows", "added_rows", "deleted_rows"))
+changes = sync.sync_partition("all_tasks", editing=has_edits)
+
+
+def save_tasks(before):
+    """Save the tasks (the save logs the changed weeks' status changes and refreshes their aggregates)."""
+    sync.save_partition("all_tasks")
+
+
+# Header
+st.title(f"📅 Week {{WEEK_NUM}} Tasks")
+
+# Team capacity for the week, net of leave
+available_days, total_days, days_off = availability.week_capacity(2026, WEEK_NUM, team_members)
+on_leave = ", ".join(f"{{member}} ({{days}}d)" for member, days in days_off.items())
+st.caption(f"👥 Capacity: {{available_days}}/{{total_days}} person-days" + (f" • 🌴 On leave: {{on_leave}}" if on_leave else ""))
+st.markdown("---")
+
+# Show updates saved by other sessions and keep watching for new ones
+sync.show_changes("all_tasks", changes)
+sync.watch("all_tasks")
+sync.autosave_toggle("all_tasks")
+
+# Undo/redo saved edits of this week
+undo.controls(f"week_{{WEEK_NUM}}", "all_tasks", save_tasks, widgets=["task_editor"])
+
+# Get tasks for this week
+week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM].copy()
+archived_count = archive.week_counts().get(WEEK_NUM)
+if archived_count:
+    st.caption(f"🗄️ {{archived_count}} finished task(s) of this week are archived (see the Archive page)")
+
+# Flag tasks owned by people no longer in the team
+task_issues = validation.validate_tasks(week_tasks, team_members)
+if not task_issues.empty:
+    problems = sorted(set(task_issues["issue"] + " (" + task_issues["member"] + ")"))
+    st.warning(f"⚠️ {{len(task_issues)}} task problem(s) this week: " + "; ".join(problems))
+
+# Filter bar (links from the Year Overview open on one member)
+linked_member = st.query_params.get("member")
+expression = filters.filter_bar("week", default=f'member:"{{linked_member}}"' if linked_member in team_members else "")
+version = sync.data_version("all_tasks")
+filtered_tasks = filters.apply(week_tasks, expression, (WEEK_NUM, version) if version else None).copy()
+
+# Display editable tasks table
+st.subheader("📋 Tasks")
+st.caption("Edit cells directly • Click ➕ to add rows • Select rows and press Delete to remove")
+
+# Prepare display dataframe (the id is hidden: it keeps an edited task the same task)
+if not filtered_tasks.empty:
+    display_df = filtered_tasks[["id", "team_member", "label", "description", "status"]].astype(object)
+else:
+    display_df = pd.DataFrame(columns=["id", "team_member", "label", "description", "status"])
+
+# Configure columns for the data editor
+column_config = {{
+    "id": None,
+    "team_member": st.column_config.SelectboxColumn(
+        "Team Member",
+        options=team_members,
+        required=True,
+        width="medium"
+    ),
+    "label": st.column_config.TextColumn(
+        "Label",
+        required=True,
+        width="medium"
+    ),
+    "description": st.column_config.TextColumn(
+        "Description",
+        required=True,
+        width="large"
+    ),
+    "status": st.column_config.SelectboxColumn(
+        "Status",
+        options=store.STATUS_OPTIONS,
+        required=True,
+        width="medium"
+    )
+}}
+
+# Editable table
+edited_df = st.data_editor(
+    display_df,
+    column_config=column_config,
+    num_rows="dynamic",
+    use_container_width=True,
+    hide_index=True,
+    key="task_editor"
+)
+
+st.markdown("---")
+
+
+def apply_edits():
+    """Merge the edited rows back into all_tasks, with new ids for the rows added this week."""
+    # Remove tasks from other weeks
+    other_weeks_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] != WEEK_NUM].copy()
+
+    # If filtered, keep this week's tasks the filter hides
+    hidden_tasks = week_tasks.drop(filtered_tasks.index)
+
+    # Add week column; edited tasks keep their IDs
+    if not edited_df.empty:
+        new_week_tasks = edited_df.copy()
+        new_week_tasks["week"] = WEEK_NUM
+
+        # Generate IDs for the added rows, above the archived ones too
+        added = new_week_tasks["id"].isna()
+        first_id = archive.next_id(st.session_state.all_tasks)
+        new_week_tasks.loc[added, "id"] = list(range(first_id, first_id + int(added.sum())))
+
+        # Reorder columns
+        new_week_tasks = new_week_tasks[store.TASK_COLUMNS]
+
+        # Combine: other weeks + hidden tasks of this week + edited tasks
+        st.session_state.all_tasks = pd.concat([other_weeks_tasks, hidden_tasks, new_week_tasks], ignore_index=True)
+    else:
+        st.session_state.all_tasks = pd.concat([other_weeks_tasks, hidden_tasks], ignore_index=True)
+    st.session_state.all_tasks = store.typed_tasks(st.session_state.all_tasks)
+
+    # Keep the change for undo
+    saved_week_tasks = st.session_state.all_tasks[st.session_state.all_tasks["week"] == WEEK_NUM]
+    undo.record(f"week_{{WEEK_NUM}}", "all_tasks", week_tasks, saved_week_tasks, f"edit of week {{WEEK_NUM}} tasks")
+
+
+if sync.autosave_enabled():
+    # Queue each completed edit; rows still being filled in wait until every cell is set
+    if has_edits and edited_df.drop(columns="id").replace("", None).isna().any(axis=None):
+        st.caption("✏️ Fill in every cell of the new or edited rows to save them")
+    elif has_edits:
+        apply_edits()
+        sync.edited("all_tasks")
+        del st.session_state["task_editor"]
+        st.rerun()
+    else:
+        st.caption("💾 Changes are saved automatically")
+
+# Save button
+elif st.button("💾 Save Changes", type="primary"):
+    apply_edits()
+    save_tasks(week_tasks)
+    st.success("Tasks saved!")
+    st.rerun()
+
+sync.finish_rerun()
+'''
+
+
+def page_file(pages_dir, week):
+    return pages_dir / f"Week_{week:02d}.py"
+
+
+def page_source(week):
+    return WEEK_PAGE_TEMPLATE.format(week_num=week)
+
+
+def existing_weeks(pages_dir):
+    """Return the sorted week numbers that have a page."""
+    return sorted(int(m.group(1)) for f in pages_dir.glob("Week_*.py") if (m := re.fullmatch(r"Week_(\d+)", f.stem)))
+
+
+def plan_rollover(all_tasks, targets, active):
+    """Return (carried tasks, report) for activating the `targets` weeks after the `active` ones.
+
+    Targets that already have tasks keep them and get nothing carried. The
+    others get the open tasks of their source: the nearest earlier week that
+    is active or has tasks. The report has one row per target: week, source
+    week (0 if none), tasks carried and tasks it already had.
+    """
+    targets = sorted(set(targets))
+    has_tasks = set(all_tasks["week"].unique()) & set(targets)
+    sources = pd.Index(sorted(set(active) | has_tasks))
+    to_fill = [w for w in targets if w not in has_tasks]
+    # Nearest source before each week to fill, in one searchsorted
+    positions = sources.searchsorted(to_fill) - 1
+    chain = pd.DataFrame({
+        "week": pd.Series(to_fill, dtype="int64"),
+        "from_week": [int(sources[p]) if p >= 0 else 0 for p in positions],
+    })
+
+    # Every open task of a source week, once per week it is carried into
+    open_tasks = all_tasks[(all_tasks["status"] != "Done") & all_tasks["week"].isin(chain["from_week"])]
+    carried = (open_tasks.rename(columns={"week": "from_week"}).astype({"from_week": "int64"})
+               .merge(chain, on="from_week").sort_values(["week", "id"], kind="stable"))
+    start = archive.next_id(all_tasks)
+    carried = carried.assign(id=range(start, start + len(carried)))[store.TASK_COLUMNS]
+
+    report = chain.merge(carried.groupby("week").size().rename("tasks").reset_index(), on="week", how="left")
+    existing = all_tasks.loc[all_tasks["week"].isin(has_tasks), "week"].value_counts()
+    kept = pd.DataFrame({"week": existing.index.astype("int64"), "from_week": 0, "tasks": 0, "existing": existing.values})
+    report = (pd.concat([report.assign(existing=0), kept], ignore_index=True)
+              .fillna({"tasks": 0}).astype("int64").sort_values("week"))
+    return store.typed_tasks(carried), report.reset_index(drop=True)
+
+
+def create_weeks(first, last, pages_dir):
+    """Activate weeks `first` to `last`: carry over open tasks, then write the pages that don't exist yet.
+
+    Returns the report of plan_rollover() for the weeks that were created.
+    """
+    active = existing_weeks(pages_dir)
+    targets = [w for w in range(max(first, 1), min(last, LAST_WEEK) + 1) if w not in active]
+    if not targets:
+        return pd.DataFrame(columns=["week", "from_week", "tasks", "existing"])
+    # Write queued edits first so they don't overwrite the new weeks' tasks
+    autosave.flush(force=True)
+
+    tasks_file = store.tasks_file()
+    all_tasks = store.load_tasks(tasks_file)
+    carried, report = plan_rollover(all_tasks, targets, active)
+    if not carried.empty:
+        all_tasks = store.typed_tasks(pd.concat([all_tasks, carried], ignore_index=True))
+        previous_version = store.file_signature(tasks_file)
+        store.write_csv(all_tasks, tasks_file)
+        weeks = f"week {targets[0]}" if len(targets) == 1 else f"weeks {targets[0]}-{targets[-1]}"
+        backup.take_snapshot(f"created {weeks}")
+        analytics.update_weeks(all_tasks, sorted(carried["week"].unique()), since=previous_version)
+
+    for week in targets:
+        path = page_file(pages_dir, week)
+        tmp_file = path.with_name(f".{path.name}.tmp")
+        tmp_file.write_text(page_source(week), encoding="utf-8")
+        os.replace(tmp_file, path)
+    return report
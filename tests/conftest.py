@@ -0,0 +1,28 @@
+"""Shared fixtures: every test gets its own empty data directory."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The data directory and the metrics port are read when the planner is imported
+os.environ.setdefault("PLANNER_DATA_DIR", tempfile.mkdtemp(prefix="planner-tests-"))
+os.environ["PLANNER_METRICS_PORT"] = "0"
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from planner import analytics, archive, availability, schema, store, sync  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Point the planner at an empty data directory, with the default team active and cold caches."""
+    monkeypatch.setattr(store, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(store, "TEAMS_DIR", tmp_path / "teams")
+    for module, name in [(store, "_week_index"), (store, "_row_counts"), (archive, "_cache"),
+                         (analytics, "_ages_index"), (availability, "_index_cache"), (schema, "_checked"),
+                         (sync, "_written_tables"), (sync, "_session_writes"), (store, "_set_aside_versions")]:
+        monkeypatch.setattr(module, name, {})
+    store.use_team(store.DEFAULT_TEAM)
+    yield tmp_path
+    store.use_team(store.DEFAULT_TEAM)
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from planner import archive, export, store
+
+
+def tasks(rows):
+    return pd.DataFrame(rows, columns=store.TASK_COLUMNS)
+
+
+def week_one():
+    return tasks([
+        [1, 1, "Alice", "Docs", "w1a", "Done"],
+        [2, 1, "Alice", "Docs", "w1 open", "In progress"],
+        [3, 1, "Bob", "Build", "w1b", "Done"],
+        [4, 1, "Bob", "Build", "w1c", "Done"],
+    ])
+
+
+def test_archive_done_moves_done_tasks_of_closed_weeks():
+    store.write_csv(week_one(), store.tasks_file())
+
+    assert archive.archive_done(1) == {1: 3}
+
+    assert store.load_tasks()["description"].tolist() == ["w1 open"]
+    assert sorted(archive.load_archive()["description"]) == ["w1a", "w1b", "w1c"]
+    assert archive.week_counts() == {1: 3}
+    assert archive.max_id() == 4
+
+
+def test_next_id_skips_archived_ids():
+    store.write_csv(week_one(), store.tasks_file())
+    archive.archive_done(1)
+
+    assert archive.next_id(store.load_tasks()) == 5
+    assert archive.next_id(tasks([])) == 5
+
+
+def test_reused_ids_do_not_drop_archived_tasks():
+    store.write_csv(week_one(), store.tasks_file())
+    archive.archive_done(1)
+    # Week 12 saved with ids 3 and 4 again, as before ids were allocated above the archive
+    hot = pd.concat([store.load_tasks(), tasks([
+        [3, 12, "Bob", "Build", "w12a", "Done"],
+        [4, 12, "Bob", "Build", "w12b", "Done"],
+    ])])
+    store.write_csv(hot, store.tasks_file())
+
+    assert sorted(archive.with_archived(store.load_tasks())["description"]) == ["w1 open", "w12a", "w12b", "w1a", "w1b", "w1c"]
+    exported = pd.concat(export._task_chunks())
+    assert sorted(exported["description"]) == ["w1 open", "w12a", "w12b", "w1a", "w1b", "w1c"]
+
+    archive.archive_done(12)
+    assert sorted(archive.load_archive()["description"]) == ["w12a", "w12b", "w1a", "w1b", "w1c"]
+
+
+def test_with_archived_ignores_tasks_still_in_the_hot_file():
+    store.write_csv(week_one(), store.tasks_file())
+    archive.archive_done(1)
+    # An archive run that stopped before rewriting the tasks file
+    store.write_csv(week_one(), store.tasks_file())
+
+    combined = archive.with_archived(store.load_tasks())
+    assert sorted(combined["description"]) == ["w1 open", "w1a", "w1b", "w1c"]
@@ -0,0 +1,128 @@
+import pytest
+
+from planner import autosave, store
+
+
+@pytest.fixture(autouse=True)
+def slow_autosave(monkeypatch):
+    """Keep the background thread from writing anything while a test runs."""
+    monkeypatch.setattr(autosave, "DEBOUNCE_SECONDS", 3600)
+    monkeypatch.setattr(autosave, "MAX_DELAY_SECONDS", 3600)
+
+
+def test_flush_keeps_the_callers_team():
+    other = store.create_team("Other", ["Alice"])
+    written = []
+
+    def write(df):
+        written.append(store.active_team())
+
+    store.use_team(other)
+    autosave.queue(store.DEFAULT_TEAM, "tasks", None, write, "session")
+    autosave.queue(other, "tasks", None, write, "session")
+    assert sorted(autosave.flush(force=True)) == sorted([(store.DEFAULT_TEAM, "tasks", "session"),
+                                                         (other, "tasks", "session")])
+
+    assert sorted(written) == sorted([store.DEFAULT_TEAM, other])
+    assert store.active_team() == other
+    assert store.tasks_file().parent == store.TEAMS_DIR / other
+
+
+def test_flush_restores_the_team_when_a_write_fails():
+    other = store.create_team("Other", ["Alice"])
+
+    def write(df):
+        raise OSError("disk full")
+
+    store.use_team(other)
+    autosave.queue(store.DEFAULT_TEAM, "tasks", None, write, "session")
+    autosave.flush(force=True)
+
+    assert store.active_team() == other
+    assert autosave.last_error(store.DEFAULT_TEAM, "tasks") == "disk full"
+    autosave.discard(store.DEFAULT_TEAM, "tasks")
+
+
+def test_flush_writes_only_due_tables():
+    written = []
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "support", written.append, "session")
+    autosave.queue(store.DEFAULT_TEAM, "on_hold_tasks", "on hold", written.append, "session")
+    # The support edit is older than the debounce delay, the on-hold edit isn't
+    with autosave._cond:
+        autosave._pending[(store.DEFAULT_TEAM, "daily_df", "session")]["last"] -= autosave.DEBOUNCE_SECONDS
+
+    assert autosave.flush() == [(store.DEFAULT_TEAM, "daily_df", "session")]
+    assert written == ["support"]
+    assert autosave.is_pending(store.DEFAULT_TEAM, "on_hold_tasks", "session")
+
+    autosave.flush(force=True)
+    assert written == ["support", "on hold"]
+    assert not autosave.is_pending(store.DEFAULT_TEAM, "on_hold_tasks")
+
+
+def test_edit_being_written_is_still_pending():
+    pending = []
+
+    def write(df):
+        pending.append(autosave.is_pending(store.DEFAULT_TEAM, "daily_df", "session"))
+
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "support", write, "session")
+    autosave.flush(force=True)
+
+    # A reload while the write waits for the file would drop the edits it is writing
+    assert pending == [True]
+    assert not autosave.is_pending(store.DEFAULT_TEAM, "daily_df", "session")
+
+
+def test_newer_edit_replaces_the_queued_one():
+    written = []
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "first", written.append, "session")
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "second", written.append, "session")
+
+    autosave.flush(force=True)
+
+    assert written == ["second"]
+    assert autosave.last_write(store.DEFAULT_TEAM, "daily_df") == ("session", None)
+
+
+def test_edits_of_other_sessions_are_all_written():
+    written = []
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "mine", written.append, "session")
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "theirs", written.append, "other session")
+
+    autosave.flush(force=True)
+
+    assert sorted(written) == ["mine", "theirs"]
+
+
+def test_conflict_is_reported_to_the_session_not_retried():
+    def write(df):
+        raise autosave.Conflict("week 1 changed elsewhere")
+
+    autosave.queue(store.DEFAULT_TEAM, "all_tasks", "edit", write, "session")
+    autosave.flush(force=True)
+
+    assert not autosave.is_pending(store.DEFAULT_TEAM, "all_tasks")
+    assert str(autosave.conflict(store.DEFAULT_TEAM, "all_tasks", "session")) == "week 1 changed elsewhere"
+    assert autosave.conflict(store.DEFAULT_TEAM, "all_tasks", "other session") is None
+    assert autosave.last_error(store.DEFAULT_TEAM, "all_tasks") is None
+    autosave.clear_conflict(store.DEFAULT_TEAM, "all_tasks", "session")
+
+
+def test_failed_write_stays_queued_for_a_retry():
+    attempts = []
+
+    def write(df):
+        attempts.append(df)
+        if len(attempts) == 1:
+            raise OSError("file locked")
+        return "signature"
+
+    autosave.queue(store.DEFAULT_TEAM, "daily_df", "edit", write, "session")
+    autosave.flush(force=True)
+    assert autosave.is_pending(store.DEFAULT_TEAM, "daily_df", "session")
+
+    autosave.flush(force=True)
+    assert attempts == ["edit", "edit"]
+    assert autosave.last_write(store.DEFAULT_TEAM, "daily_df") == ("session", "signature")
+    assert not autosave.is_pending(store.DEFAULT_TEAM, "daily_df")
@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from planner import backup, store
+
+
+def write_tasks(rows):
+    store.write_csv(pd.DataFrame(rows, columns=store.TASK_COLUMNS), store.tasks_file())
+
+
+def objects():
+    return set(backup._objects_dir().glob("*/*.gz"))
+
+
+def test_tasks_file_is_stored_per_week():
+    write_tasks([[1, 1, "Alice", "A", "a", "Done"], [2, 2, "Bob", "B", "b", "To be started"]])
+    first = backup.take_snapshot("first", now=datetime(2026, 3, 2, 9))
+    before = objects()
+
+    write_tasks([[1, 1, "Alice", "A", "a", "Done"], [2, 2, "Bob", "B", "b", "In progress"]])
+    second = backup.take_snapshot("second", now=datetime(2026, 3, 2, 10))
+
+    # Only week 2 changed, so it is the only new object
+    assert len(objects() - before) == 1
+    manifests = {s["id"]: s for s in backup.list_snapshots()}
+    entry, previous = manifests[second]["files"]["weekly_tasks.csv"], manifests[first]["files"]["weekly_tasks.csv"]
+    assert entry["header"] == previous["header"]
+    assert entry["weeks"]["1"] == previous["weeks"]["1"]
+    assert entry["weeks"]["2"] != previous["weeks"]["2"]
+    assert manifests[second]["changed"] == ["weekly_tasks.csv"]
+
+
+def test_restore_partitioned_tasks_file():
+    write_tasks([[1, 2, "Alice", "A", "a", "Done"], [2, 1, "Bob", "B", "b", "To be started"]])
+    snapshot_id = backup.take_snapshot("first", now=datetime(2026, 3, 2, 9))
+    write_tasks([[3, 1, "Bob", "C", "c", "Done"]])
+
+    assert backup.restore(snapshot_id, ["weekly_tasks.csv"]) == ["weekly_tasks.csv"]
+
+    restored = store.load_tasks()
+    assert restored["id"].tolist() == [2, 1]
+    assert restored["week"].tolist() == [1, 2]
+
+
+def test_restore_snapshots_taken_before_partitioning():
+    write_tasks([[1, 1, "Alice", "A", "a", "Done"]])
+    content = store.tasks_file().read_bytes()
+    manifest = {"taken_at": "2026-03-01T09:00:00", "reason": "save", "changed": [],
+                "files": {"weekly_tasks.csv": backup._store_object(content)}}
+    backup._manifests_dir().mkdir(parents=True)
+    store.write_json(manifest, backup._manifests_dir() / "20260301T090000000000.json")
+    write_tasks([])
+
+    backup.restore("20260301T090000000000")
+
+    assert store.tasks_file().read_bytes() == content
+
+
+def test_prune_keeps_the_week_objects_of_kept_snapshots():
+    write_tasks([[1, 1, "Alice", "A", "a", "Done"]])
+    now = datetime(2026, 3, 2, 9)
+    snapshot_id = backup.take_snapshot("first", now=now)
+
+    backup.prune(now + timedelta(days=400))
+
+    assert [s["id"] for s in backup.list_snapshots()] == [snapshot_id]
+    backup.restore(snapshot_id)
+    assert store.load_tasks()["description"].tolist() == ["a"]
+
+
+def test_concurrent_snapshots_keep_the_index_consistent():
+    errors = []
+
+    def save(i):
+        try:
+            store.write_json({"name": f"Team {i}"}, store.data_path("team.json"))
+            backup.take_snapshot(f"save {i}")
+        except Exception as e:
+            errors.append(e)
+
+    write_tasks([[1, 1, "Alice", "A", "a", "Done"]])
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    index = store.read_json(backup._index_file())
+    assert set(index["files"]) == {"weekly_tasks.csv", "team.json"}
+    assert index["last"] == backup.list_snapshots()[-1]["id"]
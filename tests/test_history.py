@@ -0,0 +1,58 @@
+import pandas as pd
+
+from planner import history, schema, store
+
+
+def tasks(week, labels, statuses, ids=None):
+    return store.typed_tasks(pd.DataFrame({
+        "id": ids or range(1, len(labels) + 1),
+        "week": week,
+        "team_member": "Alice",
+        "label": labels,
+        "description": "a",
+        "status": statuses,
+    }))
+
+
+def test_carried_over_copies_have_their_own_history():
+    history.record_changes(tasks(1, [], [])[0:0], tasks(1, ["A"], ["In progress"], [1]), "week", week=1)
+    history.record_changes(tasks(2, [], [])[0:0], tasks(2, ["A"], ["In progress"], [2]), "week", week=2)
+    # Deleting the task from week 1 leaves its open copy in week 2
+    history.record_changes(tasks(1, ["A"], ["In progress"], [1]), tasks(1, [], [])[0:0], "week", week=1)
+
+    state = history.state_as_of().set_index("task_key")
+    assert state["status"].to_dict() == {"2:2": "In progress"}
+
+
+def test_renamed_task_keeps_its_history():
+    history.record_changes(tasks(1, [], [])[0:0], tasks(1, ["A"], ["To be started"]), "week", week=1)
+    history.record_changes(tasks(1, ["A"], ["To be started"]), tasks(1, ["A, renamed"], ["Done"]), "week", week=1)
+
+    state = history.state_as_of()
+    assert state[["task_key", "label", "status"]].values.tolist() == [["1:1", "A, renamed", "Done"]]
+    assert state["created_at"].notna().all()
+
+
+def test_events_keyed_by_hash_are_rekeyed_by_week_and_id():
+    current = store.typed_tasks(pd.concat([tasks(1, ["A"], ["Done"], [1]), tasks(2, ["A"], ["In progress"], [7])]))
+    store.write_csv(current, store.tasks_file())
+    hashes = store.task_keys(current).astype(str).tolist()
+    pd.DataFrame({
+        "timestamp": "2026-03-02T09:00:00",
+        "source": ["week", "week", "import", "week"],
+        "task_key": [hashes[0], hashes[1], hashes[0], "123"],
+        "week": ["1", "2", "", "3"],
+        "team_member": "Alice",
+        "label": ["A", "A", "A", "gone"],
+        "from_status": "",
+        "to_status": ["Done", "In progress", "To be started", "Done"],
+    }).to_csv(history.events_file(), index=False)
+    history.take_snapshot()
+
+    schema.migrate()
+
+    events = history._read_events()
+    # Imports had no week: the first week holding the task; deleted tasks keep their hash
+    assert events["task_key"].tolist() == ["1:1", "2:7", "1:1", "3:123"]
+    assert not list(history.snapshot_dir().glob("state_*.csv"))
+    assert schema.pending() == {}
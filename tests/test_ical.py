@@ -0,0 +1,8 @@
+from planner import ical
+
+
+def test_content_disposition_of_a_non_latin_1_member_name():
+    header = ical.content_disposition("李 \"Li\"")
+
+    header.encode("latin-1")
+    assert header == "inline; filename=\"support__ _Li_.ics\"; filename*=UTF-8''support_%E6%9D%8E%20%22Li%22.ics"
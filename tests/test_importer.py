@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+
+from planner import archive, importer, store
+
+
+def setup_team(hot_rows):
+    store.write_csv(pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}), store.team_file())
+    store.tasks_file().write_text("id,week,team_member,label,description,status\n" + hot_rows)
+
+
+def import_csv(text):
+    return importer.import_tasks(io.StringIO(text))
+
+
+def test_new_ids_start_above_archived_ids():
+    setup_team("1,1,Alice,A,a,Done\n7,1,Bob,B,b,Done\n2,2,Alice,C,c,In progress\n")
+    archive.archive_done(1)
+
+    report = import_csv("member,title,description,week\nBob,D,d,2\n")
+
+    assert report["imported"] == 1
+    assert store.load_tasks()["id"].tolist() == [2, 8]
+
+
+def test_missing_and_invalid_ids_are_ignored():
+    setup_team(",1,Alice,A,a,Done\nabc,1,Bob,B,b,Done\n")
+
+    report = import_csv("member,title,description,week\nBob,D,d,2\n")
+
+    assert report["imported"] == 1
+    assert pd.read_csv(store.tasks_file(), dtype=str, keep_default_na=False)["id"].tolist() == ["", "abc", "1"]
+
+
+def test_file_without_a_final_newline_keeps_its_last_row():
+    setup_team("1,1,Alice,A,a,Done")
+
+    report = import_csv("member,title,description,week\nBob,B,b,2\n")
+
+    assert report["imported"] == 1
+    assert store.load_tasks()["label"].tolist() == ["A", "B"]
+    assert not list(store.tasks_file().parent.glob("*.tmp"))
+
+
+def test_archived_tasks_are_not_imported_again():
+    setup_team("1,1,Alice,A,a,Done\n")
+    archive.archive_done(1)
+
+    report = import_csv("member,title,description,week,status\nAlice,A,a,1,Done\nBob,B,b,1,Done\n")
+
+    assert (report["imported"], report["duplicates"]) == (1, 1)
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from planner import roster, store
+
+
+def setup_team():
+    store.write_csv(pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}), store.team_file())
+    store.write_csv(pd.DataFrame({
+        "id": [1, 2], "week": [1, 1], "team_member": ["Alice", "Bob"],
+        "label": ["A", "B"], "description": ["a", "b"], "status": ["Done", "In progress"],
+    }), store.tasks_file())
+
+
+def stage_interrupted_rename():
+    """Leave a journaled rename of Alice to Alicia that stopped before swapping the files in."""
+    staged = {}
+    for name, df in [("team_members.csv", roster.load_roster()), ("weekly_tasks.csv", store.load_tasks())]:
+        df = df.astype(object).replace({"name": {"Alice": "Alicia"}, "team_member": {"Alice": "Alicia"}})
+        tmp_file = store.data_path(name + ".roster")
+        df.to_csv(tmp_file, index=False)
+        staged[name] = tmp_file.name
+    store.write_json({"reason": "renamed Alice to Alicia", "files": staged}, roster.journal_file())
+
+
+def test_rename_member_rewrites_every_file():
+    setup_team()
+
+    changed = roster.rename_member(1, "Alicia")
+
+    assert changed == {"weekly_tasks.csv": 1}
+    assert roster.load_roster()["name"].tolist() == ["Alicia", "Bob"]
+    assert store.load_tasks()["team_member"].tolist() == ["Alicia", "Bob"]
+    assert not roster.journal_file().exists()
+    assert not list(store.team_dir().glob("*.roster"))
+
+
+def test_recover_finishes_a_journaled_change():
+    setup_team()
+    stage_interrupted_rename()
+
+    assert roster.recover() is True
+
+    assert roster.load_roster()["name"].tolist() == ["Alicia", "Bob"]
+    assert store.load_tasks()["team_member"].tolist() == ["Alicia", "Bob"]
+    assert not roster.journal_file().exists()
+    assert roster.recover() is False
+
+
+def test_recover_after_a_partial_swap():
+    setup_team()
+    stage_interrupted_rename()
+    # The roster was already renamed into place when the process stopped
+    os.replace(store.data_path("team_members.csv.roster"), store.team_file())
+
+    assert roster.recover() is True
+    assert store.load_tasks()["team_member"].tolist() == ["Alicia", "Bob"]
+
+
+def test_concurrent_recovery():
+    setup_team()
+    stage_interrupted_rename()
+    errors = []
+
+    def run():
+        try:
+            roster.recover()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert roster.load_roster()["name"].tolist() == ["Alicia", "Bob"]
+
+
+def test_recover_keeps_recent_staged_files_without_a_journal():
+    setup_team()
+    fresh, stale = store.data_path("on_hold.csv.roster"), store.data_path("leave.csv.roster")
+    fresh.write_text("staged by another session")
+    stale.write_text("left by a crash")
+    old = time.time() - roster.STALE_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    assert roster.recover() is False
+
+    assert fresh.exists()
+    assert not stale.exists()
@@ -0,0 +1,48 @@
+import warnings
+
+import pandas as pd
+
+from planner import schema, store
+
+
+def test_rows_without_a_valid_week_are_set_aside():
+    store.tasks_file().write_text(
+        "id,week,team_member,label,description,status\n"
+        "1,1,Alice,A,a,Done\n"
+        "2,soon,Bob,B,b,Done\n"
+        "3,2.5,Bob,C,c,Done\n"
+    )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ran = schema.migrate()
+
+    assert ran["weekly_tasks.csv"][-1] == "set aside 2 row(s) in weekly_tasks.rejected.csv"
+    assert store.load_tasks()["id"].tolist() == [1]
+    rejected = pd.read_csv(store.rejects_file("weekly_tasks.csv"), dtype=str)
+    assert rejected["description"].tolist() == ["b", "c"]
+    assert set(rejected["reason"]) == {"set aside tasks without a valid week number"}
+    assert schema.rejected() == {"weekly_tasks.csv": 2}
+
+
+def test_set_aside_rows_accumulate():
+    store.tasks_file().write_text("id,week,team_member,label,description,status\n1,x,Alice,A,a,Done\n")
+    schema.migrate()
+    store.tasks_file().write_text("id,week,team_member,label,description,status\n2,y,Bob,B,b,Done\n")
+    schema.invalidate(["weekly_tasks.csv"])
+    schema.migrate()
+
+    assert schema.rejected() == {"weekly_tasks.csv": 2}
+
+
+def test_only_existing_files_get_a_version():
+    store.tasks_file().write_text("id,week,team_member,label,description,status\n1,1,Alice,A,a,Done\n")
+
+    schema.migrate()
+
+    assert schema._versions() == {"weekly_tasks.csv": schema.current_version("weekly_tasks.csv")}
+    # A file that appears later (here in an old layout) still gets its migrations
+    store.support_file().write_text("date,primary_support\n03/02/2026,Alice\n")
+    assert list(schema.pending()) == ["daily_support.csv"]
+    schema.migrate()
+    assert store.support_file().read_text().splitlines() == ["date,primary_support,secondary_support", "2026-03-02,Alice,"]
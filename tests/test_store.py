@@ -0,0 +1,90 @@
+import io
+
+import pandas as pd
+import pytest
+
+from planner import store
+
+HEADER = b"id,week,team_member,label,description,status\n"
+
+
+def scan(data):
+    return store._scan_weeks(io.BytesIO(data))
+
+
+def write(tmp_path, data):
+    path = tmp_path / "weekly_tasks.csv"
+    path.write_bytes(data)
+    return path
+
+
+def test_scan_empty_file():
+    assert scan(b"") == (b"", {}, {})
+
+
+@pytest.mark.parametrize("header", [HEADER, HEADER.rstrip(b"\n")])
+def test_scan_header_only(header):
+    assert scan(header) == (header, {}, {})
+
+
+def test_scan_weeks_ranges_and_counts():
+    week2, week1, more_week2 = b"1,2,Alice,A,a,Done\n", b"2,1,Bob,B,b,Done\n", b"3,2,Bob,C,c,Done\n4,2,Bob,D,d,Done\n"
+    data = HEADER + week2 + week1 + more_week2
+    header, ranges, counts = scan(data)
+
+    assert header == HEADER
+    assert counts == {1: 1, 2: 3}
+    assert [data[start:end] for start, end in ranges[1]] == [week1]
+    assert [data[start:end] for start, end in ranges[2]] == [week2, more_week2]
+
+
+def test_scan_no_trailing_newline():
+    data = HEADER + b"1,1,Alice,A,a,Done\n2,12,Bob,B,b,Done"
+    _, ranges, counts = scan(data)
+
+    assert counts == {1: 1, 12: 1}
+    assert [data[start:end] for start, end in ranges[12]] == [b"2,12,Bob,B,b,Done"]
+
+
+def test_scan_quoted_newlines_and_blank_lines():
+    data = HEADER + b'1,3,Alice,A,"two\nlines, and a comma",Done\n\n2,4,Bob,B,"""quoted""",Done\n'
+    _, ranges, counts = scan(data)
+
+    assert counts == {3: 1, 4: 1}
+    assert [data[start:end] for start, end in ranges[4]] == [b'2,4,Bob,B,"""quoted""",Done\n']
+
+
+def test_load_weeks_matches_load_tasks(tmp_path):
+    path = write(tmp_path, HEADER + b'1,2,Alice,A,"x\ny",Done\n2,1,Bob,B,b,In progress\n3,2,Bob,C,c,Done')
+
+    loaded = store.load_weeks([1, 2], path)
+    expected = store.load_tasks(path)
+    expected = pd.concat([expected[expected["week"] == 1], expected[expected["week"] == 2]])
+    assert loaded["description"].tolist() == expected["description"].tolist() == ["b", "x\ny", "c"]
+    assert store.week_sizes(path) == {1: 1, 2: 2}
+
+
+@pytest.mark.parametrize("data", [b"", HEADER])
+def test_load_weeks_without_rows(tmp_path, data):
+    path = write(tmp_path, data)
+
+    assert store.load_weeks([1], path).empty
+    assert store.week_sizes(path) == {}
+
+
+def test_tasks_without_a_valid_week_are_set_aside_on_load():
+    path = store.tasks_file()
+    path.write_bytes(HEADER + b"1,1,Alice,A,a,Done\n2,,Bob,B,b,Done\n3,soon,Bob,C,c,Done\n")
+
+    assert store.load_tasks()["label"].tolist() == ["A"]
+    assert store.load_weeks([1], path)["label"].tolist() == ["A"]
+    # Loading the same version again doesn't set the rows aside twice
+    store.load_tasks()
+    rejected = pd.read_csv(store.rejects_file("weekly_tasks.csv"), dtype=str, keep_default_na=False)
+    assert rejected["label"].tolist() == ["B", "C"]
+
+
+def test_rows_gauge_counts_a_header_only_tasks_file():
+    store.tasks_file().write_bytes(HEADER)
+
+    assert store._table_rows()[(("table", "tasks"), ("team", store.DEFAULT_TEAM))] == 0
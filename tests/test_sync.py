@@ -0,0 +1,132 @@
+import pandas as pd
+import pytest
+
+from planner import autosave, history, store, sync
+
+
+def tasks(statuses):
+    return store.typed_tasks(pd.DataFrame({
+        "id": range(1, len(statuses) + 1),
+        "week": [1, 1, 2],
+        "team_member": ["Alice", "Bob", "Alice"],
+        "label": ["A", "B", "C"],
+        "description": ["a", "b", "c"],
+        "status": statuses,
+    }))
+
+
+def base(df):
+    return sync.partition_digests("all_tasks", df)
+
+
+def test_write_partition_logs_the_changed_weeks_only(monkeypatch):
+    loaded = tasks(["To be started", "To be started", "To be started"])
+    store.write_csv(loaded, store.tasks_file())
+    saved = tasks(["In progress", "To be started", "To be started"])
+    sync.write_partition("all_tasks", saved, base(loaded), "session")
+
+    def load_everything(path=None):
+        raise AssertionError("the whole tasks file was reloaded")
+
+    # The next save merges onto the table of this one instead of reading the file back
+    monkeypatch.setattr(store, "load_tasks", load_everything)
+    signature = sync.write_partition("all_tasks", tasks(["In progress", "To be started", "Done"]), base(saved), "session")
+
+    assert signature == store.file_signature(store.tasks_file())
+    events = history._read_events()
+    assert events["week"].tolist() == ["1", "2"]
+    assert events["to_status"].tolist() == ["In progress", "Done"]
+
+
+def test_autosave_keeps_a_week_saved_by_another_session(monkeypatch):
+    monkeypatch.setattr(autosave, "DEBOUNCE_SECONDS", 3600)
+    loaded = tasks(["To be started", "To be started", "To be started"])
+    store.write_csv(loaded, store.tasks_file())
+
+    # Session A edits week 1; the edit waits in the autosave queue
+    edit_a = tasks(["In progress", "To be started", "To be started"])
+    autosave.queue(store.DEFAULT_TEAM, "all_tasks", edit_a,
+                   lambda df: sync.write_partition("all_tasks", df, base(loaded), "a"), "a")
+    # Meanwhile session B, which loaded the same file, saves week 2
+    sync.write_partition("all_tasks", tasks(["To be started", "To be started", "Done"]), base(loaded), "b")
+
+    autosave.flush(force=True)
+
+    saved = store.load_tasks().sort_values("label")
+    assert saved["status"].tolist() == ["In progress", "To be started", "Done"]
+    # A merged B's week in, so its session must reload rather than adopt the file
+    assert autosave.last_write(store.DEFAULT_TEAM, "all_tasks") == ("a", None)
+    events = history._read_events()
+    assert events["week"].tolist() == ["2", "1"]
+    assert events["to_status"].tolist() == ["Done", "In progress"]
+
+
+def test_own_earlier_save_is_not_a_conflict():
+    loaded = tasks(["To be started", "To be started", "To be started"])
+    store.write_csv(loaded, store.tasks_file())
+    # Session A saves week 1, then B saves week 2 before A's page has reloaded
+    first = tasks(["In progress", "To be started", "To be started"])
+    sync.write_partition("all_tasks", first, base(loaded), "a")
+    sync.write_partition("all_tasks", tasks(["To be started", "To be started", "Done"]), base(loaded), "b")
+
+    # A edits week 1 again, still on the version it loaded
+    sync.write_partition("all_tasks", tasks(["Done", "To be started", "To be started"]), base(loaded), "a")
+
+    assert store.load_tasks()["status"].tolist() == ["Done", "To be started", "Done"]
+
+
+def test_save_of_a_week_changed_elsewhere_is_refused():
+    loaded = tasks(["To be started", "To be started", "To be started"])
+    store.write_csv(loaded, store.tasks_file())
+    sync.write_partition("all_tasks", tasks(["Done", "To be started", "To be started"]), base(loaded), "b")
+
+    with pytest.raises(sync.SaveConflict, match="week 1"):
+        sync.write_partition("all_tasks", tasks(["In progress", "To be started", "To be started"]), base(loaded), "a")
+    assert store.load_tasks()["status"].tolist() == ["Done", "To be started", "To be started"]
+
+    # Saving over it is the user's call
+    sync.write_partition("all_tasks", tasks(["In progress", "To be started", "To be started"]), base(loaded), "a",
+                         force=True)
+    assert store.load_tasks()["status"].tolist() == ["In progress", "To be started", "To be started"]
+
+
+def test_merged_tasks_get_ids_not_taken_elsewhere():
+    loaded = tasks(["To be started", "To be started", "To be started"])
+    store.write_csv(loaded, store.tasks_file())
+    # Both sessions add a task with the next free id, to different weeks
+    theirs = store.typed_tasks(pd.concat([loaded, tasks(["Done"] * 3).iloc[[2]].assign(id=4, label="D")]))
+    mine = store.typed_tasks(pd.concat([loaded, tasks(["Done"] * 3).iloc[[0]].assign(id=4, label="E")]))
+    sync.write_partition("all_tasks", theirs, base(loaded), "b")
+
+    sync.write_partition("all_tasks", mine, base(loaded), "a")
+
+    saved = store.load_tasks().set_index("label")
+    assert saved.loc["D", "id"] == 4
+    assert saved.loc["E", "id"] == 5
+    assert saved["id"].is_unique
+
+
+def test_blanks_typed_in_a_session_match_blanks_read_back():
+    typed = store.typed_support(pd.DataFrame({
+        "date": ["2026-03-02"], "primary_support": ["Alice"], "secondary_support": [""],
+    }))
+    store.write_csv(typed, store.support_file())
+
+    assert sync.partition_digests("daily_df", typed) == sync.partition_digests("daily_df", store.load_support())
+
+
+@pytest.fixture
+def fresh_start(monkeypatch):
+    monkeypatch.setattr(sync, "_opened_teams", set())
+
+
+def test_open_team_runs_once(fresh_start, monkeypatch):
+    calls = []
+    monkeypatch.setattr(sync.roster, "recover", lambda team: calls.append(("recover", team)))
+    monkeypatch.setattr(sync.schema, "ensure", lambda team: calls.append(("ensure", team)))
+
+    sync.open_team("default")
+    sync.open_team("default")
+    sync.open_team("other")
+
+    assert calls == [("recover", "default"), ("ensure", "default"), ("recover", "other"), ("ensure", "other")]